@@ -1,52 +1,104 @@
+from utils.perf import STARTUP, get_rerun_timings
+STARTUP.mark("start")
 import streamlit as st
-import plotly.express as px
 import traceback
-from model.career_predictor import CareerPredictor
 from utils.astro_utils import AstroUtils
 from utils.data_processor import DataProcessor
 from utils.famous_personalities import FamousPersonalities
-from utils.astro_api import AstroAPI
-import pandas as pd
+from utils.gazetteer import get_gazetteer, split_place_label
+from utils.rate_limiter import QueueTimeoutError
+from utils.deadline import Deadline, DeadlineExceeded, timeout_for
+from config import KUNDLI_DEADLINE, GEOCODER_TIMEOUT, SHOW_PERF_TIMINGS, STARTUP_PROFILE
 import datetime
-from geopy.geocoders import Nominatim
-from geopy.exc import GeocoderTimedOut, GeocoderUnavailable
-from utils.lagna_chart_plot import plot_north_indian_chart
+from concurrent.futures import ThreadPoolExecutor, as_completed
+# Heavy libraries (sklearn, pandas, plotly, geopy, the API client) are imported
+# where first used, so the page renders before they load
+STARTUP.mark("imports")
 
-def initialize_session_state():
-    if 'predictor' not in st.session_state:
-        try:
-            st.session_state.predictor = CareerPredictor()
-        except Exception as e:
-            st.error(f"Error initializing predictor: {str(e)}")
-            st.session_state.predictor = None
+RERUN_TIMINGS = get_rerun_timings()
+
+def get_predictor():
+    """
+    The career predictor shared by every session. It is loaded on first
+    use, or before the first session when started via utils/warmup.py.
+    """
+    try:
+        with st.spinner("Loading the prediction model..."):
+            from model.career_predictor import get_predictor as get_shared_predictor
+            return get_shared_predictor()
+    except Exception as e:
+        st.error(f"Error initializing predictor: {str(e)}")
+        raise RuntimeError("Failed to initialize prediction model. Please refresh the page and try again.")
 
 def create_planet_input_form():
-    planet_positions = {}
+    """
+    The 18 planet inputs as one form: the browser keeps the selections and
+    the server runs once, on submit. Returns (planet_positions, submitted).
+    """
     zodiac_signs = AstroUtils.get_zodiac_signs()
     houses = AstroUtils.get_houses()
+    # Last submitted chart, so the form keeps it when the section is shown again
+    previous = st.session_state.get('planet_positions', {})
     
-    st.subheader("Enter Planetary Positions")
-    cols = st.columns(2)
-    
-    for idx, planet in enumerate(AstroUtils.get_planets()):
-        with cols[idx % 2]:
-            st.write(f"### {planet}")
-            house = st.selectbox(
-                f"{planet} House",
-                houses,
-                key=f"{planet}_house"
-            )
-            sign = st.selectbox(
-                f"{planet} Sign",
-                range(len(zodiac_signs)),
-                format_func=lambda x: zodiac_signs[x],
-                key=f"{planet}_sign"
-            )
-            planet_positions[planet] = {'house': house, 'sign': sign}
+    with st.form("planet_input_form"):
+        st.subheader("Enter Planetary Positions")
+        cols = st.columns(2)
+        
+        planet_positions = {}
+        for idx, planet in enumerate(AstroUtils.get_planets()):
+            with cols[idx % 2]:
+                st.write(f"### {planet}")
+                house = st.selectbox(
+                    f"{planet} House",
+                    houses,
+                    index=houses.index(previous.get(planet, {}).get('house', houses[0])),
+                    key=f"{planet}_house"
+                )
+                sign = st.selectbox(
+                    f"{planet} Sign",
+                    range(len(zodiac_signs)),
+                    index=previous.get(planet, {}).get('sign', 0),
+                    format_func=lambda x: zodiac_signs[x],
+                    key=f"{planet}_sign"
+                )
+                planet_positions[planet] = {'house': house, 'sign': sign}
+        
+        submitted = st.form_submit_button("Predict Career")
     
-    return planet_positions
+    if submitted:
+        st.session_state.planet_positions = planet_positions
+    return planet_positions, submitted
 
-def display_prediction(career, confidence_scores, top_careers=None, planet_positions=None):
+def display_similar_personalities(planet_positions, exclude_name=None):
+    """Famous people whose charts are closest to the given one"""
+    from utils.chart_similarity import similar_personalities
+    neighbours = similar_personalities(planet_positions, exclude_name=exclude_name)
+    if neighbours:
+        st.write("### Famous People With Similar Charts")
+        for neighbour in neighbours:
+            st.write(f"- **{neighbour.name}** ({neighbour.career}): {neighbour.similarity:.0%} similar")
+
+def display_prediction_reasons(planet_positions, careers):
+    """What each planet placement and matching rule added to the recommended careers"""
+    try:
+        explanations = get_predictor().explain(DataProcessor.create_feature_dict(planet_positions), careers)
+    except Exception as e:
+        st.warning(f"Could not explain this prediction: {str(e)}")
+        return
+    with st.expander("Why these careers?"):
+        for career_name, explanation in explanations.items():
+            st.write(f"**{career_name}**: {explanation.score:.2%} "
+                     f"({explanation.base:.2%} baseline plus the largest contributions below)")
+            largest = sorted(explanation.feature_contributions.items(), key=lambda item: abs(item[1]), reverse=True)
+            for feature, value in largest[:5]:
+                st.write(f"- {feature}: {value:+.2%}")
+            if explanation.rule_contributions:
+                st.write("Matching rules: " + ", ".join(
+                    f"{rule} (+{points})" for rule, points in explanation.rule_contributions.items()
+                ))
+
+def display_prediction(career, confidence_scores, top_careers=None, planet_positions=None, person_name=None):
+    import plotly.express as px
     try:
         st.subheader("Career Prediction Results")
         
@@ -57,6 +109,9 @@ def display_prediction(career, confidence_scores, top_careers=None, planet_posit
         else:
             st.write(f"### Recommended Career Path: {career}")
         
+        if planet_positions:
+            display_prediction_reasons(planet_positions, [name for name, _ in top_careers] if top_careers else [career])
+        
         # Create confidence score visualization
         careers, scores = DataProcessor.prepare_visualization_data(confidence_scores)
         fig = px.bar(
@@ -65,7 +120,11 @@ def display_prediction(career, confidence_scores, top_careers=None, planet_posit
             title="Career Confidence Scores",
             labels={'x': 'Career Options', 'y': 'Confidence Score'}
         )
-        st.plotly_chart(fig)
+        # Keyed: the Famous Personalities section shows the same figure just above
+        st.plotly_chart(fig, key="prediction_confidence_scores")
+
+        if planet_positions:
+            display_similar_personalities(planet_positions, exclude_name=person_name)
 
         # Display career insights
         st.subheader("Career Insights")
@@ -107,7 +166,68 @@ def display_prediction(career, confidence_scores, top_careers=None, planet_posit
         st.error(f"Error displaying prediction: {str(e)}")
         st.write("Something went wrong while displaying the prediction results. Please try again.")
 
+@st.cache_data(show_spinner="Evaluating the model on famous personalities...")
+def personality_accuracy(_predictor):
+    """
+    Prediction outcome for every famous personality. The model and the data
+    only change on restart, so this runs once per process, not per rerun.
+    """
+    personalities = FamousPersonalities.get_personalities()
+    exact_matches = 0
+    partial_matches = 0
+    total_confidence = 0
+
+    accuracy_data = []
+
+    for person, data in personalities.items():
+        features = DataProcessor.create_feature_dict(data['planet_positions'])
+        career, confidence_scores, top_careers = _predictor.predict(features)
+        actual_career = data['actual_career']
+
+        # Check for exact match
+        if career == actual_career:
+            exact_matches += 1
+            match_type = "Exact Match"
+            accuracy = 100
+        else:
+            # Check for partial matches in top 3
+            top_career_names = [c for c, _ in top_careers]
+            matched = False
+            for pred_career in top_career_names:
+                if (pred_career.lower() in actual_career.lower() or 
+                    actual_career.lower() in pred_career.lower()):
+                    partial_matches += 1
+                    matched = True
+                    match_type = "Partial Match"
+                    # Calculate accuracy based on position in top 3
+                    position = top_career_names.index(pred_career) + 1
+                    accuracy = 100 - (position - 1) * 20  # 100% for 1st, 80% for 2nd, 60% for 3rd
+                    break
+
+            if not matched:
+                match_type = "No Match"
+                accuracy = max(confidence_scores[career] * 100, 20)  # At least 20% accuracy
+
+        # Get confidence score for actual career
+        confidence = confidence_scores.get(actual_career, 0) * 100
+        total_confidence += confidence
+
+        # Store accuracy data
+        accuracy_data.append({
+            "Name": person,
+            "Actual Career": actual_career,
+            "Predicted Career": career,
+            "Match Type": match_type,
+            "Accuracy": accuracy,
+            "Confidence": confidence
+        })
+
+    return accuracy_data, exact_matches, partial_matches, total_confidence
+
 def display_famous_personality_prediction():
+    import pandas as pd
+    import plotly.express as px
+    
     st.subheader("Test Model with Famous Personalities")
     
     try:
@@ -117,54 +237,9 @@ def display_famous_personality_prediction():
         st.write("### Model Accuracy Statistics")
         with st.expander("View Model Accuracy Details", expanded=True):
             total_predictions = len(personalities)
-            exact_matches = 0
-            partial_matches = 0
-            total_confidence = 0
-            
-            accuracy_data = []
-            
-            for person, data in personalities.items():
-                features = DataProcessor.create_feature_dict(data['planet_positions'])
-                career, confidence_scores, top_careers = st.session_state.predictor.predict(features)
-                actual_career = data['actual_career']
-                
-                # Check for exact match
-                if career == actual_career:
-                    exact_matches += 1
-                    match_type = "Exact Match"
-                    accuracy = 100
-                else:
-                    # Check for partial matches in top 3
-                    top_career_names = [c for c, _ in top_careers]
-                    matched = False
-                    for pred_career in top_career_names:
-                        if (pred_career.lower() in actual_career.lower() or 
-                            actual_career.lower() in pred_career.lower()):
-                            partial_matches += 1
-                            matched = True
-                            match_type = "Partial Match"
-                            # Calculate accuracy based on position in top 3
-                            position = top_career_names.index(pred_career) + 1
-                            accuracy = 100 - (position - 1) * 20  # 100% for 1st, 80% for 2nd, 60% for 3rd
-                            break
-                    
-                    if not matched:
-                        match_type = "No Match"
-                        accuracy = max(confidence_scores[career] * 100, 20)  # At least 20% accuracy
-                
-                # Get confidence score for actual career
-                confidence = confidence_scores.get(actual_career, 0) * 100
-                total_confidence += confidence
-                
-                # Store accuracy data
-                accuracy_data.append({
-                    "Name": person,
-                    "Actual Career": actual_career,
-                    "Predicted Career": career,
-                    "Match Type": match_type,
-                    "Accuracy": accuracy,
-                    "Confidence": confidence
-                })
+            accuracy_data, exact_matches, partial_matches, total_confidence = personality_accuracy(
+                get_predictor()
+            )
             
             # Calculate overall statistics
             exact_match_rate = (exact_matches / total_predictions) * 100
@@ -246,7 +321,7 @@ def display_famous_personality_prediction():
                 with st.spinner("Analyzing planetary positions..."):
                     try:
                         features = DataProcessor.create_feature_dict(person_data['planet_positions'])
-                        career, confidence_scores, top_careers = st.session_state.predictor.predict(features)
+                        career, confidence_scores, top_careers = get_predictor().predict(features)
                         
                         # Display results with comparison
                         st.subheader("Model Prediction Results")
@@ -310,7 +385,8 @@ def display_famous_personality_prediction():
                                 st.info(f"Closest match in all options: **{closest_match}** with {highest_score:.2%} confidence")
                         
                         # Display career insights
-                        display_prediction(career, confidence_scores, top_careers, person_data['planet_positions'])
+                        display_prediction(career, confidence_scores, top_careers, person_data['planet_positions'],
+                                           person_name=selected_person)
                     except Exception as e:
                         st.error(f"Error during prediction: {str(e)}")
                         st.write("Something went wrong during the prediction. Please try again or select a different personality.")
@@ -318,128 +394,267 @@ def display_famous_personality_prediction():
         st.error(f"Error loading personalities: {str(e)}")
         st.write("Something went wrong while loading the famous personalities. Please refresh the page and try again.")
 
-def get_coordinates_from_location(country, state, district):
-    """Get coordinates from location details using geocoding"""
+def get_coordinates_from_location(country, state, district, deadline=None):
+    """
+    Get coordinates for a birth place from the offline gazetteer or the
+    geocode cache, going online (within the page deadline) only for new places
+    """
+    from geopy.exc import GeocoderTimedOut, GeocoderUnavailable
+    from utils.geocoding import get_geocoder
+    
+    gazetteer = get_gazetteer()
+    
+    # Nearest enclosing region we do know, used when the geocoder can't help
+    region = gazetteer.lookup(country, state) or gazetteer.lookup(country)
+    if not state.strip() and not district.strip():
+        if region:
+            return region.latitude, region.longitude
+        return 0.0, 0.0
+    
     try:
-        # Create a geocoder instance
-        geolocator = Nominatim(user_agent="career_astro_predictor")
-        
-        # Construct the location string
-        location_str = f"{district}, {state}, {country}"
-        
-        # Get location
-        location = geolocator.geocode(location_str)
+        timeout = timeout_for(deadline, GEOCODER_TIMEOUT)
+        result = get_geocoder().geocode(country, state, district, timeout=timeout)
         
-        if location:
-            return location.latitude, location.longitude
+        if result:
+            return result.latitude, result.longitude
         else:
             st.warning("Could not find exact coordinates. Using default coordinates.")
-            return 0.0, 0.0
             
-    except (GeocoderTimedOut, GeocoderUnavailable) as e:
+    except (GeocoderTimedOut, DeadlineExceeded, TimeoutError, QueueTimeoutError):
+        st.warning("Location lookup took too long. Using default coordinates.")
+    except GeocoderUnavailable as e:
         st.error(f"Error getting coordinates: {str(e)}")
-        return 0.0, 0.0
+    
+    if region:
+        return region.latitude, region.longitude
+    return 0.0, 0.0
 
 def create_birth_details_form():
-    st.subheader("Enter Birth Details")
-    
-    # Date of Birth
-    dob = st.date_input(
-        "Date of Birth",
-        min_value=datetime.date(1900, 1, 1),
-        max_value=datetime.date.today()
-    )
-    
-    # Time of Birth with manual adjustment
-    st.subheader("Time of Birth")
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        hour = st.number_input(
-            "Hour (0-23)",
-            min_value=0,
-            max_value=23,
-            value=12,
-            step=1
-        )
-    
-    with col2:
-        minute = st.number_input(
-            "Minute (0-59)",
-            min_value=0,
-            max_value=59,
-            value=0,
-            step=1
-        )
+    """
+    Date, time and place of birth as one form, so filling it in costs a
+    single rerun on submit. Returns the submitted details as a dict, or None
+    while nothing has been submitted in this run.
+    """
+    # Last submitted details, so the form keeps them when the section is shown again
+    previous = st.session_state.get('birth_details', {})
+    gazetteer = get_gazetteer()
     
-    with col3:
-        second = st.number_input(
-            "Second (0-59)",
-            min_value=0,
-            max_value=59,
-            value=0,
-            step=1
+    with st.form("birth_details_form"):
+        st.subheader("Enter Birth Details")
+        
+        # Date of Birth
+        dob = st.date_input(
+            "Date of Birth",
+            value=previous.get('dob', "today"),
+            min_value=datetime.date(1900, 1, 1),
+            max_value=datetime.date.today()
         )
+        
+        # Time of Birth
+        st.subheader("Time of Birth")
+        col1, col2, col3 = st.columns(3)
+        previous_time = previous.get('birth_time', datetime.time(12, 0, 0))
+        
+        with col1:
+            hour = st.number_input(
+                "Hour (0-23)",
+                min_value=0,
+                max_value=23,
+                value=previous_time.hour,
+                step=1
+            )
+        
+        with col2:
+            minute = st.number_input(
+                "Minute (0-59)",
+                min_value=0,
+                max_value=59,
+                value=previous_time.minute,
+                step=1
+            )
+        
+        with col3:
+            second = st.number_input(
+                "Second (0-59)",
+                min_value=0,
+                max_value=59,
+                value=previous_time.second,
+                step=1
+            )
+        
+        # Birth Place
+        st.subheader("Birth Place Details")
+        
+        # Suggestions come from the offline gazetteer; unlisted places can be typed as
+        # "District, State, Country"
+        places = gazetteer.labels()
+        previous_place = previous.get('place')
+        place = st.selectbox(
+            "Birth Place",
+            places,
+            index=places.index(previous_place) if previous_place in places else None,
+            placeholder="District, State, Country",
+            accept_new_options=True
+        ) or ""
+        
+        # Coordinates are looked up after submitting unless given here
+        manual = st.checkbox("Enter coordinates manually", value=previous.get('manual', False))
+        col1, col2 = st.columns(2)
+        with col1:
+            latitude = st.number_input(
+                "Latitude",
+                min_value=-90.0,
+                max_value=90.0,
+                value=float(previous.get('latitude', 0.0)),
+                step=0.000001,
+                format="%.6f"
+            )
+        with col2:
+            longitude = st.number_input(
+                "Longitude",
+                min_value=-180.0,
+                max_value=180.0,
+                value=float(previous.get('longitude', 0.0)),
+                step=0.000001,
+                format="%.6f"
+            )
+        
+        submitted = st.form_submit_button("Generate Kundli and Predict")
     
-    birth_time = datetime.time(hour, minute, second)
-    
-    # Display the selected time
-    st.write(f"Selected Time: {birth_time.strftime('%I:%M:%S %p')}")
-    
-    # Birth Place
-    st.subheader("Birth Place Details")
-    
-    # Country
-    country = st.text_input("Country", "India")
+    if not submitted:
+        return None
     
-    # State
-    state = st.text_input("State")
+    details = {
+        'dob': dob,
+        'birth_time': datetime.time(hour, minute, second),
+        'place': place,
+        'manual': manual,
+        'latitude': latitude,
+        'longitude': longitude,
+    }
+    st.session_state.birth_details = details
+    return details
+
+# Shared worker pool for the independent upstream calls of the Kundli flow
+KUNDLI_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="kundli")
+
+def render_birth_chart(chart_image):
+    """
+    Render an already fetched chart image. SVG goes inline as a data URI and
+    other images are served by Streamlit's own media endpoint, so the browser
+    never fetches the chart from the API's image host.
+    """
+    st.markdown("### Birth Chart")
+    st.image(chart_image.data.decode("utf-8") if chart_image.is_svg else chart_image.data)
+
+def render_kundli_details(planet_positions, lagna_sign):
+    """Render the Kundli details and the career prediction derived from them"""
+    st.subheader("Generated Kundli (Details)")
+    st.write(AstroUtils.get_planet_details(planet_positions, lagna_sign))
     
-    # District
-    district = st.text_input("District")
+    # Add a separator
+    st.markdown("---")
     
-    # Get coordinates from location
-    latitude, longitude = get_coordinates_from_location(country, state, district)
+    # Make prediction
+    st.subheader("Career Prediction")
+    features = DataProcessor.create_feature_dict(planet_positions)
+    career, confidence_scores, top_careers = get_predictor().predict(features)
+    display_prediction(career, confidence_scores, top_careers, planet_positions)
+
+def generate_kundli(dob, birth_time, latitude, longitude, deadline=None):
+    """
+    Fetch the chart image and the planetary positions concurrently and render
+    each section as soon as its call completes. Both calls share `deadline`
+    and fall back to local calculations once it runs out.
+
+    Worker threads only perform I/O and computation; every Streamlit call stays
+    on the script thread, filling placeholders created in page order.
+    """
+    from utils.astro_api import AstroAPI
     
-    # Display coordinates
-    st.write(f"Coordinates: Latitude {latitude:.6f}, Longitude {longitude:.6f}")
+    chart_slot = st.empty()
+    details_slot = st.empty()
     
-    # Allow manual coordinate adjustment if needed
-    st.write("You can adjust the coordinates manually if needed:")
-    col1, col2 = st.columns(2)
-    with col1:
-        latitude = st.number_input(
-            "Latitude",
-            min_value=-90.0,
-            max_value=90.0,
-            value=float(latitude),
-            step=0.000001,
-            format="%.6f"
-        )
-    with col2:
-        longitude = st.number_input(
-            "Longitude",
-            min_value=-180.0,
-            max_value=180.0,
-            value=float(longitude),
-            step=0.000001,
-            format="%.6f"
-        )
+    futures = {
+        KUNDLI_EXECUTOR.submit(
+            AstroAPI.get_horoscope_chart, dob, birth_time, latitude, longitude, deadline=deadline
+        ): "chart",
+        KUNDLI_EXECUTOR.submit(
+            AstroUtils.calculate_planet_positions, dob, birth_time, latitude, longitude, deadline
+        ): "details",
+    }
     
-    return dob, birth_time, latitude, longitude
+    for future in as_completed(futures):
+        section = futures[future]
+        if section == "chart":
+            with chart_slot.container():
+                try:
+                    render_birth_chart(future.result())
+                except Exception as e:
+                    st.error(f"Error generating birth chart: {str(e)}")
+        else:
+            with details_slot.container():
+                try:
+                    planet_positions, lagna_sign = future.result()
+                    render_kundli_details(planet_positions, lagna_sign)
+                except Exception as e:
+                    st.error(f"Error generating Kundli: {str(e)}")
+                    st.error(traceback.format_exc())
 
-def display_birth_chart(birth_date, birth_time, latitude, longitude):
-    """Display birth chart using Free Astrology API"""
-    try:
-        # Get horoscope chart SVG
-        svg_code = AstroAPI.get_horoscope_chart_svg(birth_date, birth_time, latitude, longitude)
+@st.fragment
+def manual_input_section():
+    with RERUN_TIMINGS.section("manual_input"):
+        st.header("Manual Planetary Positions")
+        planet_positions, submitted = create_planet_input_form()
         
-        # Display the SVG chart
-        st.markdown("### Birth Chart")
-        st.markdown(svg_code, unsafe_allow_html=True)
+        if submitted:
+            try:
+                features = DataProcessor.create_feature_dict(planet_positions)
+                career, confidence_scores, top_careers = get_predictor().predict(features)
+                display_prediction(career, confidence_scores, top_careers, planet_positions)
+            except Exception as e:
+                st.error(f"Error making prediction: {str(e)}")
+
+@st.fragment
+def birth_details_section():
+    with RERUN_TIMINGS.section("birth_details"):
+        st.header("Birth Details Input")
+        details = create_birth_details_form()
         
-    except Exception as e:
-        st.error(f"Error generating birth chart: {str(e)}")
+        if details:
+            # One time budget for geocoding and both API calls of this submission
+            deadline = Deadline(KUNDLI_DEADLINE)
+            latitude, longitude = details['latitude'], details['longitude']
+            if not details['manual'] and not details['place']:
+                st.warning("Please choose a birth place or enter coordinates manually.")
+                return
+            if not details['manual']:
+                latitude, longitude = get_coordinates_from_location(
+                    *split_place_label(details['place']), deadline
+                )
+                # Remember them so "Enter coordinates manually" starts from here
+                st.session_state.birth_details.update(latitude=latitude, longitude=longitude)
+            st.write(f"Selected Time: {details['birth_time'].strftime('%I:%M:%S %p')}")
+            st.write(f"Coordinates: Latitude {latitude:.6f}, Longitude {longitude:.6f}")
+            generate_kundli(details['dob'], details['birth_time'], latitude, longitude, deadline)
+
+@st.fragment
+def famous_personalities_section():
+    with RERUN_TIMINGS.section("famous_personalities"):
+        display_famous_personality_prediction()
+
+# Sections are fragments: their widgets rerun only their own section
+SECTIONS = {
+    "Manual Input": manual_input_section,
+    "Birth Details": birth_details_section,
+    "Famous Personalities": famous_personalities_section,
+}
+
+def display_rerun_timings():
+    """Recent per-rerun timings (enabled with SHOW_PERF_TIMINGS)"""
+    import pandas as pd
+    with st.sidebar.expander("Rerun timings", expanded=False):
+        st.dataframe(pd.DataFrame(RERUN_TIMINGS.summary()), hide_index=True)
 
 def main():
     st.set_page_config(
@@ -455,61 +670,21 @@ def main():
     to receive career recommendations.
     """)
     
+    STARTUP.mark("first_render")
+    
     try:
-        initialize_session_state()
-        
-        if st.session_state.predictor is None:
-            st.error("Failed to initialize prediction model. Please refresh the page and try again.")
-            return
-        
-        # Create tabs for different input methods
-        tab1, tab2, tab3 = st.tabs(["Manual Input", "Birth Details", "Famous Personalities"])
-        
-        with tab1:
-            st.header("Manual Planetary Positions")
-            planet_positions = create_planet_input_form()
-            
-            if st.button("Predict Career"):
-                try:
-                    features = DataProcessor.create_feature_dict(planet_positions)
-                    career, confidence_scores, top_careers = st.session_state.predictor.predict(features)
-                    display_prediction(career, confidence_scores, top_careers, planet_positions)
-                except Exception as e:
-                    st.error(f"Error making prediction: {str(e)}")
-        
-        with tab2:
-            st.header("Birth Details Input")
-            dob, birth_time, latitude, longitude = create_birth_details_form()
-            
-            if st.button("Generate Kundli and Predict"):
-                try:
-                    # Display birth chart
-                    display_birth_chart(dob, birth_time, latitude, longitude)
-                    
-                    # Calculate planetary positions and Lagna
-                    planet_positions, lagna_sign = AstroUtils.calculate_planet_positions(
-                        dob, birth_time, latitude, longitude
-                    )
-                    
-                    # Display Kundli details
-                    st.subheader("Generated Kundli (Details)")
-                    st.write(AstroUtils.get_planet_details(planet_positions, lagna_sign))
-                    
-                    # Add a separator
-                    st.markdown("---")
-                    
-                    # Make prediction
-                    st.subheader("Career Prediction")
-                    features = DataProcessor.create_feature_dict(planet_positions)
-                    career, confidence_scores, top_careers = st.session_state.predictor.predict(features)
-                    display_prediction(career, confidence_scores, top_careers, planet_positions)
-                    
-                except Exception as e:
-                    st.error(f"Error generating Kundli: {str(e)}")
-                    st.error(traceback.format_exc())
+        # Only the selected section runs; st.tabs would run all three on every rerun
+        section = st.radio(
+            "Section",
+            list(SECTIONS),
+            horizontal=True,
+            label_visibility="collapsed",
+            key="section"
+        )
+        SECTIONS[section]()
         
-        with tab3:
-            display_famous_personality_prediction()
+        if SHOW_PERF_TIMINGS:
+            display_rerun_timings()
             
     except Exception as e:
         st.error(f"Application error: {str(e)}")
@@ -517,4 +692,8 @@ def main():
         st.write("An unexpected error occurred. Please refresh the page and try again.")
 
 if __name__ == "__main__":
-    main()
+    with RERUN_TIMINGS.run("full"):
+        main()
+    STARTUP.mark("ready")
+    if STARTUP_PROFILE:
+        STARTUP.print_once()
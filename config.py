@@ -6,4 +6,81 @@ load_dotenv()
 
 # API Configuration
 ASTRO_API_KEY = os.getenv('ASTRO_API_KEY', '')
-ASTRO_API_BASE_URL = "https://freeastrologyapi.com/api" 
\ No newline at end of file
+# Optional pool of keys (comma separated) to multiply throughput; defaults to ASTRO_API_KEY
+ASTRO_API_KEYS = [key.strip() for key in os.getenv('ASTRO_API_KEYS', ASTRO_API_KEY).split(',') if key.strip()]
+ASTRO_API_KEY_DAILY_QUOTA = int(os.getenv('ASTRO_API_KEY_DAILY_QUOTA', '1000'))  # requests per key per UTC day
+ASTRO_API_KEY_COOLDOWN = float(os.getenv('ASTRO_API_KEY_COOLDOWN', '60'))  # seconds out of rotation after a 429
+# Both can point at the local stand-in (python -m utils.astro_stub_server serve)
+ASTRO_API_BASE_URL = os.getenv('ASTRO_API_BASE_URL', "https://freeastrologyapi.com/api")
+ASTRO_CHART_URL = os.getenv('ASTRO_CHART_URL', "https://json.freeastrologyapi.com/horoscope-chart-url")
+# Persistent cache store (single SQLite file, see utils/cache_store.py)
+CACHE_DB_PATH = os.getenv('CACHE_DB_PATH', 'cache/astro_cache.sqlite3')
+CACHE_MAX_BYTES = int(os.getenv('CACHE_MAX_BYTES', str(64 * 1024 * 1024)))  # 64 MB
+CACHE_EVICTION_INTERVAL = float(os.getenv('CACHE_EVICTION_INTERVAL', '300'))  # seconds
+CACHE_STALE_GRACE = float(os.getenv('CACHE_STALE_GRACE', str(7 * 24 * 3600)))  # seconds expired entries stay servable while refreshed
+
+# In-memory tier in front of the persistent cache (see utils/memory_cache.py)
+MEMORY_CACHE_MAX_BYTES = int(os.getenv('MEMORY_CACHE_MAX_BYTES', str(16 * 1024 * 1024)))  # 16 MB
+MEMORY_CACHE_TTL = float(os.getenv('MEMORY_CACHE_TTL', '600'))  # seconds
+
+# Downloaded chart images, stored by content hash (see utils/chart_images.py)
+CHART_IMAGE_DIR = os.getenv('CHART_IMAGE_DIR', 'cache/charts')
+CHART_IMAGE_MAX_BYTES = int(os.getenv('CHART_IMAGE_MAX_BYTES', str(128 * 1024 * 1024)))  # 128 MB
+
+# Cache key canonicalization (see utils/cache_keys.py)
+CACHE_COORD_PRECISION = int(os.getenv('CACHE_COORD_PRECISION', '2'))  # decimals, 0.01° ≈ 1.1 km
+CACHE_TIME_PRECISION = int(os.getenv('CACHE_TIME_PRECISION', '60'))  # seconds
+
+# Client-side rate limiting for the astrology API (see utils/rate_limiter.py)
+ASTRO_API_RATE_LIMIT = float(os.getenv('ASTRO_API_RATE_LIMIT', '1.0'))  # requests per second
+ASTRO_API_BURST = float(os.getenv('ASTRO_API_BURST', '2'))
+ASTRO_API_MAX_QUEUE_WAIT = float(os.getenv('ASTRO_API_MAX_QUEUE_WAIT', '3'))  # seconds before using the local fallback
+
+# Circuit breaker for the astrology API (see utils/circuit_breaker.py)
+ASTRO_API_BREAKER_FAILURE_RATE = float(os.getenv('ASTRO_API_BREAKER_FAILURE_RATE', '0.5'))
+ASTRO_API_BREAKER_MIN_CALLS = int(os.getenv('ASTRO_API_BREAKER_MIN_CALLS', '4'))
+ASTRO_API_BREAKER_WINDOW = float(os.getenv('ASTRO_API_BREAKER_WINDOW', '60'))  # seconds
+ASTRO_API_BREAKER_COOLDOWN = float(os.getenv('ASTRO_API_BREAKER_COOLDOWN', '30'))  # seconds
+ASTRO_API_NEGATIVE_CACHE_TTL = float(os.getenv('ASTRO_API_NEGATIVE_CACHE_TTL', '60'))  # seconds
+
+# End-to-end time budget for rendering the Kundli tab (see utils/deadline.py)
+KUNDLI_DEADLINE = float(os.getenv('KUNDLI_DEADLINE', '1.5'))  # seconds
+GEOCODER_TIMEOUT = float(os.getenv('GEOCODER_TIMEOUT', '1.0'))  # seconds
+
+# Online geocoding fallback and its persistent cache (see utils/geocoding.py)
+GEOCODER_USER_AGENT = os.getenv('GEOCODER_USER_AGENT', 'career_astro_predictor')
+GEOCODER_RATE_LIMIT = float(os.getenv('GEOCODER_RATE_LIMIT', '1.0'))  # requests per second (Nominatim policy)
+GEOCODE_NEGATIVE_TTL = float(os.getenv('GEOCODE_NEGATIVE_TTL', str(7 * 24 * 60 * 60)))  # seconds to remember unknown places
+
+# Birth chart providers, most preferred first (see utils/providers.py)
+ASTRO_PROVIDERS = os.getenv('ASTRO_PROVIDERS', 'remote,local')  # any of remote, local, stub
+ASTRO_PROVIDER_HEDGE = os.getenv('ASTRO_PROVIDER_HEDGE', 'true').lower() in ('1', 'true', 'yes')
+ASTRO_PROVIDER_WAIT = float(os.getenv('ASTRO_PROVIDER_WAIT', '3'))  # seconds to wait for a preferred provider without a deadline
+ASTRO_PROVIDER_PREFER = float(os.getenv('ASTRO_PROVIDER_PREFER', '0.25'))  # seconds a preferred provider may still answer once a fallback chart is ready
+
+# Offline places file for birth place lookup (see utils/gazetteer.py)
+GAZETTEER_PATH = os.getenv('GAZETTEER_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'places.csv'))
+
+# Reference charts of famous personalities (see utils/famous_personalities.py)
+FAMOUS_PERSONALITIES_PATH = os.getenv('FAMOUS_PERSONALITIES_PATH',
+                                      os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'famous_personalities.json'))
+
+# Nearest famous charts by weighted house/sign distance (see utils/chart_similarity.py)
+SIMILARITY_HOUSE_WEIGHT = int(os.getenv('SIMILARITY_HOUSE_WEIGHT', '2'))  # per planet in a different house
+SIMILARITY_SIGN_WEIGHT = int(os.getenv('SIMILARITY_SIGN_WEIGHT', '1'))  # per planet in a different sign
+SIMILARITY_NEIGHBOURS = int(os.getenv('SIMILARITY_NEIGHBOURS', '5'))
+SIMILARITY_PREDICTION_WEIGHT = float(os.getenv('SIMILARITY_PREDICTION_WEIGHT', '0'))  # share of the neighbours' careers in predictions
+
+# Offline coordinate -> timezone index (see utils/timezone_resolver.py)
+TIMEZONE_GRID_RESOLUTION = float(os.getenv('TIMEZONE_GRID_RESOLUTION', '0.5'))  # degrees per grid cell
+
+# Per-rerun timings of the app's sections (see utils/perf.py)
+SHOW_PERF_TIMINGS = os.getenv('SHOW_PERF_TIMINGS', 'false').lower() in ('1', 'true', 'yes')
+PERF_MAX_RERUNS = int(os.getenv('PERF_MAX_RERUNS', '200'))
+STARTUP_PROFILE = os.getenv('STARTUP_PROFILE', 'false').lower() in ('1', 'true', 'yes')  # log time to first render
+
+# Trained model artifact, built at deploy time (see model/train.py)
+MODEL_PATH = os.getenv('MODEL_PATH', 'cache/model.pkl')
+
+# Server warm-up before the first session (see utils/warmup.py)
+READINESS_PATH = os.getenv('READINESS_PATH', 'cache/ready.json')
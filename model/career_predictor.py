@@ -1,13 +1,28 @@
-import pandas as pd
+import os
+import pickle
+import tempfile
+import threading
+import time
 import numpy as np
+import sklearn
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import LabelEncoder
-from utils.famous_personalities import FamousPersonalities
-import pickle
+from utils.famous_personalities import get_dataset
+from utils.chart_similarity import get_chart_index
+from model.explain import FEATURE_NAMES, Explanation, ForestPaths, rule_planet_shares
+from model.rules import RULE_PLANETS, compile_rules
+from config import MODEL_PATH, SIMILARITY_NEIGHBOURS, SIMILARITY_PREDICTION_WEIGHT
 from pathlib import Path
 
+# Bump when the pickled artifact's layout changes; older artifacts are retrained
+MODEL_FORMAT_VERSION = 2
+
+# Shares of the forest's probability and the normalized rule score in a career's combined score
+MODEL_WEIGHT = 0.6
+RULES_WEIGHT = 0.4
+
 class CareerPredictor:
-    def __init__(self):
+    def __init__(self, model_path=MODEL_PATH):
         try:
             self.model = RandomForestClassifier(n_estimators=300, random_state=42, max_depth=15)
             self.label_encoder = LabelEncoder()
@@ -19,8 +34,11 @@ class CareerPredictor:
                 'Sports/Athletics', 'Writing/Literature', 'Public Service', 'Research/Academia',
                 'Physical Education', 'Teaching/Professor'
             ]
-            self._rules_cache = {}  # Cache for astrological rules
-            self._initialize_model()
+            self.rules = compile_rules(self.career_options)  # Lookup tables for the astrological rules
+            self._rule_shares = rule_planet_shares(self.rules)  # Rule points -> planet houses, for explain()
+            self._forest_paths = (None, None)  # (model, its ForestPaths), built on first explain()
+            if model_path is not None:  # None leaves the model untrained, for model/train.py
+                self._initialize_model(model_path)
         except Exception as e:
             print(f"Error initializing model: {e}")
             self.model = None
@@ -29,212 +47,22 @@ class CareerPredictor:
                 'Physics/Science', 'Technology/Entrepreneurship', 'Politics/Social Reform',
                 'Engineering', 'Management', 'IT', 'Medical', 'Arts/Creative'
             ]
-            self._rules_cache = {}
+            self.rules = compile_rules(self.career_options)
+            self._rule_shares = rule_planet_shares(self.rules)
+            self._forest_paths = (None, None)
 
     def _get_astrological_rules(self, features):
         """Apply traditional astrological rules for career prediction"""
-        # Create a cache key from the features
-        cache_key = tuple(sorted(features.items()))
-        if cache_key in self._rules_cache:
-            return self._rules_cache[cache_key]
-
-        # Convert data to normalized format if needed
-        normalized_features = {}
-        for planet in ['Sun', 'Moon', 'Mars', 'Mercury', 'Jupiter', 'Venus', 'Saturn']:
-            if planet in features and isinstance(features[planet], dict) and 'house' in features[planet]:
-                normalized_features[f'{planet}_house'] = features[planet]['house']
-                normalized_features[f'{planet}_sign'] = features[planet]['sign']
-            elif f'{planet}_house' in features:
-                normalized_features[f'{planet}_house'] = features[f'{planet}_house']
-                normalized_features[f'{planet}_sign'] = features[f'{planet}_sign']
-            else:
-                normalized_features[f'{planet}_house'] = 1
-                normalized_features[f'{planet}_sign'] = 0
-        
-        rules_score = {}
-        all_careers = self.career_options.copy()
-        if 'Physical Education' not in all_careers:
-            all_careers.append('Physical Education')
-        
-        for career in all_careers:
-            rules_score[career] = 0
-            
-        # Ensure all careers used in rules exist in the rules_score dictionary
-        for career in ['Management', 'Politics/Social Reform', 'Business/Finance', 'Public Service',
-                      'Arts/Creative', 'Music/Performance', 'Writing/Literature', 'Sports/Athletics',
-                      'IT', 'Engineering', 'Media/Communication', 'Education/Research', 'Research/Academia',
-                      'Law', 'Physics/Science', 'Technology/Entrepreneurship', 'Medical', 'Psychology',
-                      'Environmental Science', 'Architecture', 'Physical Education', 'Teaching/Professor']:
-            if career not in rules_score:
-                rules_score[career] = 0
-        
-        # Sun in 10th house - Career success and recognition
-        if normalized_features['Sun_house'] == 10:
-            rules_score['Management'] += 3
-            rules_score['Politics/Social Reform'] += 3
-            rules_score['Business/Finance'] += 3
-            rules_score['Public Service'] += 2
-        
-        # Sun in 5th house - Creative expression and leadership
-        if normalized_features['Sun_house'] == 5:
-            rules_score['Arts/Creative'] += 3
-            rules_score['Music/Performance'] += 3
-            rules_score['Writing/Literature'] += 2
-            rules_score['Sports/Athletics'] += 2
-        
-        # Mercury in 3rd or 6th house - Communication and technical skills
-        if normalized_features['Mercury_house'] in [3, 6]:
-            rules_score['IT'] += 3
-            rules_score['Engineering'] += 3
-            rules_score['Media/Communication'] += 3
-            rules_score['Writing/Literature'] += 2
-        
-        # Mercury in 9th house - Higher education and philosophy
-        if normalized_features['Mercury_house'] == 9:
-            rules_score['Education/Research'] += 3
-            rules_score['Research/Academia'] += 3
-            rules_score['Law'] += 2
-            rules_score['Writing/Literature'] += 2
-            rules_score['Teaching/Professor'] += 3  # Added for teaching profession
-        
-        # Jupiter in 5th or 9th house - Education and wisdom
-        if normalized_features['Jupiter_house'] in [5, 9]:
-            rules_score['Education/Research'] += 3
-            rules_score['Law'] += 3
-            rules_score['Physics/Science'] += 3
-            rules_score['Research/Academia'] += 2
-            rules_score['Teaching/Professor'] += 3  # Added for teaching profession
-        
-        # Jupiter in 2nd house - Financial success and abundance
-        if normalized_features['Jupiter_house'] == 2:
-            rules_score['Business/Finance'] += 3
-            rules_score['Management'] += 2
-            rules_score['Technology/Entrepreneurship'] += 2
-        
-        # Mars in 1st or 10th house - Leadership and initiative
-        if normalized_features['Mars_house'] in [1, 10]:
-            rules_score['Technology/Entrepreneurship'] += 3
-            rules_score['Business/Finance'] += 3
-            rules_score['Politics/Social Reform'] += 3
-            rules_score['Sports/Athletics'] += 2
-        
-        # Mars in 6th house - Service and technical work
-        if normalized_features['Mars_house'] == 6:
-            rules_score['Engineering'] += 3
-            rules_score['IT'] += 3
-            rules_score['Medical'] += 2
-            rules_score['Public Service'] += 2
-        
-        # Venus in 5th or 7th house - Creative and artistic abilities
-        if normalized_features['Venus_house'] in [5, 7]:
-            rules_score['Arts/Creative'] += 3
-            rules_score['Media/Communication'] += 3
-            rules_score['Music/Performance'] += 3
-            rules_score['Writing/Literature'] += 2
-        
-        # Venus in 2nd house - Financial acumen and luxury
-        if normalized_features['Venus_house'] == 2:
-            rules_score['Business/Finance'] += 3
-            rules_score['Management'] += 2
-            rules_score['Architecture'] += 2
-        
-        # Saturn in 6th or 8th house - Technical and analytical skills
-        if normalized_features['Saturn_house'] in [6, 8]:
-            rules_score['Engineering'] += 3
-            rules_score['IT'] += 3
-            rules_score['Medical'] += 3
-            rules_score['Architecture'] += 2
-        
-        # Saturn in 10th house - Career discipline and authority
-        if normalized_features['Saturn_house'] == 10:
-            rules_score['Management'] += 3
-            rules_score['Public Service'] += 3
-            rules_score['Law'] += 2
-            rules_score['Education/Research'] += 2
-        
-        # Moon in 4th or 7th house - Emotional intelligence and service
-        if normalized_features['Moon_house'] in [4, 7]:
-            rules_score['Medical'] += 3
-            rules_score['Education/Research'] += 3
-            rules_score['Politics/Social Reform'] += 3
-            rules_score['Psychology'] += 3
-            rules_score['Teaching/Professor'] += 2  # Added for teaching profession
-        
-        # Moon in 5th house - Creative expression and entertainment
-        if normalized_features['Moon_house'] == 5:
-            rules_score['Arts/Creative'] += 3
-            rules_score['Music/Performance'] += 3
-            rules_score['Writing/Literature'] += 2
-        
-        # Additional planetary aspects and combinations
-        # Sun-Mercury conjunction - Communication and leadership
-        if normalized_features['Sun_house'] == normalized_features['Mercury_house']:
-            rules_score['Media/Communication'] += 2
-            rules_score['Writing/Literature'] += 2
-            rules_score['Politics/Social Reform'] += 2
-        
-        # Jupiter-Saturn combination - Education and discipline
-        if normalized_features['Jupiter_house'] == normalized_features['Saturn_house']:
-            rules_score['Education/Research'] += 2
-            rules_score['Law'] += 2
-            rules_score['Research/Academia'] += 2
-        
-        # Mars-Venus combination - Creative action and passion
-        if normalized_features['Mars_house'] == normalized_features['Venus_house']:
-            rules_score['Arts/Creative'] += 2
-            rules_score['Music/Performance'] += 2
-            rules_score['Sports/Athletics'] += 2
-        
-        # Special career indicators
-        # Environmental Science - Jupiter in 4th house
-        if normalized_features['Jupiter_house'] == 4:
-            rules_score['Environmental Science'] += 3
-            rules_score['Public Service'] += 2
-        
-        # Psychology - Moon in 8th house
-        if normalized_features['Moon_house'] == 8:
-            rules_score['Psychology'] += 3
-            rules_score['Medical'] += 2
-        
-        # Architecture - Saturn in 4th house
-        if normalized_features['Saturn_house'] == 4:
-            rules_score['Architecture'] += 3
-            rules_score['Engineering'] += 2
-        
-        # Sports/Athletics - Mars in 5th house
-        if normalized_features['Mars_house'] == 5:
-            rules_score['Sports/Athletics'] += 3
-            rules_score['Physical Education'] += 2
-        
-        # Cache the results
-        self._rules_cache[cache_key] = rules_score
-        return rules_score
-
-    def _initialize_model(self):
-        """Initialize the model with famous personalities data and astrological rules"""
-        # Try to load cached model first
-        cache_file = Path("cache/model.pkl")
-        if cache_file.exists():
-            try:
-                with open(cache_file, 'rb') as f:
-                    cached_data = pickle.load(f)
-                    self.model = cached_data['model']
-                    self.label_encoder = cached_data['label_encoder']
-                    return
-            except Exception as e:
-                print(f"Error loading cached model: {e}")
+        # The rules only look at houses; scoring them is a table lookup
+        points = self.rules.score(self.preprocess_features(features)[0::2])
+        return {career: int(score) for career, score in zip(self.rules.careers, points)}
 
-        X = []
-        y = []
-        
-        # Get famous personalities data
-        personalities = FamousPersonalities.get_personalities()
-        
-        # Create training data from famous personalities
-        for person, data in personalities.items():
-            features = self.preprocess_features(data['planet_positions'])
-            X.append(features)
-            y.append(data['actual_career'])
+    def _training_data(self):
+        """Famous personalities plus synthetic charts labelled by the astrological rules"""
+        # Famous personalities: their chart matrix is already in feature order
+        dataset = get_dataset()
+        X = dataset.features().tolist()
+        y = dataset.career_labels()
         
         # Add synthetic data with astrological rules
         np.random.seed(42)
@@ -242,7 +70,7 @@ class CareerPredictor:
         
         for _ in range(n_samples):
             features = {}
-            for planet in ['Sun', 'Moon', 'Mars', 'Mercury', 'Jupiter', 'Venus', 'Saturn']:
+            for planet in RULE_PLANETS:
                 features[f'{planet}_house'] = np.random.randint(1, 13)
                 features[f'{planet}_sign'] = np.random.randint(0, 12)
             
@@ -258,25 +86,105 @@ class CareerPredictor:
             
             X.append(self.preprocess_features(features))
             y.append(career)
-        
-        # Train the model
+        return X, y
+
+    def _initialize_model(self, model_path):
+        """Load the trained model artifact, training a new one if it is missing or stale"""
+        if self.load(model_path):
+            return
+
+        # Deploys build the artifact ahead of time (python -m model.train)
+        print(f"Training the model (no valid artifact at {model_path})")
+        self.fit()
+        try:
+            self.save(model_path)
+        except Exception as e:
+            print(f"Error caching model: {e}")
+
+    def fit(self):
+        """Train a fresh model on the famous personalities and synthetic charts"""
+        self.model = RandomForestClassifier(n_estimators=300, random_state=42, max_depth=15)
+        self.label_encoder = LabelEncoder()
+        X, y = self._training_data()
         self.train(X, y)
 
-        # Cache the trained model
+    def load(self, model_path=MODEL_PATH):
+        """Load a model artifact; returns False if it is missing or fails validation"""
+        model_path = Path(model_path)
+        if not model_path.exists():
+            return False
+        try:
+            with open(model_path, 'rb') as f:
+                cached_data = pickle.load(f)
+            if not isinstance(cached_data, dict) or cached_data.get('format_version') != MODEL_FORMAT_VERSION:
+                print(f"Ignoring model at {model_path}: old format")
+                return False
+            if cached_data.get('sklearn_version') != sklearn.__version__:
+                print(f"Ignoring model at {model_path}: trained with scikit-learn "
+                      f"{cached_data.get('sklearn_version')}, running {sklearn.__version__}")
+                return False
+            if cached_data.get('career_options') != self.career_options:
+                print(f"Ignoring model at {model_path}: different career options")
+                return False
+            self.model = cached_data['model']
+            self.label_encoder = cached_data['label_encoder']
+        except Exception as e:
+            print(f"Error loading cached model: {e}")
+            return False
+
+        problems = self.validate()
+        if problems:
+            print(f"Ignoring model at {model_path}: {'; '.join(problems)}")
+            return False
+        return True
+
+    def save(self, model_path=MODEL_PATH):
+        """Write the model artifact atomically, so readers never see a partial file"""
+        model_path = Path(model_path)
+        model_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=str(model_path.parent), suffix=".tmp")
         try:
-            cache_file.parent.mkdir(exist_ok=True)
-            with open(cache_file, 'wb') as f:
+            with os.fdopen(fd, 'wb') as f:
                 pickle.dump({
+                    'format_version': MODEL_FORMAT_VERSION,
+                    'sklearn_version': sklearn.__version__,
+                    'career_options': self.career_options,
+                    'trained_at': time.time(),
                     'model': self.model,
                     'label_encoder': self.label_encoder
                 }, f)
+            os.chmod(temp_path, 0o644)  # mkstemp files are owner-only
+            os.replace(temp_path, model_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def validate(self):
+        """Problems that make the model unusable, or an empty list"""
+        if self.model is None or not hasattr(self.model, 'classes_'):
+            return ["model is not trained"]
+        problems = []
+        try:
+            if list(self.label_encoder.classes_) != sorted(self.career_options):
+                problems.append("label encoder does not match the career options")
+            if len(self.model.classes_) != len(self.career_options):
+                problems.append(f"model has {len(self.model.classes_)} classes, expected {len(self.career_options)}")
+            X = get_dataset().features()
+            if len(X):
+                probabilities = self.model.predict_proba(X)
+                if probabilities.shape != (len(X), len(self.career_options)):
+                    problems.append(f"unexpected prediction shape {probabilities.shape}")
+                elif not np.allclose(probabilities.sum(axis=1), 1.0):
+                    problems.append("prediction probabilities do not sum to 1")
         except Exception as e:
-            print(f"Error caching model: {e}")
+            problems.append(f"prediction failed: {e}")
+        return problems
 
     def preprocess_features(self, data):
         """Convert astrological data to numerical features"""
         features = []
-        for planet in ['Sun', 'Moon', 'Mars', 'Mercury', 'Jupiter', 'Venus', 'Saturn']:
+        for planet in RULE_PLANETS:
             # Check if data is already structured with planet as key and house/sign as nested dict
             if planet in data and isinstance(data[planet], dict) and 'house' in data[planet] and 'sign' in data[planet]:
                 features.append(data[planet]['house'])
@@ -331,10 +239,9 @@ class CareerPredictor:
                 raise ValueError("Model not properly initialized")
             
             # Get model predictions
-            prediction = self.model.predict([features_processed])
             probabilities = self.model.predict_proba([features_processed])[0]
             
-            # Get astrological rules scores (now cached)
+            # Get astrological rules scores
             rules_score = self._get_astrological_rules(features)
             
             # Normalize rules scores
@@ -351,11 +258,18 @@ class CareerPredictor:
                         model_score = 0.1
                     
                     rules_weight = normalized_rules_score.get(career, 0.0)
-                    combined_scores[career] = 0.6 * model_score + 0.4 * rules_weight
+                    combined_scores[career] = MODEL_WEIGHT * model_score + RULES_WEIGHT * rules_weight
                 except Exception as e:
                     print(f"Error processing career {career}: {e}")
                     combined_scores[career] = 0.1
             
+            # Optionally blend in the careers of the most similar famous charts
+            if SIMILARITY_PREDICTION_WEIGHT > 0:
+                neighbour_scores = get_chart_index().career_scores(features_processed, SIMILARITY_NEIGHBOURS)
+                for career in combined_scores:
+                    combined_scores[career] = ((1 - SIMILARITY_PREDICTION_WEIGHT) * combined_scores[career]
+                                               + SIMILARITY_PREDICTION_WEIGHT * neighbour_scores.get(career, 0.0))
+            
             # Get top 3 career predictions
             top_careers = sorted(combined_scores.items(), key=lambda x: x[1], reverse=True)[:3]
             predicted_career = top_careers[0][0]
@@ -385,4 +299,87 @@ class CareerPredictor:
                                      (self.career_options[1], 0.05), 
                                      (self.career_options[2], 0.03)]
                 
-                return default_career, default_scores, default_top_careers
\ No newline at end of file
+                return default_career, default_scores, default_top_careers
+
+    def forest_paths(self):
+        """Tree-path decomposition of the current forest, built once per model"""
+        model, paths = self._forest_paths
+        if model is not self.model:
+            paths = ForestPaths(self.model)
+            self._forest_paths = (self.model, paths)
+        return paths
+
+    def explain(self, features, careers=None):
+        """
+        Per-feature reasons for the combined scores of `careers` (by default
+        the top 3), as {career: Explanation}. The forest part is the
+        tree-path decomposition of its probability; the rules part is the
+        exact points of each matching rule. Both come from arrays built once
+        per model, so this costs less than predict() itself.
+        """
+        if self.model is None:
+            raise ValueError("Model not properly initialized")
+        features_processed = self.preprocess_features(features)
+        houses = features_processed[0::2]
+        paths = self.forest_paths()
+        contributions = paths.contributions([features_processed])[0]  # (features, classes)
+        probabilities = paths.bias + contributions.sum(axis=0)
+        class_index = {career: index for index, career
+                       in enumerate(self.label_encoder.inverse_transform(self.model.classes_))}
+
+        rules_score = self._get_astrological_rules(features)
+        max_rules_score = max(rules_score.values()) or 1
+        rule_index = {career: index for index, career in enumerate(self.rules.careers)}
+        fired = self.rules.fired(houses)
+
+        neighbour_scores = {}
+        if SIMILARITY_PREDICTION_WEIGHT > 0:
+            neighbour_scores = get_chart_index().career_scores(features_processed, SIMILARITY_NEIGHBOURS)
+        keep = 1 - SIMILARITY_PREDICTION_WEIGHT  # Share left to the forest and the rules
+
+        if careers is None:
+            combined = {
+                career: keep * (MODEL_WEIGHT * (probabilities[class_index[career]] if career in class_index else 0.1)
+                                + RULES_WEIGHT * rules_score.get(career, 0) / max_rules_score)
+                        + SIMILARITY_PREDICTION_WEIGHT * neighbour_scores.get(career, 0.0)
+                for career in self.career_options
+            }
+            careers = [career for career, _ in sorted(combined.items(), key=lambda x: x[1], reverse=True)[:3]]
+
+        explanations = {}
+        for career in careers:
+            if career in class_index:
+                forest = contributions[:, class_index[career]]
+                base = keep * MODEL_WEIGHT * paths.bias[class_index[career]]
+            else:
+                forest = np.zeros(len(FEATURE_NAMES))
+                base = keep * MODEL_WEIGHT * 0.1
+            points = self.rules.rule_points[:, rule_index[career]] * fired
+            weighted = keep * MODEL_WEIGHT * forest
+            weighted[0::2] += keep * RULES_WEIGHT * (points @ self._rule_shares) / max_rules_score
+            feature_contributions = dict(zip(FEATURE_NAMES, weighted.tolist()))
+            if SIMILARITY_PREDICTION_WEIGHT > 0:
+                feature_contributions['Similar famous charts'] = (SIMILARITY_PREDICTION_WEIGHT
+                                                                  * neighbour_scores.get(career, 0.0))
+            explanations[career] = Explanation(
+                career=career,
+                score=float(base + sum(feature_contributions.values())),
+                base=float(base),
+                feature_contributions=feature_contributions,
+                forest_contributions=dict(zip(FEATURE_NAMES, forest.tolist())),
+                rule_contributions={name: int(value) for name, value in zip(self.rules.rule_names, points) if value},
+            )
+        return explanations
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def get_predictor():
+    """Process-wide predictor shared by every session; the model loads on first use"""
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                _default = CareerPredictor()
+    return _default
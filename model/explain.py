@@ -0,0 +1,100 @@
+from typing import Dict, List, NamedTuple
+
+import numpy as np
+
+from model.rules import RULE_PLANETS, RulesTable
+
+FEATURE_NAMES = [f"{planet} {part}" for planet in RULE_PLANETS for part in ("house", "sign")]
+
+
+class Explanation(NamedTuple):
+    """
+    Why one career got its combined score. score equals base plus the sum of
+    feature_contributions; feature_contributions adds the forest's path
+    contributions and the rule points (a conjunction is split between its
+    two planets' houses), each scaled by its weight in the combined score.
+    """
+    career: str
+    score: float
+    base: float  # The forest's prior for this career (root node share), weighted
+    feature_contributions: Dict[str, float]
+    forest_contributions: Dict[str, float]  # Unweighted change in the forest's probability per feature
+    rule_contributions: Dict[str, int]  # Points each matching rule gives this career
+
+
+class ForestPaths:
+    """
+    Tree-path decomposition of a random forest's class probabilities.
+
+    Every split moves the class distribution from the parent node's to the
+    child's; that change is credited to the feature the parent split on.
+    Summed along a sample's path and averaged over the trees, the credits
+    plus the average root distribution give predict_proba exactly. The
+    change per node and the feature of each node's parent are precomputed
+    once, so explaining a sample is one apply() per tree and a few
+    vectorized passes up the paths, with no Python loop over nodes.
+    """
+
+    def __init__(self, forest):
+        trees = [estimator.tree_ for estimator in forest.estimators_]
+        self.n_trees = len(trees)
+        self.n_features = forest.n_features_in_
+        self._trees = trees
+        sizes = np.array([tree.node_count for tree in trees])
+        self._offsets = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+
+        parent = np.full(sizes.sum(), -1, dtype=np.intp)
+        parent_feature = np.zeros(sizes.sum(), dtype=np.intp)
+        values = np.empty((sizes.sum(), trees[0].value.shape[-1]))
+        for tree, offset in zip(trees, self._offsets):
+            nodes = np.arange(tree.node_count)
+            # Node values are class shares per node (scikit-learn >= 1.4 stores them normalized)
+            value = tree.value[:, 0, :]
+            values[offset:offset + tree.node_count] = value / value.sum(axis=1, keepdims=True)
+            for children in (tree.children_left, tree.children_right):
+                split = children >= 0
+                parent[offset + children[split]] = offset + nodes[split]
+                parent_feature[offset + children[split]] = tree.feature[split]
+        has_parent = parent >= 0
+        self._parent = parent
+        self._parent_feature = parent_feature
+        self._delta = np.zeros_like(values)
+        self._delta[has_parent] = values[has_parent] - values[parent[has_parent]]
+        self.bias = values[self._offsets].mean(axis=0)
+
+    def contributions(self, X: np.ndarray) -> np.ndarray:
+        """
+        (samples, features, classes) contributions; bias plus their sum over
+        features is the forest's predict_proba for each sample
+        """
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        leaves = np.column_stack([tree.apply(X) + offset for tree, offset in zip(self._trees, self._offsets)])
+        samples = np.repeat(np.arange(len(X)), self.n_trees)
+        nodes = leaves.ravel()
+        path_samples: List[np.ndarray] = []
+        path_nodes: List[np.ndarray] = []
+        while nodes.size:
+            # Walk every path up one level at a time; roots have no parent and no credit
+            keep = self._parent[nodes] >= 0
+            nodes, samples = nodes[keep], samples[keep]
+            path_nodes.append(nodes)
+            path_samples.append(samples)
+            nodes = self._parent[nodes]
+        nodes = np.concatenate(path_nodes)
+        slots = np.concatenate(path_samples) * self.n_features + self._parent_feature[nodes]
+        result = np.zeros((len(X) * self.n_features, self._delta.shape[1]))
+        np.add.at(result, slots, self._delta[nodes])
+        return result.reshape(len(X), self.n_features, -1) / self.n_trees
+
+
+def rule_planet_shares(rules: RulesTable) -> np.ndarray:
+    """
+    (rules, planets) share of each rule credited to each planet's house: a
+    house rule to its planet, a conjunction half to each of its two planets
+    """
+    shares = np.zeros((len(rules.rule_names), len(RULE_PLANETS)))
+    house_rules = len(rules.rule_houses)
+    shares[:house_rules] = rules.rule_houses.any(axis=2)
+    for index, (first, second) in enumerate(rules.conjunction_pairs):
+        shares[house_rules + index, [first, second]] = 0.5
+    return shares
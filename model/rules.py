@@ -0,0 +1,152 @@
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+RULE_PLANETS = ['Sun', 'Moon', 'Mars', 'Mercury', 'Jupiter', 'Venus', 'Saturn']
+
+# Every career a rule can score, in the order extra careers are reported
+RULE_CAREERS = [
+    'Management', 'Politics/Social Reform', 'Business/Finance', 'Public Service',
+    'Arts/Creative', 'Music/Performance', 'Writing/Literature', 'Sports/Athletics',
+    'IT', 'Engineering', 'Media/Communication', 'Education/Research', 'Research/Academia',
+    'Law', 'Physics/Science', 'Technology/Entrepreneurship', 'Medical', 'Psychology',
+    'Environmental Science', 'Architecture', 'Physical Education', 'Teaching/Professor',
+]
+
+# (planet, houses, points per career): the planet placed in any of the houses
+HOUSE_RULES: List[Tuple[str, Tuple[int, ...], Dict[str, int]]] = [
+    # Sun in 10th house - Career success and recognition
+    ('Sun', (10,), {'Management': 3, 'Politics/Social Reform': 3, 'Business/Finance': 3, 'Public Service': 2}),
+    # Sun in 5th house - Creative expression and leadership
+    ('Sun', (5,), {'Arts/Creative': 3, 'Music/Performance': 3, 'Writing/Literature': 2, 'Sports/Athletics': 2}),
+    # Mercury in 3rd or 6th house - Communication and technical skills
+    ('Mercury', (3, 6), {'IT': 3, 'Engineering': 3, 'Media/Communication': 3, 'Writing/Literature': 2}),
+    # Mercury in 9th house - Higher education and philosophy
+    ('Mercury', (9,), {'Education/Research': 3, 'Research/Academia': 3, 'Law': 2, 'Writing/Literature': 2,
+                       'Teaching/Professor': 3}),
+    # Jupiter in 5th or 9th house - Education and wisdom
+    ('Jupiter', (5, 9), {'Education/Research': 3, 'Law': 3, 'Physics/Science': 3, 'Research/Academia': 2,
+                         'Teaching/Professor': 3}),
+    # Jupiter in 2nd house - Financial success and abundance
+    ('Jupiter', (2,), {'Business/Finance': 3, 'Management': 2, 'Technology/Entrepreneurship': 2}),
+    # Mars in 1st or 10th house - Leadership and initiative
+    ('Mars', (1, 10), {'Technology/Entrepreneurship': 3, 'Business/Finance': 3, 'Politics/Social Reform': 3,
+                       'Sports/Athletics': 2}),
+    # Mars in 6th house - Service and technical work
+    ('Mars', (6,), {'Engineering': 3, 'IT': 3, 'Medical': 2, 'Public Service': 2}),
+    # Venus in 5th or 7th house - Creative and artistic abilities
+    ('Venus', (5, 7), {'Arts/Creative': 3, 'Media/Communication': 3, 'Music/Performance': 3,
+                       'Writing/Literature': 2}),
+    # Venus in 2nd house - Financial acumen and luxury
+    ('Venus', (2,), {'Business/Finance': 3, 'Management': 2, 'Architecture': 2}),
+    # Saturn in 6th or 8th house - Technical and analytical skills
+    ('Saturn', (6, 8), {'Engineering': 3, 'IT': 3, 'Medical': 3, 'Architecture': 2}),
+    # Saturn in 10th house - Career discipline and authority
+    ('Saturn', (10,), {'Management': 3, 'Public Service': 3, 'Law': 2, 'Education/Research': 2}),
+    # Moon in 4th or 7th house - Emotional intelligence and service
+    ('Moon', (4, 7), {'Medical': 3, 'Education/Research': 3, 'Politics/Social Reform': 3, 'Psychology': 3,
+                      'Teaching/Professor': 2}),
+    # Moon in 5th house - Creative expression and entertainment
+    ('Moon', (5,), {'Arts/Creative': 3, 'Music/Performance': 3, 'Writing/Literature': 2}),
+    # Environmental Science - Jupiter in 4th house
+    ('Jupiter', (4,), {'Environmental Science': 3, 'Public Service': 2}),
+    # Psychology - Moon in 8th house
+    ('Moon', (8,), {'Psychology': 3, 'Medical': 2}),
+    # Architecture - Saturn in 4th house
+    ('Saturn', (4,), {'Architecture': 3, 'Engineering': 2}),
+    # Sports/Athletics - Mars in 5th house
+    ('Mars', (5,), {'Sports/Athletics': 3, 'Physical Education': 2}),
+]
+
+# (planet, planet, points per career): both planets in the same house
+CONJUNCTION_RULES: List[Tuple[str, str, Dict[str, int]]] = [
+    # Sun-Mercury conjunction - Communication and leadership
+    ('Sun', 'Mercury', {'Media/Communication': 2, 'Writing/Literature': 2, 'Politics/Social Reform': 2}),
+    # Jupiter-Saturn combination - Education and discipline
+    ('Jupiter', 'Saturn', {'Education/Research': 2, 'Law': 2, 'Research/Academia': 2}),
+    # Mars-Venus combination - Creative action and passion
+    ('Mars', 'Venus', {'Arts/Creative': 2, 'Music/Performance': 2, 'Sports/Athletics': 2}),
+]
+
+
+def _table_index(houses: np.ndarray) -> np.ndarray:
+    """Houses outside 1-12 match no rule, so they read the all-zero row 0"""
+    return np.where((houses >= 1) & (houses <= 12), houses, 0)
+
+
+class RulesTable(NamedTuple):
+    """
+    The rules compiled for a list of careers. house_points[p, h] is the score
+    vector for planet p in house h (index 0 unused); conjunction_points[i] is
+    added when both planets of conjunction_pairs[i] share a house.
+
+    The rule_* fields keep every rule separately (house rules, then
+    conjunctions) so fired() can say which rules produced a score.
+    """
+    careers: List[str]
+    house_points: np.ndarray  # (planets, 13, careers)
+    conjunction_pairs: np.ndarray  # (rules, 2) planet indices
+    conjunction_points: np.ndarray  # (rules, careers)
+    rule_names: List[str]
+    rule_houses: np.ndarray  # (house rules, planets, 13) True where the rule matches
+    rule_points: np.ndarray  # (house rules + conjunctions, careers)
+
+    def score(self, houses: Sequence[int]) -> np.ndarray:
+        """Rule points per career for the houses of RULE_PLANETS, in order"""
+        houses = np.asarray(houses, dtype=np.intp)
+        points = self.house_points[np.arange(len(RULE_PLANETS)), _table_index(houses)].sum(axis=0)
+        same_house = houses[self.conjunction_pairs[:, 0]] == houses[self.conjunction_pairs[:, 1]]
+        return points + same_house @ self.conjunction_points
+
+    def score_many(self, houses: np.ndarray) -> np.ndarray:
+        """score() for an (n, planets) array of houses, as an (n, careers) array"""
+        houses = np.asarray(houses, dtype=np.intp)
+        points = self.house_points[np.arange(len(RULE_PLANETS)), _table_index(houses)].sum(axis=1)
+        same_house = houses[:, self.conjunction_pairs[:, 0]] == houses[:, self.conjunction_pairs[:, 1]]
+        return points + same_house.astype(np.int64) @ self.conjunction_points
+
+    def fired(self, houses: Sequence[int]) -> np.ndarray:
+        """Which rules match the houses of RULE_PLANETS, in rule_names order"""
+        houses = np.asarray(houses, dtype=np.intp)
+        by_house = self.rule_houses[:, np.arange(len(RULE_PLANETS)), _table_index(houses)].any(axis=1)
+        by_conjunction = houses[self.conjunction_pairs[:, 0]] == houses[self.conjunction_pairs[:, 1]]
+        return np.concatenate((by_house, by_conjunction))
+
+
+def rule_careers(career_options: Sequence[str]) -> List[str]:
+    """Careers reported by the rules: the model's careers, then any others the rules score"""
+    careers = list(career_options)
+    careers.extend(career for career in RULE_CAREERS if career not in careers)
+    return careers
+
+
+def compile_rules(career_options: Sequence[str]) -> RulesTable:
+    """Turn HOUSE_RULES and CONJUNCTION_RULES into lookup tables"""
+    careers = rule_careers(career_options)
+    column = {career: index for index, career in enumerate(careers)}
+    planet = {name: index for index, name in enumerate(RULE_PLANETS)}
+
+    house_points = np.zeros((len(RULE_PLANETS), 13, len(careers)), dtype=np.int64)
+    for name, houses, points in HOUSE_RULES:
+        for house in houses:
+            for career, value in points.items():
+                house_points[planet[name], house, column[career]] += value
+
+    conjunction_pairs = np.array([(planet[first], planet[second]) for first, second, _ in CONJUNCTION_RULES],
+                                 dtype=np.intp)
+    conjunction_points = np.zeros((len(CONJUNCTION_RULES), len(careers)), dtype=np.int64)
+    for index, (_, _, points) in enumerate(CONJUNCTION_RULES):
+        for career, value in points.items():
+            conjunction_points[index, column[career]] = value
+
+    rule_names = [f"{name} in house {' or '.join(map(str, houses))}" for name, houses, _ in HOUSE_RULES]
+    rule_names += [f"{first}-{second} conjunction" for first, second, _ in CONJUNCTION_RULES]
+    rule_houses = np.zeros((len(HOUSE_RULES), len(RULE_PLANETS), 13), dtype=bool)
+    house_rule_points = np.zeros((len(HOUSE_RULES), len(careers)), dtype=np.int64)
+    for index, (name, houses, points) in enumerate(HOUSE_RULES):
+        rule_houses[index, planet[name], list(houses)] = True
+        for career, value in points.items():
+            house_rule_points[index, column[career]] = value
+    rule_points = np.vstack((house_rule_points, conjunction_points))
+    return RulesTable(careers, house_points, conjunction_pairs, conjunction_points,
+                      rule_names, rule_houses, rule_points)
@@ -0,0 +1,48 @@
+import argparse
+import time
+from typing import List, Optional
+
+from config import MODEL_PATH
+from model.career_predictor import CareerPredictor
+from utils.famous_personalities import FamousPersonalities
+
+
+def personality_accuracy(predictor: CareerPredictor) -> float:
+    """Share of famous personalities whose actual career is the top prediction"""
+    personalities = FamousPersonalities.get_personalities()
+    if not personalities:
+        return 0.0
+    correct = sum(predictor.predict(data['planet_positions'])[0] == data['actual_career']
+                  for data in personalities.values())
+    return correct / len(personalities)
+
+
+def main(argv: Optional[List[str]] = None):
+    """Build the model artifact ahead of deploys: python -m model.train --help"""
+    parser = argparse.ArgumentParser(description="Train, validate and save the career prediction model")
+    parser.add_argument("--output", default=MODEL_PATH, help="Where to write the model artifact")
+    parser.add_argument("--check", action="store_true",
+                        help="Only validate the existing artifact; exit non-zero if it is unusable")
+    args = parser.parse_args(argv)
+
+    predictor = CareerPredictor(model_path=None)  # Untrained; loaded or fitted below
+
+    if args.check:
+        if not predictor.load(args.output):
+            raise SystemExit(f"No usable model at {args.output}")
+        print(f"Model at {args.output} is valid; personality accuracy {personality_accuracy(predictor):.1%}")
+        return
+
+    started = time.perf_counter()
+    predictor.fit()
+    problems = predictor.validate()
+    if problems:
+        raise SystemExit("Trained model failed validation: " + "; ".join(problems))
+    print(f"Trained in {time.perf_counter() - started:.1f}s; "
+          f"personality accuracy {personality_accuracy(predictor):.1%}")
+    predictor.save(args.output)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
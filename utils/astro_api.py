@@ -1,23 +1,82 @@
 import requests
 import json
-from typing import Dict, Any, Tuple, List, Union
+from typing import Dict, Any, Tuple, List, Optional, Union
 import datetime
 import time
-from config import ASTRO_API_KEY, ASTRO_API_BASE_URL
-import hashlib
-import os
-import pickle
-from pathlib import Path
+from config import (ASTRO_API_KEYS, ASTRO_API_KEY_DAILY_QUOTA, ASTRO_API_KEY_COOLDOWN,
+                    ASTRO_API_BASE_URL, ASTRO_CHART_URL, ASTRO_API_RATE_LIMIT,
+                    ASTRO_API_BURST, ASTRO_API_MAX_QUEUE_WAIT,
+                    ASTRO_API_BREAKER_FAILURE_RATE, ASTRO_API_BREAKER_MIN_CALLS,
+                    ASTRO_API_BREAKER_WINDOW, ASTRO_API_BREAKER_COOLDOWN,
+                    ASTRO_API_NEGATIVE_CACHE_TTL, ASTRO_PROVIDERS, ASTRO_PROVIDER_HEDGE,
+                    ASTRO_PROVIDER_WAIT, ASTRO_PROVIDER_PREFER)
 import random
-import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from utils.single_flight import SingleFlight
+from utils.cache_store import get_cache_store
+from utils.memory_cache import TieredCache
+from utils.cache_keys import CanonicalKey, KeyMissTracker, canonical_birth_key, quantize_coordinate, quantize_time
+from utils.rate_limiter import PRIORITY_BATCH, PRIORITY_INTERACTIVE, QueueTimeoutError, RequestScheduler
+from utils.circuit_breaker import OPEN, CircuitBreaker, CircuitOpenError, NegativeCache
+from utils.deadline import Deadline, DeadlineExceeded, sleep_within, timeout_for
+from utils.latency_policy import LatencyPolicy
+from utils.key_pool import ApiKeyPool, KeyPoolExhausted
+from utils.timezone_resolver import utc_offset_at
+from utils.chart_renderer import render_birth_chart
+from utils.chart_images import ChartImage, ChartImageStore, sniff_mime
+from utils.providers import (ChartRequest, LocalEphemerisProvider, ProviderChain, ProviderUnavailable,
+                             tag_chart)
+
+# Failures of our own making (load shedding, time budget) that say nothing about a key
+LOCAL_FAILURES = (CircuitOpenError, QueueTimeoutError, DeadlineExceeded, TimeoutError, ProviderUnavailable,
+                  KeyPoolExhausted)
 
 class AstroAPI:
     BASE_URL = ASTRO_API_BASE_URL  # Use the URL from config
-    MAX_RETRIES = 3  # Reduced from 5
-    RETRY_DELAY = 2  # Reduced from 5
-    CACHE_DIR = Path("cache")
+    CHART_URL = ASTRO_CHART_URL
+    MAX_RETRIES = 3  # Upper bound; LATENCY_POLICY lowers it while errors are frequent
+    RETRY_DELAY = 2  # Upper bound; LATENCY_POLICY shortens it to the observed latency
+    CACHE = TieredCache(get_cache_store())  # Memory tier over the shared single-file cache
     CACHE_EXPIRY = 24 * 60 * 60  # 24 hours in seconds
-    REQUEST_TIMEOUT = 5  # 5 seconds timeout for API requests
+    REQUEST_TIMEOUT = 5  # Ceiling; LATENCY_POLICY derives the actual timeout from p99 latency
+    
+    # Coalesce concurrent identical upstream calls (keyed by their cache keys)
+    BIRTH_CHART_FLIGHTS = SingleFlight("birth_chart")
+    CHART_IMAGE_FLIGHTS = SingleFlight("chart_image")
+    BIRTH_CHART_KEYS = KeyMissTracker()  # Which key field caused each birth chart miss
+    CHART_IMAGES = ChartImageStore(CACHE)  # Downloaded chart images by content hash, indexed through both tiers
+    
+    # Requests are spread over every configured key by remaining daily quota
+    KEY_POOL = ApiKeyPool(ASTRO_API_KEYS, ASTRO_API_KEY_DAILY_QUOTA, ASTRO_API_KEY_COOLDOWN, store=CACHE.store)
+    
+    # Process-wide request slots sized to the API quota (per key, so keys add throughput)
+    SCHEDULER = RequestScheduler(ASTRO_API_RATE_LIMIT * max(1, len(KEY_POOL.keys)),
+                                 ASTRO_API_BURST * max(1, len(KEY_POOL.keys)))
+    MAX_QUEUE_WAIT = ASTRO_API_MAX_QUEUE_WAIT
+    
+    # Shared outage detection: route straight to local calculations while open
+    BREAKER = CircuitBreaker(
+        "astro_api",
+        failure_rate=ASTRO_API_BREAKER_FAILURE_RATE,
+        min_calls=ASTRO_API_BREAKER_MIN_CALLS,
+        window=ASTRO_API_BREAKER_WINDOW,
+        cooldown=ASTRO_API_BREAKER_COOLDOWN
+    )
+    FAILED_KEYS = NegativeCache(ASTRO_API_NEGATIVE_CACHE_TTL)  # Keys that just failed upstream
+    
+    # Per-endpoint timeouts and retry counts learned from observed latency
+    LATENCY_POLICY = LatencyPolicy(REQUEST_TIMEOUT, MAX_RETRIES, RETRY_DELAY)
+    
+    # Stale-while-revalidate: expired entries are served while a worker refreshes them
+    REFRESH_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="astro-refresh")
+    _REFRESHING = set()
+    _REFRESH_LOCK = threading.Lock()
+    
+    # Where birth charts come from: remote API first, hedged with local ephemeris
+    PROVIDERS = ProviderChain.from_names(ASTRO_PROVIDERS, hedge=ASTRO_PROVIDER_HEDGE, wait=ASTRO_PROVIDER_WAIT,
+                                         prefer=ASTRO_PROVIDER_PREFER, budget=REQUEST_TIMEOUT)
+    LOCAL_PROVIDER = LocalEphemerisProvider()
     
     # Career significators for each planet
     CAREER_SIGNIFICATORS = {
@@ -49,118 +108,216 @@ class AstroAPI:
     }
     
     @staticmethod
-    def _get_cache_key(endpoint: str, payload: str) -> str:
-        """Generate a cache key from endpoint and payload"""
-        key = f"{endpoint}_{payload}"
-        return hashlib.md5(key.encode()).hexdigest()
+    def get_metrics() -> Dict[str, Any]:
+        """Snapshot of the client's cache, coalescing, rate limiter and breaker metrics"""
+        return {
+            "cache": AstroAPI.CACHE.stats(),
+            "birth_chart_keys": AstroAPI.BIRTH_CHART_KEYS.stats(),
+            "birth_chart_flights": AstroAPI.BIRTH_CHART_FLIGHTS.stats()["totals"],
+            "chart_images": AstroAPI.CHART_IMAGES.stats(),
+            "scheduler": AstroAPI.SCHEDULER.stats(),
+            "keys": AstroAPI.KEY_POOL.stats(),
+            "breaker": AstroAPI.BREAKER.stats(),
+            "refreshing": len(AstroAPI._REFRESHING),
+            "providers": AstroAPI.PROVIDERS.stats(),
+            "policy": AstroAPI.get_policy(),
+        }
     
     @staticmethod
-    def _get_cached_response(cache_key: str) -> Union[Dict[str, Any], None]:
-        """Get cached response if available and not expired"""
-        if not AstroAPI.CACHE_DIR.exists():
-            return None
-            
-        cache_file = AstroAPI.CACHE_DIR / f"{cache_key}.pkl"
-        if not cache_file.exists():
-            return None
-            
+    def get_policy() -> Dict[str, Dict[str, Any]]:
+        """Current timeout/retry policy and latency percentiles per endpoint"""
+        return AstroAPI.LATENCY_POLICY.policies()
+    
+    @staticmethod
+    def estimated_wait(priority: int = PRIORITY_INTERACTIVE) -> float:
+        """Estimated seconds before a request at this priority would reach the API"""
+        return AstroAPI.SCHEDULER.estimated_wait(priority)
+    
+    @staticmethod
+    def _acquire_request_slot(priority: int, deadline: Optional[Deadline] = None):
+        """Wait for a rate limiter slot or raise if the queue is too long"""
+        if not AstroAPI.SCHEDULER.acquire(priority, timeout=timeout_for(deadline, AstroAPI.MAX_QUEUE_WAIT)):
+            raise QueueTimeoutError("Rate limiter queue wait exceeded")
+    
+    @staticmethod
+    def _retry_after(response: requests.Response) -> Optional[float]:
         try:
-            with open(cache_file, 'rb') as f:
-                cache_data = pickle.load(f)
-                if time.time() - cache_data['timestamp'] < AstroAPI.CACHE_EXPIRY:
-                    return cache_data['data']
-        except:
-            pass
-        return None
+            return float(response.headers.get("Retry-After", ""))
+        except ValueError:
+            return None
     
     @staticmethod
-    def _save_to_cache(cache_key: str, data: Dict[str, Any]):
-        """Save response to cache"""
-        if not AstroAPI.CACHE_DIR.exists():
-            AstroAPI.CACHE_DIR.mkdir(parents=True)
-            
-        cache_file = AstroAPI.CACHE_DIR / f"{cache_key}.pkl"
+    def _penalize_rate_limit(response: requests.Response, attempt: int):
+        """
+        After a 429, pause the shared scheduler once no key is left to retry with,
+        honouring Retry-After when present. _post has already benched the key.
+        """
+        if AstroAPI.KEY_POOL.available() > 0:
+            return
+        delay = AstroAPI._retry_after(response)
+        if delay is None:
+            delay = AstroAPI.RETRY_DELAY * (2 ** attempt) + (random.random() * 2)
+        AstroAPI.SCHEDULER.penalize(min(delay, AstroAPI.KEY_POOL.next_available_in()))
+    
+    @staticmethod
+    def _with_key(headers: Dict[str, str], key: str) -> Dict[str, str]:
+        """Copy of the request headers carrying the given API key"""
+        headers = dict(headers)
+        if "Authorization" in headers:
+            headers["Authorization"] = f"Bearer {key}"
+        else:
+            headers["x-api-key"] = key
+        return headers
+    
+    @staticmethod
+    def _post(url: str, priority: int, deadline: Optional[Deadline] = None, **kwargs) -> requests.Response:
+        """
+        Send one POST upstream through the circuit breaker and rate limiter,
+        authenticated with a key from the pool. Connection errors, timeouts and
+        5xx responses count as breaker failures, except timeouts caused by a
+        shortened deadline budget. Every attempt feeds the endpoint's latency
+        policy, and a 429 takes its key out of rotation.
+        """
+        endpoint = url.rstrip("/").rsplit("/", 1)[-1]
+        policy_timeout = AstroAPI.LATENCY_POLICY.timeout(endpoint)
+        if deadline is not None and deadline.expired:
+            raise DeadlineExceeded("No time budget left for the API call")
+        if not AstroAPI.BREAKER.allow_request():
+            raise CircuitOpenError("Astrology API circuit is open")
         try:
-            with open(cache_file, 'wb') as f:
-                pickle.dump({
-                    'timestamp': time.time(),
-                    'data': data
-                }, f)
-        except:
-            pass
+            AstroAPI._acquire_request_slot(priority, deadline)
+            timeout = timeout_for(deadline, policy_timeout)
+            key = AstroAPI.KEY_POOL.acquire()
+        except Exception:
+            AstroAPI.BREAKER.release()
+            raise
+        kwargs["headers"] = AstroAPI._with_key(kwargs.get("headers") or {}, key)
+        
+        started = time.monotonic()
+        try:
+            response = requests.post(url, timeout=timeout, **kwargs)
+        except requests.Timeout:
+            if timeout < policy_timeout:
+                AstroAPI.BREAKER.release()
+                raise DeadlineExceeded("API call ran out of time budget")
+            AstroAPI.LATENCY_POLICY.record(endpoint, time.monotonic() - started, False)
+            AstroAPI.BREAKER.record_failure()
+            raise
+        except requests.RequestException:
+            AstroAPI.LATENCY_POLICY.record(endpoint, time.monotonic() - started, False)
+            AstroAPI.BREAKER.record_failure()
+            raise
+        
+        AstroAPI.LATENCY_POLICY.record(endpoint, time.monotonic() - started, response.status_code < 500)
+        if response.status_code >= 500:
+            AstroAPI.BREAKER.record_failure()
+        elif response.status_code == 429:
+            AstroAPI.BREAKER.release()  # Rate limited, but the service is up
+            AstroAPI.KEY_POOL.rate_limited(key, AstroAPI._retry_after(response))
+        else:
+            AstroAPI.BREAKER.record_success()
+        return response
     
     @staticmethod
-    def _make_api_request(endpoint: str, payload: str, headers: Dict[str, str]) -> Dict[str, Any]:
+    def _schedule_refresh(key: str, fn, *args) -> bool:
         """
-        Make API request with retry logic for rate limiting and caching
+        Re-fetch an expired entry on a background worker at batch priority.
+        At most one refresh per key runs at a time; on failure the stale value stays.
         """
-        if not ASTRO_API_KEY:
-            raise ValueError("ASTRO_API_KEY is not set. Please check your .env file.")
-
-        # Try to get from cache first
-        cache_key = AstroAPI._get_cache_key(endpoint, payload)
-        cached_response = AstroAPI._get_cached_response(cache_key)
-        if cached_response:
-            return cached_response
-            
-        for attempt in range(AstroAPI.MAX_RETRIES):
+        with AstroAPI._REFRESH_LOCK:
+            if key in AstroAPI._REFRESHING:
+                return False
+            AstroAPI._REFRESHING.add(key)
+        
+        def refresh():
             try:
-                response = requests.request(
-                    "POST",
-                    f"{AstroAPI.BASE_URL}/{endpoint}",
-                    headers=headers,
-                    data=payload,
-                    timeout=AstroAPI.REQUEST_TIMEOUT
-                )
-                
-                if response.status_code == 429:  # Rate limit
-                    if attempt < AstroAPI.MAX_RETRIES - 1:
-                        delay = AstroAPI.RETRY_DELAY * (2 ** attempt) + (random.random() * 2)
-                        time.sleep(delay)
-                        continue
-                    else:
-                        raise Exception("Rate limit exceeded after maximum retries")
-                
-                response.raise_for_status()
-                response_data = response.json()
-                
-                if response_data.get("statusCode") != 200:
-                    error_msg = response_data.get("message", "Unknown error")
-                    raise Exception(f"API error: {error_msg}")
-                
-                # Cache successful response
-                AstroAPI._save_to_cache(cache_key, response_data)
-                return response_data
-                
-            except requests.exceptions.Timeout:
-                if attempt == AstroAPI.MAX_RETRIES - 1:
-                    raise Exception("API request timed out after maximum retries")
-                time.sleep(AstroAPI.RETRY_DELAY * (2 ** attempt))
-            except requests.exceptions.RequestException as e:
-                if attempt == AstroAPI.MAX_RETRIES - 1:
-                    raise Exception(f"API request failed after {AstroAPI.MAX_RETRIES} attempts: {str(e)}")
-                time.sleep(AstroAPI.RETRY_DELAY * (2 ** attempt))
+                fn(*args)
+            except Exception as e:
+                print(f"Background refresh failed for {key}: {e}")
+            finally:
+                with AstroAPI._REFRESH_LOCK:
+                    AstroAPI._REFRESHING.discard(key)
         
-        raise Exception("API request failed after all retries")
+        try:
+            AstroAPI.REFRESH_EXECUTOR.submit(refresh)
+        except RuntimeError:
+            # Executor already shut down (interpreter exit)
+            with AstroAPI._REFRESH_LOCK:
+                AstroAPI._REFRESHING.discard(key)
+            return False
+        return True
+    
+    @staticmethod
+    def birth_utc_offset(birth_date: datetime.date, birth_time: datetime.time,
+                         latitude: float, longitude: float) -> float:
+        """UTC offset in hours in force at the birth place and local birth time"""
+        return utc_offset_at(latitude, longitude, datetime.datetime.combine(birth_date, birth_time))
+    
+    @staticmethod
+    def _birth_chart_ttl(birth_date: datetime.date, birth_time: datetime.time, tzone: float = 0.0) -> Optional[float]:
+        """Charts for a birth moment in the past never change, so they never expire"""
+        birth = datetime.datetime.combine(birth_date, birth_time) - datetime.timedelta(hours=tzone)
+        if birth < datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None):
+            return None
+        return AstroAPI.CACHE_EXPIRY
     
     @staticmethod
-    def get_horoscope_chart_svg(birth_date: datetime.date, birth_time: datetime.time, 
-                                latitude: float, longitude: float, language: str = "en") -> str:
+    def get_horoscope_chart(birth_date: datetime.date, birth_time: datetime.time,
+                            latitude: float, longitude: float, language: str = "en",
+                            priority: int = PRIORITY_INTERACTIVE,
+                            deadline: Optional[Deadline] = None,
+                            tzone: Optional[float] = None) -> ChartImage:
         """
-        Fetch the horoscope chart URL from the new Free Astrology API endpoint.
+        Horoscope chart image from the Free Astrology API, downloaded once and
+        kept in the content-addressed chart image store, so repeat views need
+        neither an API call nor a request to the image host.
         If the API fails, return a locally generated SVG chart as fallback.
+        The birth time is local; `tzone` defaults to the offset at the birth place.
         """
-        url = "https://json.freeastrologyapi.com/horoscope-chart-url"
+        if tzone is None:
+            tzone = AstroAPI.birth_utc_offset(birth_date, birth_time, latitude, longitude)
+        canonical = canonical_birth_key("chart", birth_date, birth_time, latitude, longitude,
+                                        tzone=f"{tzone:g}")
+        image = AstroAPI.CHART_IMAGES.get(canonical.key)
+        if image is not None:
+            return image
+        try:
+            return AstroAPI.CHART_IMAGE_FLIGHTS.do(
+                canonical.key, AstroAPI._fetch_chart_image, canonical, birth_date, birth_time,
+                latitude, longitude, tzone, priority, deadline,
+                wait_timeout=deadline.remaining() if deadline is not None else None
+            )
+        except Exception as e:
+            # Fallback to local SVG chart
+            if not isinstance(e, LOCAL_FAILURES):
+                AstroAPI.FAILED_KEYS.add(canonical.key)
+            svg = AstroAPI._generate_simple_svg_chart(birth_date, birth_time, latitude, longitude, tzone)
+            return ChartImage(svg.encode("utf-8"), "image/svg+xml", "local")
+    
+    @staticmethod
+    def _fetch_chart_image(canonical: CanonicalKey, birth_date: datetime.date, birth_time: datetime.time,
+                           latitude: float, longitude: float, tzone: float,
+                           priority: int, deadline: Optional[Deadline]) -> ChartImage:
+        """Ask the API for the chart URL, download the image and store it; raises on failure"""
+        # Skip the API while it is down, rate limited, or just failed for this chart
+        if (canonical.key in AstroAPI.FAILED_KEYS
+                or (deadline is not None and deadline.expired)
+                or AstroAPI.BREAKER.state == OPEN
+                or AstroAPI.estimated_wait(priority) > AstroAPI.MAX_QUEUE_WAIT):
+            raise ProviderUnavailable("Astrology API is not answering in time")
+        
+        # Send what the key was built from so the stored image matches its key exactly
+        quantized_time = quantize_time(birth_time)
         payload = json.dumps({
             "year": birth_date.year,
             "month": birth_date.month,
             "date": birth_date.day,
-            "hours": birth_time.hour,
-            "minutes": birth_time.minute,
-            "seconds": birth_time.second,
-            "latitude": latitude,
-            "longitude": longitude,
-            "timezone": 5.5,
+            "hours": quantized_time.hour,
+            "minutes": quantized_time.minute,
+            "seconds": quantized_time.second,
+            "latitude": quantize_coordinate(latitude),
+            "longitude": quantize_coordinate(longitude),
+            "timezone": tzone,
             "config": {
                 "observation_point": "topocentric",
                 "ayanamsha": "lahiri"
@@ -168,215 +325,230 @@ class AstroAPI:
         })
         headers = {
             'Content-Type': 'application/json',
-            'x-api-key': ASTRO_API_KEY
+            'x-api-key': ''  # Filled in from KEY_POOL per attempt
         }
-        try:
-            response = requests.post(url, headers=headers, data=payload, timeout=AstroAPI.REQUEST_TIMEOUT)
-            if response.status_code == 200:
-                data = response.json()
-                chart_url = data.get("output")
-                if chart_url:
-                    # Return an <img> tag to display the chart URL in Streamlit
-                    return f'<img src="{chart_url}" alt="Horoscope Chart" style="max-width:100%;height:auto;" />'
-                else:
-                    raise Exception("No chart URL returned from API.")
-            else:
-                raise Exception(f"API error: {response.status_code} {response.text}")
-        except Exception as e:
-            # Fallback to local SVG chart
-            return AstroAPI._generate_simple_svg_chart(birth_date, birth_time, latitude, longitude)
+        response = AstroAPI._post(AstroAPI.CHART_URL, priority, deadline, headers=headers, data=payload)
+        if response.status_code == 429:
+            AstroAPI._penalize_rate_limit(response, 0)
+        if response.status_code != 200:
+            raise Exception(f"API error: {response.status_code} {response.text}")
+        chart_url = response.json().get("output")
+        if not chart_url:
+            raise Exception("No chart URL returned from API.")
+        
+        # The image host is not the API, so no key, slot or breaker is involved
+        image_response = requests.get(chart_url, timeout=timeout_for(deadline, AstroAPI.REQUEST_TIMEOUT))
+        image_response.raise_for_status()
+        mime = sniff_mime(image_response.content, image_response.headers.get("Content-Type", ""))
+        if mime is None:
+            raise Exception("Chart URL did not return an image")
+        AstroAPI.CHART_IMAGES.put(canonical.key, image_response.content, mime)
+        return ChartImage(image_response.content, mime, "remote")
             
     @staticmethod
     def _generate_simple_svg_chart(birth_date: datetime.date, birth_time: datetime.time,
-                                 latitude: float, longitude: float) -> str:
+                                 latitude: float, longitude: float, tzone: float = 0.0) -> str:
         """
         Generate a simple SVG chart when API is rate limited
         """
-        # Calculate approximate positions
-        planets = AstroAPI._calculate_approximate_positions(birth_date, birth_time, latitude, longitude)
-        
-        # Create a simple SVG chart
-        svg = f"""<svg width="400" height="400" xmlns="http://www.w3.org/2000/svg">
-            <circle cx="200" cy="200" r="150" fill="none" stroke="black" stroke-width="2"/>
-            <text x="200" y="50" text-anchor="middle" font-size="16">North Indian Chart</text>
-            <text x="200" y="380" text-anchor="middle" font-size="12">Generated using local calculations</text>
-        """
-        
-        # Add zodiac signs
-        zodiac_signs = ["Aries", "Taurus", "Gemini", "Cancer", "Leo", "Virgo",
-                       "Libra", "Scorpio", "Sagittarius", "Capricorn", "Aquarius", "Pisces"]
-        
-        for i, sign in enumerate(zodiac_signs):
-            angle = i * 30
-            x = 200 + 130 * math.cos(math.radians(angle - 90))
-            y = 200 + 130 * math.sin(math.radians(angle - 90))
-            svg += f'<text x="{x}" y="{y}" text-anchor="middle" font-size="12">{sign}</text>'
-        
-        # Add planets
-        for planet in planets:
-            if planet["name"] != "Ascendant":
-                house = planet["house"]
-                angle = (house - 1) * 30
-                x = 200 + 100 * math.cos(math.radians(angle - 90))
-                y = 200 + 100 * math.sin(math.radians(angle - 90))
-                svg += f'<text x="{x}" y="{y}" text-anchor="middle" font-size="12">{planet["name"]}</text>'
-        
-        svg += "</svg>"
-        return svg
+        planets = AstroAPI._calculate_approximate_positions(birth_date, birth_time, latitude, longitude, tzone)
+        return render_birth_chart(planets, caption="Generated using local calculations")
     
     @staticmethod
     def get_birth_chart(birth_date: datetime.date, birth_time: datetime.time, 
                        latitude: float, longitude: float, 
                        observation_point: str = "topocentric",
-                       ayanamsha: str = "lahiri") -> Union[Dict[str, Any], List[Dict[str, Any]]]:
-        """Get birth chart data from API with caching"""
+                       ayanamsha: str = "lahiri",
+                       priority: int = PRIORITY_INTERACTIVE,
+                       deadline: Optional[Deadline] = None,
+                       tzone: Optional[float] = None) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        Get birth chart data from the provider chain. Every entry carries a
+        "provider" field naming the source; local ephemeris is the last resort.
+        The birth time is local; `tzone` defaults to the offset at the birth place.
+        """
+        if tzone is None:
+            tzone = AstroAPI.birth_utc_offset(birth_date, birth_time, latitude, longitude)
+        request = ChartRequest(birth_date, birth_time, latitude, longitude, observation_point, ayanamsha,
+                               tzone, priority)
+        try:
+            return AstroAPI.PROVIDERS.birth_chart(request, deadline)
+        except ProviderUnavailable:
+            return tag_chart(AstroAPI.LOCAL_PROVIDER.birth_chart(request), AstroAPI.LOCAL_PROVIDER.name)
+    
+    @staticmethod
+    def _remote_birth_chart(birth_date: datetime.date, birth_time: datetime.time,
+                            latitude: float, longitude: float,
+                            observation_point: str = "topocentric",
+                            ayanamsha: str = "lahiri",
+                            tzone: float = 0.0,
+                            priority: int = PRIORITY_INTERACTIVE,
+                            deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
+        """Birth chart from the cache or the API; raises when neither can serve it"""
+        # The API only takes hour and minute, so the key is quantized to the minute
+        canonical = canonical_birth_key(
+            "birth_chart", birth_date, birth_time, latitude, longitude,
+            observation_point=observation_point, ayanamsha=ayanamsha, tzone=f"{tzone:g}"
+        )
+        return AstroAPI.BIRTH_CHART_FLIGHTS.do(
+            canonical.key, AstroAPI._fetch_birth_chart, canonical,
+            birth_date, birth_time, latitude, longitude, observation_point, ayanamsha, tzone, priority,
+            deadline, wait_timeout=deadline.remaining() if deadline is not None else None
+        )
+    
+    @staticmethod
+    def _fetch_birth_chart(canonical: CanonicalKey, birth_date: datetime.date, birth_time: datetime.time,
+                           latitude: float, longitude: float,
+                           observation_point: str, ayanamsha: str, tzone: float,
+                           priority: int = PRIORITY_INTERACTIVE,
+                           deadline: Optional[Deadline] = None) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        Load a birth chart from the cache or the API.
+        Expired entries are still served and refreshed in the background.
+        """
         try:
-            # Create cache key
-            cache_key = f"{birth_date}_{birth_time}_{latitude}_{longitude}_{observation_point}_{ayanamsha}"
-            cache_file = AstroAPI.CACHE_DIR / f"birth_chart_{hashlib.md5(cache_key.encode()).hexdigest()}.json"
+            # Send the quantized coordinates so the cached chart matches its key exactly
+            latitude = quantize_coordinate(latitude)
+            longitude = quantize_coordinate(longitude)
             
             # Check cache first
-            if cache_file.exists():
-                cache_age = time.time() - cache_file.stat().st_mtime
-                if cache_age < AstroAPI.CACHE_EXPIRY:
-                    try:
-                        with open(cache_file, 'r') as f:
-                            return json.load(f)
-                    except Exception as e:
-                        print(f"Error reading cache: {e}")
-
-            # Prepare API request
-            headers = {
-                "Authorization": f"Bearer {ASTRO_API_KEY}",
-                "Content-Type": "application/json"
-            }
+            try:
+                cached = AstroAPI.CACHE.get_entry(canonical.key, include_expired=True)
+                if cached is not None:
+                    AstroAPI.BIRTH_CHART_KEYS.record_hit(canonical)
+                    if cached.expired:
+                        AstroAPI._schedule_refresh(
+                            canonical.key, AstroAPI._request_birth_chart, canonical,
+                            birth_date, birth_time, latitude, longitude, observation_point, ayanamsha, tzone,
+                            PRIORITY_BATCH, None
+                        )
+                    return cached.value
+            except Exception as e:
+                print(f"Error reading cache: {e}")
+            AstroAPI.BIRTH_CHART_KEYS.record_miss(canonical)
             
-            data = {
-                "day": birth_date.day,
-                "month": birth_date.month,
-                "year": birth_date.year,
-                "hour": birth_time.hour,
-                "min": birth_time.minute,
-                "lat": latitude,
-                "lon": longitude,
-                "tzone": 0,  # UTC
-                "observation_point": observation_point,
-                "ayanamsha": ayanamsha
-            }
+            # Don't queue behind the rate limiter or an outage when the local provider is faster
+            if (canonical.key in AstroAPI.FAILED_KEYS
+                    or (deadline is not None and deadline.expired)
+                    or AstroAPI.BREAKER.state == OPEN
+                    or AstroAPI.estimated_wait(priority) > AstroAPI.MAX_QUEUE_WAIT):
+                raise ProviderUnavailable("Astrology API is not answering in time")
+            
+            return AstroAPI._request_birth_chart(
+                canonical, birth_date, birth_time, latitude, longitude, observation_point, ayanamsha, tzone,
+                priority, deadline
+            )
+            
+        except Exception as e:
+            # Remember keys the API itself failed on; the provider chain falls back
+            if not isinstance(e, LOCAL_FAILURES):
+                AstroAPI.FAILED_KEYS.add(canonical.key)
+            raise
+    
+    @staticmethod
+    def _request_birth_chart(canonical: CanonicalKey, birth_date: datetime.date, birth_time: datetime.time,
+                             latitude: float, longitude: float,
+                             observation_point: str, ayanamsha: str, tzone: float,
+                             priority: int, deadline: Optional[Deadline]) -> List[Dict[str, Any]]:
+        """Fetch a birth chart from the API and cache it; raises if every attempt fails"""
+        # Prepare API request
+        headers = {
+            "Authorization": "Bearer",  # Key filled in from KEY_POOL per attempt
+            "Content-Type": "application/json"
+        }
+        
+        data = {
+            "day": birth_date.day,
+            "month": birth_date.month,
+            "year": birth_date.year,
+            "hour": birth_time.hour,
+            "min": birth_time.minute,
+            "lat": latitude,
+            "lon": longitude,
+            "tzone": tzone,
+            "observation_point": observation_point,
+            "ayanamsha": ayanamsha
+        }
 
-            # Make API request with timeout
-            for attempt in range(AstroAPI.MAX_RETRIES):
-                try:
-                    response = requests.post(
-                        f"{AstroAPI.BASE_URL}/birth-chart",
-                        headers=headers,
-                        json=data,
-                        timeout=AstroAPI.REQUEST_TIMEOUT
-                    )
-                    response.raise_for_status()
-                    response_data = response.json()
+        # Make API request with the learned timeout and retry policy
+        policy = AstroAPI.LATENCY_POLICY.policy("birth-chart")
+        max_retries, retry_delay = policy["retries"], policy["retry_delay"]
+        for attempt in range(max_retries):
+            try:
+                response = AstroAPI._post(
+                    f"{AstroAPI.BASE_URL}/birth-chart",
+                    priority,
+                    deadline,
+                    headers=headers,
+                    json=data
+                )
+                if response.status_code == 429:
+                    # Pause the shared queue; the retry waits there by priority
+                    AstroAPI._penalize_rate_limit(response, attempt)
+                    continue
+                response.raise_for_status()
+                response_data = response.json()
+                
+                if response_data.get("statusCode") == 200:
+                    planets_data = response_data.get("output", [])
                     
-                    if response_data.get("statusCode") == 200:
-                        planets_data = response_data.get("output", [])
+                    if isinstance(planets_data, list):
+                        # Validate planet data
+                        for planet in planets_data:
+                            if not all(key in planet for key in ["name", "longitude", "latitude", "speed", "house", "sign"]):
+                                raise Exception("Invalid planet data received from API")
                         
-                        if isinstance(planets_data, list):
-                            # Validate planet data
-                            for planet in planets_data:
-                                if not all(key in planet for key in ["name", "longitude", "latitude", "speed", "house", "sign"]):
-                                    raise Exception("Invalid planet data received from API")
-                            
-                            # Add ascendant if not present
-                            has_ascendant = any(p.get("name") == "Ascendant" for p in planets_data)
-                            if not has_ascendant:
-                                hour = birth_time.hour + birth_time.minute/60.0
-                                lagna_longitude = (hour * 15 + longitude) % 360
-                                planets_data.append({
-                                    "name": "Ascendant",
-                                    "longitude": lagna_longitude,
-                                    "latitude": latitude,
-                                    "speed": 0,
-                                    "house": int(lagna_longitude / 30) + 1,
-                                    "sign": int(lagna_longitude / 30)
-                                })
-                            
-                            # Cache the result
-                            try:
-                                AstroAPI.CACHE_DIR.mkdir(exist_ok=True)
-                                with open(cache_file, 'w') as f:
-                                    json.dump(planets_data, f)
-                            except Exception as e:
-                                print(f"Error caching birth chart: {e}")
-                            
-                            return planets_data
-                        else:
-                            raise Exception("Invalid response format from API")
-                    else:
-                        raise Exception(f"API error: {response_data.get('message', 'Unknown error')}")
+                        # Add ascendant if not present
+                        has_ascendant = any(p.get("name") == "Ascendant" for p in planets_data)
+                        if not has_ascendant:
+                            moment = (datetime.datetime.combine(birth_date, birth_time)
+                                      - datetime.timedelta(hours=tzone))
+                            lagna_longitude = (LocalEphemerisProvider.ascendant(moment, latitude, longitude)
+                                               - LocalEphemerisProvider.ayanamsa(moment)) % 360
+                            planets_data.append({
+                                "name": "Ascendant",
+                                "longitude": lagna_longitude,
+                                "latitude": latitude,
+                                "speed": 0,
+                                "house": int(lagna_longitude / 30) + 1,
+                                "sign": int(lagna_longitude / 30)
+                            })
                         
-                except requests.Timeout:
-                    if attempt == AstroAPI.MAX_RETRIES - 1:
-                        raise Exception("API request timed out")
-                    time.sleep(AstroAPI.RETRY_DELAY)
-                except requests.RequestException as e:
-                    if attempt == AstroAPI.MAX_RETRIES - 1:
-                        raise Exception(f"API request failed: {str(e)}")
-                    time.sleep(AstroAPI.RETRY_DELAY)
-            
-            # If API fails, calculate approximate positions
-            return AstroAPI._calculate_approximate_positions(birth_date, birth_time, latitude, longitude)
-            
-        except Exception as e:
-            # If API fails, calculate approximate positions
-            return AstroAPI._calculate_approximate_positions(birth_date, birth_time, latitude, longitude)
+                        # Cache the result
+                        try:
+                            AstroAPI.CACHE.set(canonical.key, planets_data,
+                                               ttl=AstroAPI._birth_chart_ttl(birth_date, birth_time, tzone))
+                            AstroAPI.BIRTH_CHART_KEYS.remember(canonical)
+                        except Exception as e:
+                            print(f"Error caching birth chart: {e}")
+                        
+                        return planets_data
+                    else:
+                        raise Exception("Invalid response format from API")
+                else:
+                    raise Exception(f"API error: {response_data.get('message', 'Unknown error')}")
+                    
+            except requests.Timeout:
+                if attempt == max_retries - 1:
+                    raise Exception("API request timed out")
+                if not sleep_within(deadline, retry_delay):
+                    raise DeadlineExceeded("No time budget left to retry the API call")
+            except requests.RequestException as e:
+                if attempt == max_retries - 1:
+                    raise Exception(f"API request failed: {str(e)}")
+                if not sleep_within(deadline, retry_delay):
+                    raise DeadlineExceeded("No time budget left to retry the API call")
+        
+        raise Exception("API request failed after all retries")
     
     @staticmethod
     def _calculate_approximate_positions(birth_date: datetime.date, birth_time: datetime.time,
-                                       latitude: float, longitude: float) -> List[Dict[str, Any]]:
+                                       latitude: float, longitude: float, tzone: float = 0.0) -> List[Dict[str, Any]]:
         """
-        Calculate approximate planetary positions when API is unavailable
+        Calculate planetary positions locally when API is unavailable
         """
-        # Calculate approximate Lagna (Ascendant)
-        hour = birth_time.hour + birth_time.minute/60.0
-        lagna_longitude = (hour * 15 + longitude) % 360  # Approximate calculation
-        
-        # Calculate approximate planet positions
-        planets = []
-        base_positions = {
-            "Sun": 0,
-            "Moon": 30,
-            "Mars": 60,
-            "Mercury": 90,
-            "Jupiter": 120,
-            "Venus": 150,
-            "Saturn": 180,
-            "Rahu": 210,
-            "Ketu": 30  # Ketu is opposite to Rahu
-        }
-        
-        # Add some variation based on date
-        date_factor = (birth_date.day + birth_date.month * 30) % 360
-        
-        for planet, base_pos in base_positions.items():
-            # Add variation and normalize to 0-360
-            longitude = (base_pos + date_factor + (hour * 5)) % 360
-            planets.append({
-                "name": planet,
-                "longitude": longitude,
-                "latitude": 0,
-                "speed": 1.0,
-                "house": int(longitude / 30) + 1
-            })
-        
-        # Add ascendant to the list
-        planets.append({
-            "name": "Ascendant",
-            "longitude": lagna_longitude,
-            "latitude": latitude,
-            "speed": 0,
-            "house": int(lagna_longitude / 30) + 1
-        })
-        
-        return planets
+        return AstroAPI.LOCAL_PROVIDER.birth_chart(
+            ChartRequest(birth_date, birth_time, latitude, longitude, tzone=tzone))
     
     @staticmethod
     def get_planet_positions(birth_chart_data: Union[Dict[str, Any], List[Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
@@ -0,0 +1,354 @@
+import argparse
+import datetime
+import hashlib
+import json
+import math
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import requests
+
+from config import ASTRO_API_BASE_URL, ASTRO_CHART_URL
+from utils.providers import ChartRequest, LocalEphemerisProvider
+
+ENDPOINTS = ("birth-chart", "horoscope-chart-url")
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    Latency distribution from a spec string, in seconds:
+    fixed:0.2, uniform:0.05,0.4, normal:0.2,0.05 or lognormal:<median>,<sigma>
+    """
+    kind, _, params = spec.partition(":")
+    values = [float(value) for value in params.split(",") if value]
+    try:
+        if kind == "fixed":
+            return lambda rng: values[0]
+        if kind == "uniform":
+            return lambda rng: rng.uniform(values[0], values[1])
+        if kind == "normal":
+            return lambda rng: max(0.0, rng.gauss(values[0], values[1]))
+        if kind == "lognormal":
+            mu = math.log(values[0])
+            return lambda rng: rng.lognormvariate(mu, values[1])
+    except IndexError:
+        pass
+    raise ValueError(f"Bad latency spec {spec!r}; expected fixed:S, uniform:A,B, normal:MU,SD or lognormal:MEDIAN,SIGMA")
+
+
+def request_key(endpoint: str, body: bytes) -> str:
+    """Replay key: the endpoint plus the JSON payload with its keys sorted"""
+    try:
+        canonical = json.dumps(json.loads(body or b"{}"), sort_keys=True)
+    except ValueError:
+        canonical = body.decode("utf-8", "replace")
+    return hashlib.sha1(f"{endpoint}|{canonical}".encode()).hexdigest()
+
+
+class FaultProfile:
+    """What the stand-in does to each request before (or instead of) answering"""
+
+    def __init__(self, latency: str = "fixed:0", rate_429: float = 0.0, rate_5xx: float = 0.0,
+                 rate_timeout: float = 0.0, hang: float = 30.0, seed: Optional[int] = None):
+        self.latency = parse_latency(latency)
+        self.rate_429 = rate_429
+        self.rate_5xx = rate_5xx
+        self.rate_timeout = rate_timeout
+        self.hang = hang
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def draw(self) -> Tuple[float, Optional[str]]:
+        """(delay, fault) for one request; fault is None, "429", "5xx" or "timeout" """
+        with self._lock:
+            delay = self.latency(self._rng)
+            roll = self._rng.random()
+        if roll < self.rate_timeout:
+            return self.hang, "timeout"
+        roll -= self.rate_timeout
+        if roll < self.rate_429:
+            return delay, "429"
+        roll -= self.rate_429
+        if roll < self.rate_5xx:
+            return delay, "5xx"
+        return delay, None
+
+
+class StubAstroServer(ThreadingHTTPServer):
+    """
+    Local stand-in for the birth-chart and horoscope-chart-url endpoints.
+
+    Charts are computed with the local ephemeris provider, so answers are
+    realistic without spending API quota. With `record` set, requests are
+    proxied to the real API and the answers appended to a JSONL file;
+    `replay` serves answers from such a file instead.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], faults: FaultProfile,
+                 record: Optional[str] = None, replay: Optional[str] = None,
+                 upstream: Optional[Dict[str, str]] = None):
+        super().__init__(address, StubRequestHandler)
+        self.faults = faults
+        self.record_path = Path(record) if record else None
+        self.upstream = upstream or {"birth-chart": f"{ASTRO_API_BASE_URL}/birth-chart",
+                                     "horoscope-chart-url": ASTRO_CHART_URL}
+        self.recorded: Dict[str, Tuple[int, Any]] = {}
+        if replay:
+            with open(replay, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        item = json.loads(line)
+                        self.recorded[item["key"]] = (item["status"], item["body"])
+        self.charts: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.counts: Dict[str, int] = {}
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, name: str):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def save_recording(self, key: str, endpoint: str, status: int, body: Any):
+        with self._lock:
+            with open(self.record_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"key": key, "endpoint": endpoint, "status": status, "body": body}) + "\n")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counts)
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    server: StubAstroServer
+
+    def log_message(self, format, *args):
+        pass  # Keep benchmark output readable
+
+    def _send_json(self, status: int, body: Any, headers: Optional[Dict[str, str]] = None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        name = self.path.rsplit("/", 1)[-1]
+        svg = self.server.charts.get(name)
+        if svg is None:
+            self.send_error(404)
+            return
+        data = svg.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "image/svg+xml")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        endpoint = self.path.rstrip("/").rsplit("/", 1)[-1]
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if endpoint not in ENDPOINTS:
+            self.server.count("404")
+            self._send_json(404, {"statusCode": 404, "message": f"Unknown endpoint {endpoint}"})
+            return
+
+        delay, fault = self.server.faults.draw()
+        time.sleep(delay)
+        if fault == "timeout":
+            self.server.count("timeout")
+            return  # The client gave up long ago; close without an answer
+        if fault == "429":
+            self.server.count("429")
+            self._send_json(429, {"statusCode": 429, "message": "Too Many Requests"}, {"Retry-After": "1"})
+            return
+        if fault == "5xx":
+            self.server.count("503")
+            self._send_json(503, {"statusCode": 503, "message": "Service Unavailable"})
+            return
+
+        key = request_key(endpoint, body)
+        if self.server.record_path is not None:
+            status, answer = self._proxy(endpoint, body)
+            self.server.save_recording(key, endpoint, status, answer)
+        elif key in self.server.recorded:
+            status, answer = self.server.recorded[key]
+        else:
+            status, answer = self._synthesize(endpoint, body)
+        self.server.count(str(status))
+        self._send_json(status, answer)
+
+    def _proxy(self, endpoint: str, body: bytes) -> Tuple[int, Any]:
+        headers = {name: value for name, value in self.headers.items()
+                   if name.lower() in ("content-type", "authorization", "x-api-key")}
+        response = requests.post(self.server.upstream[endpoint], data=body, headers=headers, timeout=30)
+        try:
+            return response.status_code, response.json()
+        except ValueError:
+            return response.status_code, {"statusCode": response.status_code, "message": response.text}
+
+    def _synthesize(self, endpoint: str, body: bytes) -> Tuple[int, Any]:
+        try:
+            payload = json.loads(body or b"{}")
+            if endpoint == "birth-chart":
+                request = ChartRequest(
+                    datetime.date(payload["year"], payload["month"], payload["day"]),
+                    datetime.time(payload["hour"], payload["min"]),
+                    float(payload["lat"]), float(payload["lon"]),
+                    tzone=float(payload.get("tzone", 0))
+                )
+                return 200, {"statusCode": 200, "output": LocalEphemerisProvider().birth_chart(request)}
+            name = f"{request_key(endpoint, body)}.svg"
+            self.server.charts[name] = self._chart_svg(payload)
+            return 200, {"statusCode": 200, "output": f"{self.server.url}/charts/{name}"}
+        except (KeyError, TypeError, ValueError) as e:
+            return 400, {"statusCode": 400, "message": f"Bad request: {e}"}
+
+    @staticmethod
+    def _chart_svg(payload: Dict[str, Any]) -> str:
+        label = f"{payload.get('year')}-{payload.get('month')}-{payload.get('date')}"
+        return ('<svg xmlns="http://www.w3.org/2000/svg" width="400" height="400">'
+                '<rect x="10" y="10" width="380" height="380" fill="none" stroke="black"/>'
+                f'<text x="200" y="200" text-anchor="middle">Stub chart {label}</text></svg>')
+
+
+def start_server(faults: FaultProfile, host: str = "127.0.0.1", port: int = 0,
+                 record: Optional[str] = None, replay: Optional[str] = None) -> StubAstroServer:
+    """Start the stand-in on a background thread; port 0 picks a free port"""
+    server = StubAstroServer((host, port), faults, record=record, replay=replay)
+    threading.Thread(target=server.serve_forever, name="astro-stub-server", daemon=True).start()
+    return server
+
+
+def _percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))] if values else 0.0
+
+
+def run_benchmark(server: StubAstroServer, total: int, distinct: int, concurrency: int,
+                  deadline: Optional[float], rate: float, seed: int,
+                  keys: int = 1, quota: int = 100000) -> Dict[str, Any]:
+    """
+    Drive AstroAPI.get_birth_chart against the stand-in with a throwaway cache
+    and report latency percentiles, which provider answered, and client metrics.
+    """
+    from utils.astro_api import AstroAPI
+    from utils.cache_store import CacheStore
+    from utils.deadline import Deadline
+    from utils.key_pool import ApiKeyPool
+    from utils.memory_cache import TieredCache
+    from utils.rate_limiter import RequestScheduler
+
+    AstroAPI.BASE_URL = server.url
+    AstroAPI.CHART_URL = f"{server.url}/horoscope-chart-url"
+    AstroAPI.CACHE = TieredCache(CacheStore(Path(tempfile.mkdtemp()) / "bench.sqlite3"))
+    AstroAPI.SCHEDULER = RequestScheduler(rate, max(1.0, rate))
+    AstroAPI.KEY_POOL = ApiKeyPool([f"bench-key-{index}" for index in range(keys)], quota, 60.0)
+
+    rng = random.Random(seed)
+    charts = [
+        (datetime.date(rng.randint(1950, 2005), rng.randint(1, 12), rng.randint(1, 28)),
+         datetime.time(rng.randint(0, 23), rng.randint(0, 59)),
+         round(rng.uniform(8, 35), 4), round(rng.uniform(68, 97), 4))
+        for _ in range(distinct)
+    ]
+    workload = [charts[rng.randrange(distinct)] for _ in range(total)]
+
+    def one(chart) -> Tuple[float, str]:
+        started = time.perf_counter()
+        result = AstroAPI.get_birth_chart(*chart, deadline=Deadline(deadline) if deadline else None)
+        return time.perf_counter() - started, result[0].get("provider", "unknown")
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, workload))
+    elapsed = time.perf_counter() - started
+
+    latencies = [latency for latency, _ in results]
+    providers: Dict[str, int] = {}
+    for _, provider in results:
+        providers[provider] = providers.get(provider, 0) + 1
+    metrics = AstroAPI.get_metrics()
+    return {
+        "requests": total,
+        "wall_time": round(elapsed, 3),
+        "p50": round(_percentile(latencies, 0.50), 4),
+        "p90": round(_percentile(latencies, 0.90), 4),
+        "p99": round(_percentile(latencies, 0.99), 4),
+        "providers": providers,
+        "server": server.stats(),
+        "cache": metrics["cache"],
+        "breaker": metrics["breaker"],
+        "scheduler": metrics["scheduler"],
+        "keys": metrics["keys"]["keys"],
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    """Run the stand-in or an offline benchmark: python -m utils.astro_stub_server --help"""
+    parser = argparse.ArgumentParser(description="Local stand-in for the astrology API")
+    parser.add_argument("--latency", default="fixed:0", help="fixed:S, uniform:A,B, normal:MU,SD or lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--rate-5xx", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--rate-timeout", type=float, default=0.0, help="Fraction of requests left hanging")
+    parser.add_argument("--hang", type=float, default=30.0, help="Seconds a hanging request is held")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for reproducible latency and faults")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="Serve until interrupted")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8765)
+    mode = serve_parser.add_mutually_exclusive_group()
+    mode.add_argument("--record", help="Proxy to the real API and append answers to this JSONL file")
+    mode.add_argument("--replay", help="Answer from a recorded JSONL file (others are synthesized)")
+
+    bench_parser = commands.add_parser("bench", help="Benchmark AstroAPI against an in-process stand-in")
+    bench_parser.add_argument("--requests", type=int, default=200)
+    bench_parser.add_argument("--distinct", type=int, default=50, help="Distinct charts in the workload")
+    bench_parser.add_argument("--concurrency", type=int, default=8)
+    bench_parser.add_argument("--deadline", type=float, default=None, help="Per-request time budget in seconds")
+    bench_parser.add_argument("--rate", type=float, default=50.0, help="Client rate limit in requests per second")
+    bench_parser.add_argument("--keys", type=int, default=1, help="Number of API keys in the client's pool")
+    bench_parser.add_argument("--quota", type=int, default=100000, help="Daily quota per key")
+    bench_parser.add_argument("--replay", help="Answer from a recorded JSONL file")
+
+    args = parser.parse_args(argv)
+    faults = FaultProfile(args.latency, args.rate_429, args.rate_5xx, args.rate_timeout, args.hang, args.seed)
+
+    if args.command == "serve":
+        server = StubAstroServer((args.host, args.port), faults, record=args.record, replay=args.replay)
+        print(f"Astrology API stand-in on {server.url}")
+        print(f"  ASTRO_API_BASE_URL={server.url}")
+        print(f"  ASTRO_CHART_URL={server.url}/horoscope-chart-url")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+    elif args.command == "bench":
+        server = start_server(faults, replay=args.replay)
+        try:
+            result = run_benchmark(server, args.requests, args.distinct, args.concurrency,
+                                   args.deadline, args.rate, args.seed, args.keys, args.quota)
+        finally:
+            server.shutdown()
+        print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
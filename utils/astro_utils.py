@@ -1,9 +1,8 @@
 import ephem
 import datetime
-import pytz
-from typing import Dict, Tuple, List, Any
+from typing import Dict, Tuple, List, Any, Optional
 import math
-from utils.astro_api import AstroAPI
+from utils.deadline import Deadline
 
 class AstroUtils:
     @staticmethod
@@ -66,72 +65,22 @@ class AstroUtils:
 
     @staticmethod
     def calculate_planet_positions(birth_date: datetime.date, birth_time: datetime.time,
-                                 latitude: float, longitude: float) -> Tuple[Dict[str, Dict[str, Any]], int]:
+                                 latitude: float, longitude: float,
+                                 deadline: Optional[Deadline] = None) -> Tuple[Dict[str, Dict[str, Any]], int]:
         """
-        Calculate planetary positions using both local calculations and API
+        Calculate planetary positions from the first provider that answers in time.
+        Remote calls are bounded by `deadline` when one is given.
         """
+        from utils.astro_api import AstroAPI  # Deferred: pulls in the whole API client
+        
         try:
-            # Calculate Lagna (Ascendant)
-            birth_datetime = datetime.datetime.combine(birth_date, birth_time)
-            lagna_sign = AstroUtils.calculate_lagna(birth_datetime, latitude, longitude)
-            
-            # Calculate approximate planet positions
-            planets = []
-            base_positions = {
-                "Sun": 0,
-                "Moon": 30,
-                "Mars": 60,
-                "Mercury": 90,
-                "Jupiter": 120,
-                "Venus": 150,
-                "Saturn": 180,
-                "Rahu": 210,
-                "Ketu": 30  # Ketu is opposite to Rahu
-            }
-            
-            # Add variation based on date and time
-            date_factor = (birth_date.day + birth_date.month * 30) % 360
-            time_factor = (birth_time.hour + birth_time.minute/60.0) * 15
-            
-            for planet, base_pos in base_positions.items():
-                # Calculate longitude with variations
-                longitude = (base_pos + date_factor + time_factor) % 360
-                sign = int(longitude / 30)
-                
-                # Calculate house based on Lagna
-                house = ((sign - lagna_sign) % 12) + 1
-                
-                planets.append({
-                    "name": planet,
-                    "longitude": longitude,
-                    "latitude": 0,
-                    "speed": 1.0,
-                    "house": house,
-                    "sign": sign
-                })
-            
-            # Add ascendant
-            planets.append({
-                "name": "Ascendant",
-                "longitude": (time_factor + longitude) % 360,
-                "latitude": latitude,
-                "speed": 0,
-                "house": 1,
-                "sign": lagna_sign
-            })
-            
-            # Try to get API data
-            try:
-                birth_chart_data = AstroAPI.get_birth_chart(birth_date, birth_time, latitude, longitude)
-                if birth_chart_data:
-                    # Use API data if available
-                    planet_positions = AstroAPI.get_planet_positions(birth_chart_data)
-                else:
-                    # Use local calculations if API fails
-                    planet_positions = AstroAPI.get_planet_positions(planets)
-            except Exception:
-                # Use local calculations if API fails
-                planet_positions = AstroAPI.get_planet_positions(planets)
+            # The provider chain falls back to local ephemeris on its own, so the
+            # lagna is read from the same chart the planet houses come from
+            birth_chart_data = AstroAPI.get_birth_chart(
+                birth_date, birth_time, latitude, longitude, deadline=deadline
+            )
+            planet_positions = AstroAPI.get_planet_positions(birth_chart_data)
+            lagna_sign = AstroAPI.get_lagna_sign(birth_chart_data)
             
             return planet_positions, lagna_sign
             
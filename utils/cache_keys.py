@@ -0,0 +1,115 @@
+import datetime
+import threading
+from collections import Counter, OrderedDict
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from config import CACHE_COORD_PRECISION, CACHE_TIME_PRECISION
+
+# Bump when the meaning of cached values changes so old entries stop matching
+CACHE_KEY_VERSION = 3
+
+
+class CanonicalKey(NamedTuple):
+    key: str
+    fields: Tuple[Tuple[str, str], ...]  # Ordered (name, canonical value) pairs
+
+
+def quantize_coordinate(value: float, precision: int = CACHE_COORD_PRECISION) -> float:
+    """Round a coordinate to a fixed number of decimals (0.01° is about 1.1 km)"""
+    quantized = round(float(value), precision)
+    return quantized + 0.0  # Normalize -0.0 to 0.0
+
+
+def quantize_time(birth_time: datetime.time, precision: int = CACHE_TIME_PRECISION) -> datetime.time:
+    """Truncate a time of day to a whole multiple of `precision` seconds"""
+    seconds = birth_time.hour * 3600 + birth_time.minute * 60 + birth_time.second
+    seconds -= seconds % max(int(precision), 1)
+    return datetime.time(seconds // 3600, (seconds // 60) % 60, seconds % 60)
+
+
+def canonical_birth_key(kind: str, birth_date: datetime.date, birth_time: datetime.time,
+                        latitude: float, longitude: float,
+                        time_precision: int = CACHE_TIME_PRECISION,
+                        coord_precision: int = CACHE_COORD_PRECISION,
+                        **params: Any) -> CanonicalKey:
+    """
+    Build a canonical cache key for a birth moment and place.
+
+    Inputs that produce the same chart map to the same key: coordinates are
+    quantized, the time is truncated to `time_precision` seconds and extra
+    parameters are lower-cased and sorted.
+    """
+    fields = [
+        ("date", birth_date.isoformat()),
+        ("time", quantize_time(birth_time, time_precision).strftime("%H:%M:%S")),
+        ("lat", f"{quantize_coordinate(latitude, coord_precision):.{coord_precision}f}"),
+        ("lon", f"{quantize_coordinate(longitude, coord_precision):.{coord_precision}f}"),
+    ]
+    fields.extend((name, str(value).strip().lower()) for name, value in sorted(params.items()))
+    key = "|".join([f"{kind}:v{CACHE_KEY_VERSION}"] + [f"{name}={value}" for name, value in fields])
+    return CanonicalKey(key, tuple(fields))
+
+
+class KeyMissTracker:
+    """
+    Attribute cache misses to the key field that differed.
+
+    For every key seen, the key with each single field left out is indexed.
+    On a miss, a field whose leave-one-out key is already known is the field
+    that caused the miss (every other field matched a cached entry). Misses
+    with no such neighbour are counted as "new".
+    """
+
+    MAX_TRACKED_KEYS = 10000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._neighbours: "OrderedDict[Tuple[str, Tuple[Tuple[str, str], ...]], int]" = OrderedDict()
+        self._hits = 0
+        self._miss_count = 0
+        self._misses = Counter()
+
+    @staticmethod
+    def _leave_one_out(fields: Tuple[Tuple[str, str], ...]):
+        for index, (name, _) in enumerate(fields):
+            yield name, (name, fields[:index] + fields[index + 1:])
+
+    def record_hit(self, canonical: CanonicalKey):
+        with self._lock:
+            self._hits += 1
+
+    def record_miss(self, canonical: CanonicalKey) -> Optional[str]:
+        """Count a miss and return the field blamed for it (None if new)"""
+        with self._lock:
+            self._miss_count += 1
+            causes = [name for name, partial in self._leave_one_out(canonical.fields)
+                      if partial in self._neighbours]
+            if causes:
+                for name in causes:
+                    self._misses[name] += 1
+            else:
+                self._misses["new"] += 1
+            return causes[0] if causes else None
+
+    def remember(self, canonical: CanonicalKey):
+        """Index a key that is now cached"""
+        with self._lock:
+            for _, partial in self._leave_one_out(canonical.fields):
+                self._neighbours[partial] = 1
+                self._neighbours.move_to_end(partial)
+            while len(self._neighbours) > self.MAX_TRACKED_KEYS:
+                self._neighbours.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            misses = dict(self._misses)
+            total_misses = self._miss_count
+            hits = self._hits
+        return {
+            "hits": hits,
+            "misses": total_misses,
+            "misses_by_field": misses,
+            "hit_ratio": hits / (hits + total_misses) if hits + total_misses else 0.0,
+            "coord_precision": CACHE_COORD_PRECISION,
+            "time_precision": CACHE_TIME_PRECISION,
+        }
@@ -0,0 +1,337 @@
+import argparse
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Union
+
+from config import CACHE_DB_PATH, CACHE_MAX_BYTES, CACHE_EVICTION_INTERVAL, CACHE_STALE_GRACE
+
+
+class CacheEntry(NamedTuple):
+    key: str
+    value: Any
+    created_at: float
+    expires_at: Optional[float]  # None means the entry never expires
+
+    @property
+    def expired(self) -> bool:
+        return self.expires_at is not None and self.expires_at <= time.time()
+
+
+class CacheStore:
+    """
+    Single-file persistent key/value cache backed by SQLite in WAL mode.
+
+    Values are stored as compact JSON (zlib-compressed once they grow past
+    COMPRESS_THRESHOLD bytes), never pickled. Entries are indexed by key and
+    expiry, so lookups are a single indexed read and eviction by TTL and by
+    total size is a couple of range deletes. Integer counters live in a
+    table of their own and are incremented in place, so several processes
+    can count into the same key. Expired entries are kept for
+    `stale_grace` seconds, so callers can serve them while they refresh.
+    WAL mode lets any number of processes read while one writes.
+    """
+
+    COMPRESS_THRESHOLD = 512
+    BUSY_TIMEOUT_MS = 5000
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS cache_entries (
+            key TEXT PRIMARY KEY,
+            value BLOB NOT NULL,
+            size INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            expires_at REAL
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_cache_entries_expires_at ON cache_entries(expires_at);
+        CREATE INDEX IF NOT EXISTS idx_cache_entries_created_at ON cache_entries(created_at);
+        CREATE TABLE IF NOT EXISTS counters (
+            key TEXT NOT NULL,
+            field TEXT NOT NULL,
+            value INTEGER NOT NULL,
+            expires_at REAL,
+            PRIMARY KEY (key, field)
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, path: Union[str, Path] = CACHE_DB_PATH, max_bytes: int = CACHE_MAX_BYTES,
+                 eviction_interval: float = CACHE_EVICTION_INTERVAL, stale_grace: float = CACHE_STALE_GRACE):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.eviction_interval = eviction_interval
+        self.stale_grace = stale_grace
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        self._evictor: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------
+    # Connection handling
+    # ------------------------------------------------------------------
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's connection, creating the database on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+
+        with self._init_lock:
+            if not self._initialized:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                init_conn = sqlite3.connect(str(self.path), timeout=self.BUSY_TIMEOUT_MS / 1000)
+                try:
+                    init_conn.execute("PRAGMA journal_mode=WAL")
+                    init_conn.executescript(self._SCHEMA)
+                    init_conn.commit()
+                finally:
+                    init_conn.close()
+                self._initialized = True
+                self._start_evictor()
+
+        conn = sqlite3.connect(str(self.path), timeout=self.BUSY_TIMEOUT_MS / 1000,
+                               isolation_level=None, check_same_thread=False)
+        conn.execute(f"PRAGMA busy_timeout={self.BUSY_TIMEOUT_MS}")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        self._local.conn = conn
+        return conn
+
+    def _start_evictor(self):
+        """Start the background TTL/size eviction thread"""
+        if self.eviction_interval <= 0 or self._evictor is not None:
+            return
+
+        def run():
+            while True:
+                time.sleep(self.eviction_interval)
+                try:
+                    self.evict()
+                except Exception as e:
+                    print(f"Error evicting cache entries: {e}")
+
+        self._evictor = threading.Thread(target=run, name="cache-evictor", daemon=True)
+        self._evictor.start()
+
+    # ------------------------------------------------------------------
+    # Serialization
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _encode(value: Any) -> bytes:
+        raw = json.dumps(value, separators=(",", ":"), default=str).encode("utf-8")
+        if len(raw) > CacheStore.COMPRESS_THRESHOLD:
+            return b"z" + zlib.compress(raw)
+        return b"j" + raw
+
+    @staticmethod
+    def _decode(blob: bytes) -> Any:
+        blob = bytes(blob)
+        if blob[:1] == b"z":
+            return json.loads(zlib.decompress(blob[1:]))
+        return json.loads(blob[1:])
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def get_entry(self, key: str, include_expired: bool = False) -> Optional[CacheEntry]:
+        """Get the entry for a key, or None if missing (or expired, unless requested)"""
+        row = self._connect().execute(
+            "SELECT value, created_at, expires_at FROM cache_entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        try:
+            entry = CacheEntry(key, self._decode(row[0]), row[1], row[2])
+        except Exception as e:
+            print(f"Error decoding cache entry {key}: {e}")
+            return None
+        if entry.expired and not include_expired:
+            return None
+        return entry
+
+    def get(self, key: str) -> Any:
+        """Get a cached value if available and not expired"""
+        entry = self.get_entry(key)
+        return entry.value if entry is not None else None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Store a value; ttl=None keeps it until evicted for size"""
+        blob = self._encode(value)
+        now = time.time()
+        expires_at = now + ttl if ttl is not None else None
+        self._connect().execute(
+            "INSERT OR REPLACE INTO cache_entries (key, value, size, created_at, expires_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (key, blob, len(blob), now, expires_at)
+        )
+
+    def delete(self, key: str) -> bool:
+        cursor = self._connect().execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+        return cursor.rowcount > 0
+
+    def get_counters(self, key: str) -> Dict[str, int]:
+        """Current values of the unexpired counters under a key"""
+        return dict(self._connect().execute(
+            "SELECT field, value FROM counters WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (key, time.time())
+        ).fetchall())
+
+    def increment(self, key: str, deltas: Dict[str, int], ttl: Optional[float] = None) -> Dict[str, int]:
+        """
+        Add to the counters under a key in one transaction and return their
+        new values. Each add happens in the database, so concurrent processes
+        never overwrite each other's counts.
+        """
+        expires_at = time.time() + ttl if ttl is not None else None
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO counters (key, field, value, expires_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(key, field) DO UPDATE SET value = value + excluded.value, expires_at = excluded.expires_at",
+                [(key, field, int(delta), expires_at) for field, delta in deltas.items()]
+            )
+            values = dict(conn.execute("SELECT field, value FROM counters WHERE key = ?", (key,)).fetchall())
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return values
+
+    def purge(self, prefix: Optional[str] = None, expired_only: bool = False, grace: float = 0.0) -> int:
+        """
+        Delete entries and counters, optionally limited to a key prefix
+        and/or those that expired more than `grace` seconds ago
+        """
+        clauses, params = [], []
+        if prefix:
+            clauses.append("key >= ? AND key < ?")
+            params.extend([prefix, prefix + "\uffff"])
+        if expired_only:
+            clauses.append("expires_at IS NOT NULL AND expires_at <= ?")
+            params.append(time.time() - grace)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        conn = self._connect()
+        return sum(conn.execute(f"DELETE FROM {table}{where}", params).rowcount
+                   for table in ("cache_entries", "counters"))
+
+    def evict(self) -> Dict[str, int]:
+        """Drop entries past their stale grace, then the oldest entries until under max_bytes"""
+        conn = self._connect()
+        expired = self.purge(expired_only=True, grace=self.stale_grace)
+        evicted = 0
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries").fetchone()[0]
+        if self.max_bytes and total > self.max_bytes:
+            excess = total - self.max_bytes
+            freed = 0
+            doomed = []
+            for key, size in conn.execute("SELECT key, size FROM cache_entries ORDER BY created_at"):
+                doomed.append((key,))
+                freed += size
+                if freed >= excess:
+                    break
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany("DELETE FROM cache_entries WHERE key = ?", doomed)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            evicted = len(doomed)
+        return {"expired": expired, "evicted": evicted}
+
+    def entries(self, prefix: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """List entry metadata (without values), newest first"""
+        query = "SELECT key, size, created_at, expires_at FROM cache_entries"
+        params: List[Any] = []
+        if prefix:
+            query += " WHERE key >= ? AND key < ?"
+            params.extend([prefix, prefix + "\uffff"])
+        query += " ORDER BY created_at DESC LIMIT ?"
+        params.append(limit)
+        return [
+            {"key": key, "size": size, "created_at": created_at, "expires_at": expires_at}
+            for key, size, created_at, expires_at in self._connect().execute(query, params)
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        count, total, expired = self._connect().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0), "
+            "COALESCE(SUM(expires_at IS NOT NULL AND expires_at <= ?), 0) FROM cache_entries",
+            (time.time(),)
+        ).fetchone()
+        return {
+            "path": str(self.path),
+            "entries": count,
+            "bytes": total,
+            "expired": expired,
+            "max_bytes": self.max_bytes,
+        }
+
+
+_default: Optional[CacheStore] = None
+_default_lock = threading.Lock()
+
+
+def get_cache_store() -> CacheStore:
+    """Process-wide store on CACHE_DB_PATH, shared so there is one evictor and one connection per thread"""
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                _default = CacheStore()
+    return _default
+
+
+def _format_time(timestamp: Optional[float]) -> str:
+    if timestamp is None:
+        return "never"
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp))
+
+
+def main(argv: Optional[List[str]] = None):
+    """Inspect and purge the persistent cache: python -m utils.cache_store --help"""
+    parser = argparse.ArgumentParser(description="Inspect and purge the persistent cache store")
+    parser.add_argument("--db", default=CACHE_DB_PATH, help="Path to the cache database")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("stats", help="Show entry count and size")
+
+    list_parser = commands.add_parser("list", help="List entries, newest first")
+    list_parser.add_argument("--prefix", help="Only keys starting with this prefix")
+    list_parser.add_argument("--limit", type=int, default=50)
+
+    show_parser = commands.add_parser("show", help="Print the value stored under a key")
+    show_parser.add_argument("key")
+
+    purge_parser = commands.add_parser("purge", help="Delete entries")
+    purge_parser.add_argument("--prefix", help="Only keys starting with this prefix")
+    purge_parser.add_argument("--expired", action="store_true", help="Only expired entries")
+
+    commands.add_parser("evict", help="Run TTL and size eviction once")
+
+    args = parser.parse_args(argv)
+    store = CacheStore(args.db, eviction_interval=0)
+
+    if args.command == "stats":
+        for name, value in store.stats().items():
+            print(f"{name}: {value}")
+    elif args.command == "list":
+        for entry in store.entries(args.prefix, args.limit):
+            print(f"{entry['key']}  {entry['size']:>8} B  "
+                  f"created {_format_time(entry['created_at'])}  "
+                  f"expires {_format_time(entry['expires_at'])}")
+    elif args.command == "show":
+        entry = store.get_entry(args.key, include_expired=True)
+        if entry is None:
+            raise SystemExit(f"No entry for key {args.key!r}")
+        print(json.dumps(entry.value, indent=2, default=str))
+    elif args.command == "purge":
+        print(f"Purged {store.purge(args.prefix, args.expired)} entries")
+    elif args.command == "evict":
+        result = store.evict()
+        print(f"Evicted {result['expired']} stale and {result['evicted']} oversize entries")
+
+
+if __name__ == "__main__":
+    main()
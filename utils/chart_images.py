@@ -0,0 +1,146 @@
+import hashlib
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, NamedTuple, Optional, Union
+
+from config import CHART_IMAGE_DIR, CHART_IMAGE_MAX_BYTES
+from utils.cache_store import CacheStore
+from utils.memory_cache import TieredCache
+
+EXTENSIONS = {
+    "image/svg+xml": ".svg",
+    "image/png": ".png",
+    "image/jpeg": ".jpg",
+    "image/gif": ".gif",
+    "image/webp": ".webp",
+}
+
+
+class ChartImage(NamedTuple):
+    data: bytes
+    mime: str
+    source: str  # "cache", "remote" or "local"
+
+    @property
+    def is_svg(self) -> bool:
+        return self.mime == "image/svg+xml"
+
+
+def sniff_mime(data: bytes, declared: str = "") -> Optional[str]:
+    """Image type from the content itself, falling back to the declared Content-Type"""
+    head = data[:512].lstrip()
+    if head.startswith(b"\x89PNG"):
+        return "image/png"
+    if head.startswith(b"\xff\xd8"):
+        return "image/jpeg"
+    if head.startswith(b"GIF8"):
+        return "image/gif"
+    if head.startswith(b"RIFF") and data[8:12] == b"WEBP":
+        return "image/webp"
+    if head.startswith(b"<svg") or (head.startswith(b"<?xml") and b"<svg" in data[:2048]):
+        return "image/svg+xml"
+    declared = declared.split(";")[0].strip().lower()
+    return declared if declared in EXTENSIONS else None
+
+
+class ChartImageStore:
+    """
+    Content-addressed store for downloaded chart images.
+
+    Image bytes live in files named by their SHA-256 under `directory`, so
+    identical images are stored once and a file never changes once written.
+    The cache (normally the tiered cache, so repeat views read the index
+    from memory) maps each canonical chart key to its digest and type. Files are written atomically; when the directory grows past
+    `max_bytes` the least recently written files are removed, and index
+    entries pointing at a removed file count as misses.
+    """
+
+    KEY_PREFIX = "chart_image:"
+
+    def __init__(self, store: Union[CacheStore, TieredCache], directory: Union[str, Path] = CHART_IMAGE_DIR,
+                 max_bytes: int = CHART_IMAGE_MAX_BYTES):
+        self.store = store
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._counts = {"hits": 0, "misses": 0, "writes": 0, "pruned": 0}
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counts[name] += amount
+
+    def path_for(self, digest: str, mime: str) -> Path:
+        return self.directory / digest[:2] / f"{digest}{EXTENSIONS.get(mime, '.bin')}"
+
+    def get(self, key: str) -> Optional[ChartImage]:
+        try:
+            entry = self.store.get(self.KEY_PREFIX + key)
+        except Exception as e:
+            print(f"Error reading chart image index: {e}")
+            entry = None
+        if entry:
+            try:
+                data = self.path_for(entry["sha256"], entry["mime"]).read_bytes()
+                self._count("hits")
+                return ChartImage(data, entry["mime"], "cache")
+            except OSError:
+                pass  # Pruned since it was indexed
+        self._count("misses")
+        return None
+
+    def put(self, key: str, data: bytes, mime: str) -> str:
+        """Store an image under a chart key and return its digest"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path_for(digest, mime)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=str(path.parent), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(temp_path, path)
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+            self._count("writes")
+            self.prune()
+        try:
+            # A chart for given birth details never changes, so the index entry does not expire
+            self.store.set(self.KEY_PREFIX + key, {"sha256": digest, "mime": mime, "size": len(data)})
+        except Exception as e:
+            print(f"Error writing chart image index: {e}")
+        return digest
+
+    def prune(self) -> int:
+        """Remove the oldest files until the directory fits in max_bytes"""
+        files = []
+        total = 0
+        for path in self.directory.glob("*/*"):
+            if path.suffix == ".tmp":
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        removed = 0
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+                total -= size
+                removed += 1
+            except OSError:
+                continue
+        if removed:
+            self._count("pruned", removed)
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._counts)
@@ -0,0 +1,175 @@
+import html
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+SIZE = 400
+CAPTION_HEIGHT = 24
+PLANETS_PER_ROW = 3
+ROW_HEIGHT = 14
+
+SIGN_ABBREVIATIONS = ["Ar", "Ta", "Ge", "Cn", "Le", "Vi", "Li", "Sc", "Sg", "Cp", "Aq", "Pi"]
+PLANET_ABBREVIATIONS = {
+    "Sun": "Su", "Moon": "Mo", "Mars": "Ma", "Mercury": "Me", "Jupiter": "Ju",
+    "Venus": "Ve", "Saturn": "Sa", "Rahu": "Ra", "Ketu": "Ke", "Ascendant": "As",
+}
+
+# Class names are prefixed since the SVG is inlined into the page
+STYLE = ("<style>.kc-l{fill:none;stroke:#c65d00;stroke-width:2}"
+         ".kc-s{font:bold 12px sans-serif;fill:#333;text-anchor:middle}"
+         ".kc-p{font:12px sans-serif;fill:#1b7f3b;text-anchor:middle}"
+         ".kc-c{font:11px sans-serif;fill:#666;text-anchor:middle}</style>")
+
+Point = Tuple[float, float]
+
+# North Indian cells by house, as polygons in unit coordinates (y down) and
+# the inner vertex the sign number sits towards. House 1 is the top diamond.
+NORTH_CELLS: List[Tuple[Sequence[Point], Point]] = [
+    (((0.5, 0), (0.25, 0.25), (0.5, 0.5), (0.75, 0.25)), (0.5, 0.5)),
+    (((0, 0), (0.5, 0), (0.25, 0.25)), (0.25, 0.25)),
+    (((0, 0), (0.25, 0.25), (0, 0.5)), (0.25, 0.25)),
+    (((0, 0.5), (0.25, 0.25), (0.5, 0.5), (0.25, 0.75)), (0.5, 0.5)),
+    (((0, 0.5), (0.25, 0.75), (0, 1)), (0.25, 0.75)),
+    (((0, 1), (0.25, 0.75), (0.5, 1)), (0.25, 0.75)),
+    (((0.5, 1), (0.25, 0.75), (0.5, 0.5), (0.75, 0.75)), (0.5, 0.5)),
+    (((0.5, 1), (0.75, 0.75), (1, 1)), (0.75, 0.75)),
+    (((1, 1), (0.75, 0.75), (1, 0.5)), (0.75, 0.75)),
+    (((1, 0.5), (0.75, 0.75), (0.5, 0.5), (0.75, 0.25)), (0.5, 0.5)),
+    (((1, 0.5), (0.75, 0.25), (1, 0)), (0.75, 0.25)),
+    (((1, 0), (0.75, 0.25), (0.5, 0)), (0.75, 0.25)),
+]
+
+# South Indian cells by sign (Aries first) as (column, row) of a 4x4 grid
+SOUTH_CELLS: List[Tuple[int, int]] = [
+    (1, 0), (2, 0), (3, 0), (3, 1), (3, 2), (3, 3),
+    (2, 3), (1, 3), (0, 3), (0, 2), (0, 1), (0, 0),
+]
+
+
+def _num(value: float) -> str:
+    return f"{value:.1f}".rstrip("0").rstrip(".")
+
+
+def _line(x1: float, y1: float, x2: float, y2: float) -> str:
+    return f'<line class="kc-l" x1="{_num(x1)}" y1="{_num(y1)}" x2="{_num(x2)}" y2="{_num(y2)}"/>'
+
+
+def _row_prefixes(x: float, y: float) -> List[List[str]]:
+    """Opening <text> tags for the planet rows of a cell, centred on (x, y), for each row count"""
+    prefixes = []
+    max_rows = (len(PLANET_ABBREVIATIONS) + PLANETS_PER_ROW - 1) // PLANETS_PER_ROW
+    for count in range(1, max_rows + 1):
+        top = y - (count - 1) * ROW_HEIGHT / 2
+        prefixes.append([f'<text class="kc-p" x="{_num(x)}" y="{_num(top + row * ROW_HEIGHT + 4)}">'
+                         for row in range(count)])
+    return prefixes
+
+
+def _open_svg(height: float) -> str:
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{SIZE}" height="{_num(height)}" '
+            f'viewBox="0 0 {SIZE} {_num(height)}">{STYLE}')
+
+
+def _build_north() -> Tuple[str, List[str], List[List[List[str]]]]:
+    lines = [
+        _line(1, 1, SIZE - 1, 1), _line(SIZE - 1, 1, SIZE - 1, SIZE - 1),
+        _line(SIZE - 1, SIZE - 1, 1, SIZE - 1), _line(1, SIZE - 1, 1, 1),
+        _line(0, 0, SIZE, SIZE), _line(0, SIZE, SIZE, 0),
+        _line(SIZE / 2, 0, 0, SIZE / 2), _line(0, SIZE / 2, SIZE / 2, SIZE),
+        _line(SIZE / 2, SIZE, SIZE, SIZE / 2), _line(SIZE, SIZE / 2, SIZE / 2, 0),
+    ]
+    sign_tags, planet_rows = [], []
+    for polygon, apex in NORTH_CELLS:
+        cx = sum(x for x, _ in polygon) / len(polygon) * SIZE
+        cy = sum(y for _, y in polygon) / len(polygon) * SIZE
+        # Sign number between the centroid and the inner vertex, planets at the centroid
+        sx = cx + 0.55 * (apex[0] * SIZE - cx)
+        sy = cy + 0.55 * (apex[1] * SIZE - cy)
+        sign_tags.append(f'<text class="kc-s" x="{_num(sx)}" y="{_num(sy + 4)}">')
+        planet_rows.append(_row_prefixes(cx, cy))
+    return "".join(lines), sign_tags, planet_rows
+
+
+def _build_south() -> Tuple[str, List[str], List[List[List[str]]]]:
+    cell = SIZE / 4
+    lines = []
+    for index in range(5):
+        offset = index * cell
+        if index in (0, 4):
+            lines.append(_line(offset, 0, offset, SIZE))
+            lines.append(_line(0, offset, SIZE, offset))
+        else:
+            # Inner lines stop at the empty centre square
+            lines.extend([_line(offset, 0, offset, cell), _line(offset, SIZE - cell, offset, SIZE),
+                          _line(0, offset, cell, offset), _line(SIZE - cell, offset, SIZE, offset)])
+    lines.extend([_line(cell, cell, SIZE - cell, cell), _line(cell, SIZE - cell, SIZE - cell, SIZE - cell),
+                  _line(cell, cell, cell, SIZE - cell), _line(SIZE - cell, cell, SIZE - cell, SIZE - cell)])
+    sign_tags, planet_rows = [], []
+    for column, row in SOUTH_CELLS:
+        sign_tags.append(f'<text class="kc-s" x="{_num((column + 0.5) * cell)}" y="{_num(row * cell + 16)}">')
+        planet_rows.append(_row_prefixes((column + 0.5) * cell, (row + 0.6) * cell))
+    return "".join(lines), sign_tags, planet_rows
+
+
+# Geometry is laid out once at import; rendering only fills in text
+NORTH_TEMPLATE = _build_north()
+SOUTH_TEMPLATE = _build_south()
+# Sign numbers of houses 1-12 for each lagna sign
+NORTH_LABELS = [[str((lagna + house) % 12 + 1) for house in range(12)] for lagna in range(12)]
+
+
+def _abbreviation(name: str) -> str:
+    return PLANET_ABBREVIATIONS.get(name) or html.escape(name[:2])
+
+
+def _cell_planets(planet_positions: Dict[str, Any], lagna_sign: int, by_house: bool) -> List[List[str]]:
+    """Planet abbreviations per cell: by house for North charts, by sign for South charts"""
+    cells: List[List[str]] = [[] for _ in range(12)]
+    for name, position in planet_positions.items():
+        if not isinstance(position, dict) or not ("sign" in position or "house" in position):
+            continue  # e.g. the "career_significations" summary
+        if "sign" in position:
+            sign = int(position["sign"]) % 12
+        else:
+            sign = (lagna_sign + int(position["house"]) - 1) % 12
+        cells[(sign - lagna_sign) % 12 if by_house else sign].append(_abbreviation(name))
+    return cells
+
+
+def _render(template: Tuple[str, List[str], List[List[List[str]]]], labels: Sequence[str],
+            cells: List[List[str]], caption: Optional[str]) -> str:
+    lines, sign_tags, planet_rows = template
+    height = SIZE + (CAPTION_HEIGHT if caption else 0)
+    parts = [_open_svg(height), lines]
+    for index in range(12):
+        parts.extend((sign_tags[index], labels[index], "</text>"))
+        planets = cells[index]
+        if planets:
+            rows = [planets[start:start + PLANETS_PER_ROW] for start in range(0, len(planets), PLANETS_PER_ROW)]
+            for prefix, row in zip(planet_rows[index][len(rows) - 1], rows):
+                parts.extend((prefix, " ".join(row), "</text>"))
+    if caption:
+        parts.append(f'<text class="kc-c" x="{SIZE // 2}" y="{SIZE + 16}">{html.escape(caption)}</text>')
+    parts.append("</svg>")
+    return "".join(parts)
+
+
+def render_north_indian(planet_positions: Dict[str, Any], lagna_sign: int, caption: Optional[str] = None) -> str:
+    """
+    North Indian chart as SVG: fixed houses with the lagna in the top diamond,
+    each labelled with its sign number (1 = Aries)
+    """
+    return _render(NORTH_TEMPLATE, NORTH_LABELS[lagna_sign % 12], _cell_planets(planet_positions, lagna_sign, True), caption)
+
+
+def render_south_indian(planet_positions: Dict[str, Any], lagna_sign: int, caption: Optional[str] = None) -> str:
+    """South Indian chart as SVG: fixed signs with Pisces top left; "As" marks the lagna"""
+    positions = dict(planet_positions)
+    positions.setdefault("Ascendant", {"sign": lagna_sign})
+    return _render(SOUTH_TEMPLATE, SIGN_ABBREVIATIONS, _cell_planets(positions, lagna_sign, False), caption)
+
+
+def render_birth_chart(chart: List[Dict[str, Any]], style: str = "north", caption: Optional[str] = None) -> str:
+    """Render a provider birth chart (list of bodies with longitudes) in the given style"""
+    positions = {body["name"]: {"sign": int(float(body["longitude"]) / 30) % 12} for body in chart}
+    lagna_sign = positions.get("Ascendant", {"sign": 0})["sign"]
+    render = render_south_indian if style == "south" else render_north_indian
+    return render(positions, lagna_sign, caption)
@@ -0,0 +1,196 @@
+import argparse
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from config import SIMILARITY_HOUSE_WEIGHT, SIMILARITY_NEIGHBOURS, SIMILARITY_SIGN_WEIGHT
+from utils.famous_personalities import PLANETS, PersonalityDataset, get_dataset
+
+CHUNK_ROWS = 1 << 16  # Rows scored per pass, so the working set stays in cache
+
+
+class Neighbour(NamedTuple):
+    row: int
+    name: str
+    career: str
+    distance: int
+    similarity: float  # 1 for an identical chart, 0 when every house and sign differs
+
+
+def chart_vector(planet_positions: Dict[str, Any]) -> np.ndarray:
+    """
+    House, sign per planet in PLANETS order, from either {"Sun": {"house", "sign"}}
+    or {"Sun_house", "Sun_sign"} input; missing planets default to house 1, sign 0
+    """
+    vector = np.empty(2 * len(PLANETS), dtype=np.int8)
+    for index, planet in enumerate(PLANETS):
+        position = planet_positions.get(planet)
+        if isinstance(position, dict) and 'house' in position and 'sign' in position:
+            house, sign = position['house'], position['sign']
+        else:
+            house, sign = planet_positions.get(f'{planet}_house', 1), planet_positions.get(f'{planet}_sign', 0)
+        vector[2 * index] = int(house)
+        vector[2 * index + 1] = int(sign)
+    return vector
+
+
+class ChartIndex:
+    """
+    Nearest reference charts by weighted Hamming distance: each planet in a
+    different house adds `house_weight`, each in a different sign adds
+    `sign_weight`.
+
+    Charts are stored column-major (one contiguous int8 row per house or
+    sign column), so a query is 14 vectorized compare-and-add passes over
+    cache-sized chunks. Distances are small integers, so the top k are found
+    by raising a distance threshold until k charts fall under it, then
+    sorting only those. A query over a million charts takes a few
+    milliseconds.
+    """
+
+    def __init__(self, charts: np.ndarray, names: Sequence[str], careers: Sequence[str],
+                 house_weight: int = SIMILARITY_HOUSE_WEIGHT, sign_weight: int = SIMILARITY_SIGN_WEIGHT):
+        charts = np.asarray(charts, dtype=np.int8).reshape(-1, 2 * len(PLANETS))
+        self._columns = np.ascontiguousarray(charts.T)
+        self.names = list(names)
+        self.careers = list(careers)
+        self.max_distance = (house_weight + sign_weight) * len(PLANETS)
+        # Distances are uint8, with 255 left free to mark an excluded row
+        if house_weight < 0 or sign_weight < 0 or not 0 < self.max_distance < 255:
+            raise ValueError("weights must be non-negative and total between 1 and 254 across planets")
+        self.weights = np.array([house_weight, sign_weight] * len(PLANETS), dtype=np.uint8)
+        self._buffers = threading.local()  # Per-thread scratch arrays, so queries can run concurrently
+
+    @classmethod
+    def from_dataset(cls, dataset: PersonalityDataset, **weights) -> "ChartIndex":
+        return cls(dataset.features(), dataset.names, dataset.career_labels(), **weights)
+
+    def __len__(self) -> int:
+        return self._columns.shape[1]
+
+    def distances(self, chart: Sequence[int]) -> np.ndarray:
+        """Distance from `chart` (a 14-value vector) to every reference chart, as uint8"""
+        return self._distances(chart).copy()
+
+    def _distances(self, chart: Sequence[int]) -> np.ndarray:
+        # Written into this thread's scratch buffer, which the next query reuses
+        chart = np.asarray(chart, dtype=np.int8)
+        rows = len(self)
+        buffers = self._buffers
+        if getattr(buffers, "rows", None) != rows:
+            buffers.rows = rows
+            buffers.out = np.empty(rows, dtype=np.uint8)
+            buffers.mismatch = np.empty(min(rows, CHUNK_ROWS), dtype=bool)
+            buffers.weighted = np.empty(min(rows, CHUNK_ROWS), dtype=np.uint8)
+        out = buffers.out
+        for start in range(0, rows, CHUNK_ROWS):
+            end = min(start + CHUNK_ROWS, rows)
+            total = out[start:end]
+            mismatch = buffers.mismatch[:end - start]
+            weighted = buffers.weighted[:end - start]
+            total.fill(0)
+            for column, weight in enumerate(self.weights):
+                if weight == 0:
+                    continue
+                np.not_equal(self._columns[column, start:end], chart[column], out=mismatch)
+                np.multiply(mismatch, weight, out=weighted)
+                total += weighted
+        return out
+
+    def nearest(self, chart: Sequence[int], k: int = 5, exclude: Optional[int] = None) -> List[Neighbour]:
+        """The k closest reference charts, closest first (ties by row order)"""
+        if len(self) == 0 or k <= 0:
+            return []
+        distances = self._distances(chart)
+        if exclude is not None and 0 <= exclude < len(self):
+            distances[exclude] = 255
+            k = min(k, len(self) - 1)
+        k = min(k, len(self))
+        if k <= 0:
+            return []
+        threshold = int(distances.min())
+        while np.count_nonzero(distances <= threshold) < k:
+            threshold += 1
+        candidates = np.flatnonzero(distances <= threshold)
+        rows = candidates[np.lexsort((candidates, distances[candidates]))][:k]
+        return [Neighbour(int(row), self.names[row], self.careers[row], int(distances[row]),
+                          1.0 - int(distances[row]) / self.max_distance)
+                for row in rows]
+
+    def nearest_many(self, charts: np.ndarray, k: int = 5) -> List[List[Neighbour]]:
+        """nearest() for each row of an (n, 14) array, for batch jobs"""
+        return [self.nearest(chart, k) for chart in np.asarray(charts, dtype=np.int8).reshape(-1, 2 * len(PLANETS))]
+
+    def career_scores(self, chart: Sequence[int], k: int = 5, exclude: Optional[int] = None) -> Dict[str, float]:
+        """Careers of the k nearest charts, weighted by similarity and summing to 1"""
+        scores: Dict[str, float] = {}
+        for neighbour in self.nearest(chart, k, exclude):
+            scores[neighbour.career] = scores.get(neighbour.career, 0.0) + neighbour.similarity
+        total = sum(scores.values())
+        return {career: score / total for career, score in scores.items()} if total else {}
+
+
+_default: Optional[ChartIndex] = None
+_default_lock = threading.Lock()
+
+
+def get_chart_index() -> ChartIndex:
+    """Process-wide index over the famous personalities dataset"""
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                _default = ChartIndex.from_dataset(get_dataset())
+    return _default
+
+
+def similar_personalities(planet_positions: Dict[str, Any], k: int = SIMILARITY_NEIGHBOURS,
+                          exclude_name: Optional[str] = None) -> List[Neighbour]:
+    """Famous personalities whose charts are closest to the given planet positions"""
+    exclude = get_dataset().row(exclude_name) if exclude_name else None
+    return get_chart_index().nearest(chart_vector(planet_positions), k, exclude)
+
+
+def main(argv: Optional[List[str]] = None):
+    """Query or benchmark the chart index: python -m utils.chart_similarity --help"""
+    parser = argparse.ArgumentParser(description="Nearest famous charts by weighted house/sign distance")
+    commands = parser.add_subparsers(dest="command", required=True)
+    query_parser = commands.add_parser("query", help="Charts closest to a famous personality's")
+    query_parser.add_argument("name")
+    query_parser.add_argument("-k", type=int, default=5)
+    bench_parser = commands.add_parser("bench", help="Time queries over random reference charts")
+    bench_parser.add_argument("--rows", type=int, default=1_000_000)
+    bench_parser.add_argument("--queries", type=int, default=100)
+    bench_parser.add_argument("-k", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    if args.command == "query":
+        dataset = get_dataset()
+        row = dataset.row(args.name)
+        if row is None:
+            raise SystemExit(f"No personality named {args.name!r}")
+        for neighbour in get_chart_index().nearest(dataset.features()[row], args.k, exclude=row):
+            print(f"{neighbour.similarity:6.1%}  {neighbour.name}  ({neighbour.career})")
+        return
+
+    rng = np.random.default_rng(42)
+    charts = np.empty((args.rows, 2 * len(PLANETS)), dtype=np.int8)
+    charts[:, 0::2] = rng.integers(1, 13, (args.rows, len(PLANETS)))
+    charts[:, 1::2] = rng.integers(0, 12, (args.rows, len(PLANETS)))
+    started = time.perf_counter()
+    index = ChartIndex(charts, [f"chart {row}" for row in range(args.rows)], ["?"] * args.rows)
+    print(f"Indexed {args.rows} charts in {time.perf_counter() - started:.2f}s")
+    timings = []
+    for chart in charts[rng.integers(0, args.rows, args.queries)]:
+        started = time.perf_counter()
+        index.nearest(chart, args.k)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    print(f"top-{args.k} over {args.rows} charts: median {timings[len(timings) // 2] * 1000:.1f}ms, "
+          f"p95 {timings[int(0.95 * len(timings))] * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
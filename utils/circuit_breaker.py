@@ -0,0 +1,151 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Hashable, Tuple
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream that the breaker has cut off"""
+
+
+class CircuitBreaker:
+    """
+    Failure-rate circuit breaker shared by every session in the process.
+
+    While closed, outcomes from the last `window` seconds are tracked; once at
+    least `min_calls` have been seen and the failure rate reaches
+    `failure_rate`, the breaker opens and rejects calls for `cooldown`
+    seconds. It then lets `half_open_probes` calls through: a success closes
+    it again, a failure re-opens it for another cooldown.
+    """
+
+    def __init__(self, name: str, failure_rate: float = 0.5, min_calls: int = 4,
+                 window: float = 60.0, cooldown: float = 30.0, half_open_probes: int = 1):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window = window
+        self.cooldown = cooldown
+        self.half_open_probes = half_open_probes
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._outcomes: Deque[Tuple[float, bool]] = deque()
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._counts = {"opened": 0, "rejected": 0, "successes": 0, "failures": 0}
+
+    def _trim(self, now: float):
+        while self._outcomes and self._outcomes[0][0] < now - self.window:
+            self._outcomes.popleft()
+
+    def _open(self, now: float):
+        self._state = OPEN
+        self._opened_at = now
+        self._probes_in_flight = 0
+        self._outcomes.clear()
+        self._counts["opened"] += 1
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+                return HALF_OPEN
+            return self._state
+
+    def allow_request(self) -> bool:
+        """Whether a call may go upstream now; half-open probes must report back"""
+        with self._lock:
+            now = time.monotonic()
+            if self._state == OPEN and now - self._opened_at >= self.cooldown:
+                self._state = HALF_OPEN
+                self._probes_in_flight = 0
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._probes_in_flight < self.half_open_probes:
+                self._probes_in_flight += 1
+                return True
+            self._counts["rejected"] += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._counts["successes"] += 1
+            if self._state == HALF_OPEN:
+                self._state = CLOSED
+                self._probes_in_flight = 0
+                self._outcomes.clear()
+            elif self._state == CLOSED:
+                now = time.monotonic()
+                self._outcomes.append((now, True))
+                self._trim(now)
+
+    def record_failure(self):
+        with self._lock:
+            self._counts["failures"] += 1
+            now = time.monotonic()
+            if self._state == HALF_OPEN:
+                self._open(now)
+                return
+            if self._state != CLOSED:
+                return
+            self._outcomes.append((now, False))
+            self._trim(now)
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_rate:
+                self._open(now)
+
+    def release(self):
+        """Return a half-open probe slot for a call that never reached upstream"""
+        with self._lock:
+            if self._state == HALF_OPEN and self._probes_in_flight > 0:
+                self._probes_in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        state = self.state
+        with self._lock:
+            self._trim(time.monotonic())
+            calls = len(self._outcomes)
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            return {
+                "name": self.name,
+                "state": state,
+                "window_calls": calls,
+                "window_failure_rate": failures / calls if calls else 0.0,
+                **self._counts,
+            }
+
+
+class NegativeCache:
+    """Remember recently failing keys for a short time so they skip upstream"""
+
+    MAX_KEYS = 4096
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._expiry: "OrderedDict[Hashable, float]" = OrderedDict()
+
+    def add(self, key: Hashable):
+        with self._lock:
+            self._expiry[key] = time.monotonic() + self.ttl
+            self._expiry.move_to_end(key)
+            while len(self._expiry) > self.MAX_KEYS:
+                self._expiry.popitem(last=False)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            expiry = self._expiry.get(key)
+            if expiry is None:
+                return False
+            if expiry <= time.monotonic():
+                del self._expiry[key]
+                return False
+            return True
+
+    def discard(self, key: Hashable):
+        with self._lock:
+            self._expiry.pop(key, None)
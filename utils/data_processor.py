@@ -1,5 +1,3 @@
-import pandas as pd
-
 class DataProcessor:
     @staticmethod
     def create_feature_dict(planet_positions):
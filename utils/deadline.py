@@ -0,0 +1,55 @@
+import time
+from typing import Optional
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a stage has no time budget left"""
+
+
+class Deadline:
+    """
+    Absolute time budget for one page render, passed down to every stage.
+
+    Stages cap their own timeouts with timeout() and give up (falling back to
+    a local path) once the budget is spent, so the total latency of a render
+    is bounded no matter how many calls and retries it makes.
+    """
+
+    MIN_TIMEOUT = 0.05  # Below this a network call cannot succeed anyway
+
+    def __init__(self, seconds: float):
+        self.budget = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() < self.MIN_TIMEOUT
+
+    def timeout(self, default: float) -> float:
+        """Per-call timeout: the stage default shortened to the remaining budget"""
+        remaining = self.remaining()
+        if remaining < self.MIN_TIMEOUT:
+            raise DeadlineExceeded(f"Deadline of {self.budget:.2f}s exceeded")
+        return min(default, remaining)
+
+    def sleep(self, seconds: float) -> bool:
+        """Sleep for up to `seconds`; returns False if the budget ran out first"""
+        remaining = self.remaining()
+        time.sleep(min(seconds, remaining))
+        return seconds < remaining
+
+
+def timeout_for(deadline: Optional[Deadline], default: float) -> float:
+    """Timeout for a call that may or may not run under a deadline"""
+    return deadline.timeout(default) if deadline is not None else default
+
+
+def sleep_within(deadline: Optional[Deadline], seconds: float) -> bool:
+    """Back off for `seconds`, bounded by the deadline when there is one"""
+    if deadline is None:
+        time.sleep(seconds)
+        return True
+    return deadline.sleep(seconds)
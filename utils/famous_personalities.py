@@ -1,178 +1,289 @@
-class FamousPersonalities:
-    @staticmethod
-    def get_personalities():
+import argparse
+import csv
+import json
+import os
+import tempfile
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+import numpy as np
+
+from config import FAMOUS_PERSONALITIES_PATH
+
+PLANETS = ['Sun', 'Moon', 'Mars', 'Mercury', 'Jupiter', 'Venus', 'Saturn']
+# Flat layout used by CSV files: one house and one sign column per planet
+CSV_FIELDS = ['name', 'birth_date', 'actual_career', 'achievements'] + [
+    f'{planet}_{part}' for planet in PLANETS for part in ('house', 'sign')
+]
+
+
+def _name_key(name: str) -> str:
+    return " ".join(name.casefold().split())
+
+
+def parse_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Validate one personality, given either with nested planet_positions
+    (the JSON layout) or with Sun_house/Sun_sign... columns (the CSV layout).
+    Raises ValueError if a field is missing or out of range.
+    """
+    name = str(record.get('name') or '').strip()
+    career = str(record.get('actual_career') or '').strip()
+    if not name or not career:
+        raise ValueError("name and actual_career are required")
+    positions = record.get('planet_positions') or {}
+    houses, signs = [], []
+    for planet in PLANETS:
+        if planet in positions:
+            house, sign = positions[planet].get('house'), positions[planet].get('sign')
+        else:
+            house, sign = record.get(f'{planet}_house'), record.get(f'{planet}_sign')
+        try:
+            house, sign = int(house), int(sign)
+        except (TypeError, ValueError):
+            raise ValueError(f"{name}: {planet} needs a house and a sign")
+        if not 1 <= house <= 12 or not 0 <= sign <= 11:
+            raise ValueError(f"{name}: {planet} house must be 1-12 and sign 0-11")
+        houses.append(house)
+        signs.append(sign)
+    return {
+        'name': name,
+        'birth_date': str(record.get('birth_date') or '').strip(),
+        'actual_career': career,
+        'achievements': str(record.get('achievements') or '').strip(),
+        'houses': houses,
+        'signs': signs,
+    }
+
+
+def read_records(path: Union[str, Path]) -> List[Dict[str, Any]]:
+    """Raw records from a CSV file, a JSON list, or a JSON object keyed by name"""
+    path = Path(path)
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.suffix.lower() == '.csv':
+            return list(csv.DictReader(f))
+        data = json.load(f)
+    if isinstance(data, dict):
+        return [dict(details, name=name) for name, details in data.items()]
+    return list(data)
+
+
+class PersonalityDataset:
+    """
+    Reference charts of famous personalities, stored as columns.
+
+    Row i has houses[i] and signs[i] (one column per planet in PLANETS),
+    career_ids[i] indexing into careers, and names/birth_dates/achievements[i].
+    features() is the house/sign matrix in the model's feature order.
+    Lookups by name and by career are dict hits, so access costs the same
+    for a dozen charts or tens of thousands.
+    """
+
+    def __init__(self, records: Iterable[Dict[str, Any]] = ()):
+        self.names: List[str] = []
+        self.birth_dates: List[str] = []
+        self.achievements: List[str] = []
+        self.careers: List[str] = []
+        self.career_ids = np.zeros(0, dtype=np.int16)
+        self.houses = np.zeros((0, len(PLANETS)), dtype=np.int8)
+        self.signs = np.zeros((0, len(PLANETS)), dtype=np.int8)
+        self._reindex()
+        self.extend(records)
+
+    @classmethod
+    def load(cls, path: Union[str, Path] = FAMOUS_PERSONALITIES_PATH) -> "PersonalityDataset":
+        return cls(read_records(path))
+
+    def extend(self, records: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Bulk import: add new personalities and update those whose name is
+        already present. Malformed records are skipped. Returns counts of
+        added, updated and skipped records.
+        """
+        counts = {'added': 0, 'updated': 0, 'skipped': 0}
+        career_index = {career: index for index, career in enumerate(self.careers)}
+        new_rows: Dict[str, Dict[str, Any]] = {}  # By name key, so duplicates in the batch collapse
+        updates: Dict[int, Dict[str, Any]] = {}
+        for record in records:
+            try:
+                parsed = parse_record(record)
+            except (ValueError, AttributeError) as e:
+                print(f"Skipping personality record: {e}")
+                counts['skipped'] += 1
+                continue
+            career_index.setdefault(parsed['actual_career'], len(career_index))
+            key = _name_key(parsed['name'])
+            if key in self._by_name:
+                updates[self._by_name[key]] = parsed
+                counts['updated'] += 1
+            else:
+                counts['added'] += key not in new_rows
+                counts['updated'] += key in new_rows
+                new_rows[key] = parsed
+
+        self.careers = list(career_index)
+        for row, parsed in updates.items():
+            self.birth_dates[row] = parsed['birth_date']
+            self.achievements[row] = parsed['achievements']
+            self.career_ids[row] = career_index[parsed['actual_career']]
+            self.houses[row] = parsed['houses']
+            self.signs[row] = parsed['signs']
+        if new_rows:
+            added = list(new_rows.values())
+            self.names.extend(parsed['name'] for parsed in added)
+            self.birth_dates.extend(parsed['birth_date'] for parsed in added)
+            self.achievements.extend(parsed['achievements'] for parsed in added)
+            self.career_ids = np.concatenate((self.career_ids, np.array(
+                [career_index[parsed['actual_career']] for parsed in added], dtype=np.int16)))
+            self.houses = np.vstack((self.houses, np.array([parsed['houses'] for parsed in added], dtype=np.int8)))
+            self.signs = np.vstack((self.signs, np.array([parsed['signs'] for parsed in added], dtype=np.int8)))
+        if new_rows or updates:
+            self._reindex()
+        return counts
+
+    def _reindex(self):
+        self._by_name = {_name_key(name): row for row, name in enumerate(self.names)}
+        order = np.argsort(self.career_ids, kind='stable')
+        bounds = np.searchsorted(self.career_ids[order], np.arange(len(self.careers) + 1))
+        self._by_career = {career: order[bounds[index]:bounds[index + 1]]
+                           for index, career in enumerate(self.careers)}
+        features = np.empty((len(self.names), 2 * len(PLANETS)), dtype=np.int8)
+        features[:, 0::2] = self.houses
+        features[:, 1::2] = self.signs
+        self._features = features
+        self._as_dict: Optional[Dict[str, Dict[str, Any]]] = None
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        return _name_key(name) in self._by_name
+
+    def row(self, name: str) -> Optional[int]:
+        """Row of a personality by name (case and spacing insensitive)"""
+        return self._by_name.get(_name_key(name))
+
+    def rows_for_career(self, career: str) -> np.ndarray:
+        return self._by_career.get(career, np.zeros(0, dtype=np.intp))
+
+    def features(self) -> np.ndarray:
+        """(rows, 14) matrix of house, sign per planet, as the model's preprocess_features lays them out"""
+        return self._features
+
+    def career_labels(self) -> List[str]:
+        return [self.careers[career_id] for career_id in self.career_ids]
+
+    def career_counts(self) -> Dict[str, int]:
+        return {career: len(rows) for career, rows in self._by_career.items()}
+
+    def record(self, row: int) -> Dict[str, Any]:
+        """One personality in the nested layout of get_personalities()"""
         return {
-            "Albert Einstein": {
-                "birth_date": "1879-03-14",
-                "actual_career": "Physics/Science",
-                "planet_positions": {
-                    "Sun": {"house": 10, "sign": 11},  # Pisces
-                    "Moon": {"house": 7, "sign": 8},   # Sagittarius
-                    "Mars": {"house": 3, "sign": 4},   # Cancer
-                    "Mercury": {"house": 9, "sign": 10}, # Aquarius
-                    "Jupiter": {"house": 5, "sign": 6},  # Leo
-                    "Venus": {"house": 11, "sign": 0},   # Aries
-                    "Saturn": {"house": 1, "sign": 2}    # Gemini
-                },
-                "achievements": "Nobel Prize in Physics, Theory of Relativity"
-            },
-            "Steve Jobs": {
-                "birth_date": "1955-02-24",
-                "actual_career": "Technology/Entrepreneurship",
-                "planet_positions": {
-                    "Sun": {"house": 5, "sign": 6},     # Leo
-                    "Moon": {"house": 9, "sign": 10},   # Aquarius
-                    "Mars": {"house": 1, "sign": 2},    # Gemini
-                    "Mercury": {"house": 4, "sign": 5},  # Cancer
-                    "Jupiter": {"house": 7, "sign": 8},  # Sagittarius
-                    "Venus": {"house": 3, "sign": 4},    # Cancer
-                    "Saturn": {"house": 11, "sign": 0}   # Aries
-                },
-                "achievements": "Co-founder of Apple Inc., Revolutionized personal computing"
+            'birth_date': self.birth_dates[row],
+            'actual_career': self.careers[self.career_ids[row]],
+            'planet_positions': {
+                planet: {'house': int(self.houses[row, index]), 'sign': int(self.signs[row, index])}
+                for index, planet in enumerate(PLANETS)
             },
-            "Mahatma Gandhi": {
-                "birth_date": "1869-10-02",
-                "actual_career": "Politics/Social Reform",
-                "planet_positions": {
-                    "Sun": {"house": 7, "sign": 8},     # Sagittarius
-                    "Moon": {"house": 3, "sign": 4},    # Cancer
-                    "Mars": {"house": 9, "sign": 10},   # Aquarius
-                    "Mercury": {"house": 6, "sign": 7},  # Libra
-                    "Jupiter": {"house": 1, "sign": 2},  # Gemini
-                    "Venus": {"house": 5, "sign": 6},    # Leo
-                    "Saturn": {"house": 11, "sign": 0}   # Aries
-                },
-                "achievements": "Indian Independence Movement, Non-violent resistance"
-            },
-            "William Shakespeare": {
-                "birth_date": "1564-04-26",
-                "actual_career": "Writing/Literature",
-                "planet_positions": {
-                    "Sun": {"house": 5, "sign": 6},     # Leo
-                    "Moon": {"house": 7, "sign": 8},    # Sagittarius
-                    "Mars": {"house": 3, "sign": 4},    # Cancer
-                    "Mercury": {"house": 5, "sign": 6},  # Leo
-                    "Jupiter": {"house": 9, "sign": 10}, # Aquarius
-                    "Venus": {"house": 5, "sign": 6},    # Leo
-                    "Saturn": {"house": 1, "sign": 2}    # Gemini
-                },
-                "achievements": "Greatest playwright in English literature, Created numerous iconic works"
-            },
-            "Mozart": {
-                "birth_date": "1756-01-27",
-                "actual_career": "Music/Performance",
-                "planet_positions": {
-                    "Sun": {"house": 7, "sign": 8},     # Sagittarius
-                    "Moon": {"house": 5, "sign": 6},    # Leo
-                    "Mars": {"house": 9, "sign": 10},   # Aquarius
-                    "Mercury": {"house": 7, "sign": 8},  # Sagittarius
-                    "Jupiter": {"house": 3, "sign": 4},  # Cancer
-                    "Venus": {"house": 5, "sign": 6},    # Leo
-                    "Saturn": {"house": 11, "sign": 0}      # Aries
-                },
-                "achievements": "Prodigy composer, Created masterpieces of classical music"
-            },
-            "Marie Curie": {
-                "birth_date": "1867-11-07",
-                "actual_career": "Physics/Science",
-                "planet_positions": {
-                    "Sun": {"house": 9, "sign": 10},    # Aquarius
-                    "Moon": {"house": 6, "sign": 7},    # Libra
-                    "Mars": {"house": 1, "sign": 2},    # Gemini
-                    "Mercury": {"house": 9, "sign": 10}, # Aquarius
-                    "Jupiter": {"house": 5, "sign": 6},  # Leo
-                    "Venus": {"house": 8, "sign": 9},    # Capricorn
-                    "Saturn": {"house": 3, "sign": 4}    # Cancer
-                },
-                "achievements": "Nobel Prize in Physics and Chemistry, Discovered radioactivity"
-            },
-            "Leonardo da Vinci": {
-                "birth_date": "1452-04-15",
-                "actual_career": "Arts/Creative",
-                "planet_positions": {
-                    "Sun": {"house": 5, "sign": 6},     # Leo
-                    "Moon": {"house": 9, "sign": 10},   # Aquarius
-                    "Mars": {"house": 3, "sign": 4},    # Cancer
-                    "Mercury": {"house": 5, "sign": 6},  # Leo
-                    "Jupiter": {"house": 7, "sign": 8},  # Sagittarius
-                    "Venus": {"house": 5, "sign": 6},    # Leo
-                    "Saturn": {"house": 1, "sign": 2}    # Gemini
-                },
-                "achievements": "Renaissance polymath, Master painter, inventor, and scientist"
-            },
-            "Nelson Mandela": {
-                "birth_date": "1918-07-18",
-                "actual_career": "Politics/Social Reform",
-                "planet_positions": {
-                    "Sun": {"house": 10, "sign": 11},   # Pisces
-                    "Moon": {"house": 4, "sign": 5},    # Cancer
-                    "Mars": {"house": 1, "sign": 2},    # Gemini
-                    "Mercury": {"house": 10, "sign": 11}, # Pisces
-                    "Jupiter": {"house": 7, "sign": 8},  # Sagittarius
-                    "Venus": {"house": 9, "sign": 10},   # Aquarius
-                    "Saturn": {"house": 3, "sign": 4}    # Cancer
-                },
-                "achievements": "First black president of South Africa, Anti-apartheid revolutionary"
-            },
-            "Bill Gates": {
-                "birth_date": "1955-10-28",
-                "actual_career": "Technology/Entrepreneurship",
-                "planet_positions": {
-                    "Sun": {"house": 6, "sign": 7},     # Libra
-                    "Moon": {"house": 10, "sign": 11},  # Pisces
-                    "Mars": {"house": 2, "sign": 3},    # Gemini
-                    "Mercury": {"house": 6, "sign": 7},  # Libra
-                    "Jupiter": {"house": 8, "sign": 9},  # Capricorn
-                    "Venus": {"house": 5, "sign": 6},    # Leo
-                    "Saturn": {"house": 1, "sign": 2}    # Gemini
-                },
-                "achievements": "Co-founder of Microsoft, Philanthropist, Technology innovator"
-            },
-            "Florence Nightingale": {
-                "birth_date": "1820-05-12",
-                "actual_career": "Medical",
-                "planet_positions": {
-                    "Sun": {"house": 6, "sign": 7},     # Libra
-                    "Moon": {"house": 4, "sign": 5},    # Cancer
-                    "Mars": {"house": 8, "sign": 9},    # Capricorn
-                    "Mercury": {"house": 6, "sign": 7},  # Libra
-                    "Jupiter": {"house": 10, "sign": 11}, # Pisces
-                    "Venus": {"house": 7, "sign": 8},    # Sagittarius
-                    "Saturn": {"house": 2, "sign": 3}    # Gemini
-                },
-                "achievements": "Founder of modern nursing, Healthcare reformer"
-            },
-            "Charles Darwin": {
-                "birth_date": "1809-02-12",
-                "actual_career": "Physics/Science",
-                "planet_positions": {
-                    "Sun": {"house": 9, "sign": 10},    # Aquarius
-                    "Moon": {"house": 5, "sign": 6},    # Leo
-                    "Mars": {"house": 3, "sign": 4},    # Cancer
-                    "Mercury": {"house": 9, "sign": 10}, # Aquarius
-                    "Jupiter": {"house": 7, "sign": 8},  # Sagittarius
-                    "Venus": {"house": 8, "sign": 9},    # Capricorn
-                    "Saturn": {"house": 1, "sign": 2}    # Gemini
-                },
-                "achievements": "Theory of Evolution, Natural Selection, Revolutionary biologist"
-            },
-            "Martin Luther King Jr.": {
-                "birth_date": "1929-01-15",
-                "actual_career": "Politics/Social Reform",
-                "planet_positions": {
-                    "Sun": {"house": 7, "sign": 8},     # Sagittarius
-                    "Moon": {"house": 3, "sign": 4},    # Cancer
-                    "Mars": {"house": 9, "sign": 10},   # Aquarius
-                    "Mercury": {"house": 7, "sign": 8},  # Sagittarius
-                    "Jupiter": {"house": 1, "sign": 2},  # Gemini
-                    "Venus": {"house": 5, "sign": 6},    # Leo
-                    "Saturn": {"house": 11, "sign": 0}   # Aries
-                },
-                "achievements": "Civil Rights Movement leader, Nobel Peace Prize winner"
-            }
+            'achievements': self.achievements[row],
         }
 
+    def as_dict(self) -> Dict[str, Dict[str, Any]]:
+        """Name -> record(); built once and shared, so treat it as read-only"""
+        if self._as_dict is None:
+            self._as_dict = {name: self.record(row) for row, name in enumerate(self.names)}
+        return self._as_dict
+
+    def save(self, path: Union[str, Path] = FAMOUS_PERSONALITIES_PATH):
+        """Write the dataset atomically, as CSV or as JSON with one record per line"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=str(path.parent), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', newline='', encoding='utf-8') as f:
+                if path.suffix.lower() == '.csv':
+                    writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+                    writer.writeheader()
+                    for row, name in enumerate(self.names):
+                        record = self.record(row)
+                        flat = {'name': name, 'birth_date': record['birth_date'],
+                                'actual_career': record['actual_career'], 'achievements': record['achievements']}
+                        for planet, position in record['planet_positions'].items():
+                            flat[f'{planet}_house'] = position['house']
+                            flat[f'{planet}_sign'] = position['sign']
+                        writer.writerow(flat)
+                else:
+                    lines = [json.dumps(dict(name=name, **self.record(row)), ensure_ascii=False)
+                             for row, name in enumerate(self.names)]
+                    f.write('[\n  ' + ',\n  '.join(lines) + '\n]\n')
+            os.chmod(temp_path, 0o644)  # mkstemp files are owner-only
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+
+_default: Optional[PersonalityDataset] = None
+_default_lock = threading.Lock()
+
+
+def get_dataset() -> PersonalityDataset:
+    """Process-wide dataset, loaded from FAMOUS_PERSONALITIES_PATH on first use"""
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                _default = PersonalityDataset.load()
+    return _default
+
+
+class FamousPersonalities:
+    @staticmethod
+    def get_personalities():
+        return get_dataset().as_dict()
+
     @staticmethod
     def get_personality_details(name):
-        personalities = FamousPersonalities.get_personalities()
-        return personalities.get(name) 
\ No newline at end of file
+        dataset = get_dataset()
+        row = dataset.row(name)
+        return dataset.record(row) if row is not None else None
+
+
+def main(argv: Optional[List[str]] = None):
+    """Manage the famous personalities dataset: python -m utils.famous_personalities --help"""
+    parser = argparse.ArgumentParser(description="Inspect, import into and export the famous personalities dataset")
+    parser.add_argument("--data", default=FAMOUS_PERSONALITIES_PATH, help="Path to the dataset file")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("stats", help="Show the number of personalities per career")
+
+    import_parser = commands.add_parser("import", help="Add or update personalities from CSV or JSON files")
+    import_parser.add_argument("files", nargs="+")
+    import_parser.add_argument("--replace", action="store_true", help="Replace the dataset instead of merging")
+
+    export_parser = commands.add_parser("export", help="Write the dataset as CSV or JSON (by extension)")
+    export_parser.add_argument("file")
+
+    args = parser.parse_args(argv)
+    dataset = PersonalityDataset() if args.command == "import" and args.replace else PersonalityDataset.load(args.data)
+
+    if args.command == "stats":
+        print(f"{len(dataset)} personalities, {len(dataset.careers)} careers")
+        for career, count in Counter(dataset.career_counts()).most_common():
+            print(f"{count:>8}  {career}")
+    elif args.command == "import":
+        for path in args.files:
+            counts = dataset.extend(read_records(path))
+            print(f"{path}: {counts['added']} added, {counts['updated']} updated, {counts['skipped']} skipped")
+        dataset.save(args.data)
+        print(f"Wrote {len(dataset)} personalities to {args.data}")
+    else:
+        dataset.save(args.file)
+        print(f"Wrote {len(dataset)} personalities to {args.file}")
+
+
+if __name__ == "__main__":
+    main()
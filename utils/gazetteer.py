@@ -0,0 +1,188 @@
+import bisect
+import csv
+import re
+import threading
+import unicodedata
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+from config import GAZETTEER_PATH
+
+
+class Place(NamedTuple):
+    country: str
+    state: str
+    district: str
+    latitude: float
+    longitude: float
+
+    @property
+    def level(self) -> str:
+        """Most specific part of the name: "district", "state" or "country" """
+        if self.district:
+            return "district"
+        return "state" if self.state else "country"
+
+
+# Former and common names -> the name used in the places file (both normalized)
+ALIASES = {
+    "usa": "united states",
+    "us": "united states",
+    "united states of america": "united states",
+    "uk": "united kingdom",
+    "great britain": "united kingdom",
+    "uae": "united arab emirates",
+    "orissa": "odisha",
+    "pondicherry": "puducherry",
+    "nct of delhi": "delhi",
+    "bombay": "mumbai city",
+    "mumbai": "mumbai city",
+    "madras": "chennai",
+    "calcutta": "kolkata",
+    "bangalore": "bengaluru urban",
+    "bengaluru": "bengaluru urban",
+    "mysore": "mysuru",
+    "mangalore": "dakshina kannada",
+    "mangaluru": "dakshina kannada",
+    "hubli": "dharwad",
+    "belgaum": "belagavi",
+    "gulbarga": "kalaburagi",
+    "shimoga": "shivamogga",
+    "trivandrum": "thiruvananthapuram",
+    "cochin": "ernakulam",
+    "kochi": "ernakulam",
+    "calicut": "kozhikode",
+    "poona": "pune",
+    "baroda": "vadodara",
+    "gurgaon": "gurugram",
+    "noida": "gautam buddha nagar",
+    "mohali": "sahibzada ajit singh nagar",
+    "allahabad": "prayagraj",
+    "faizabad": "ayodhya",
+    "kanpur": "kanpur nagar",
+    "jamshedpur": "east singhbhum",
+    "trichy": "tiruchirappalli",
+    "tanjore": "thanjavur",
+}
+
+
+def normalize(name: str) -> str:
+    """
+    Lookup form of a place name: no accents or punctuation, lower case,
+    single spaces, and common aliases mapped to the places file's name
+    """
+    name = unicodedata.normalize("NFKD", name or "")
+    name = "".join(ch for ch in name if not unicodedata.combining(ch))
+    name = re.sub(r"[^\w\s]", " ", name.casefold())
+    name = " ".join(name.split())
+    return ALIASES.get(name, name)
+
+
+def place_label(place: Place) -> str:
+    """Display form of a place: "District, State, Country" without the empty parts"""
+    return ", ".join(part for part in (place.district, place.state, place.country) if part)
+
+
+def split_place_label(label: str) -> Tuple[str, str, str]:
+    """(country, state, district) from a "District, State, Country" label; extra leading parts are dropped"""
+    parts = [part.strip() for part in (label or "").split(",") if part.strip()]
+    parts = [""] * (3 - len(parts)) + parts[-3:]
+    district, state, country = parts
+    return country, state, district
+
+
+class Gazetteer:
+    """
+    Offline place index loaded once from a CSV of
+    country,state,district,latitude,longitude rows.
+
+    Rows with an empty district (or state) give the coordinates used for a
+    whole state (or country). Exact lookups are dict hits; autocomplete
+    bisects a sorted list of normalized names per parent, so both take
+    microseconds and never touch the network.
+    """
+
+    def __init__(self, path: Union[str, Path] = GAZETTEER_PATH):
+        self.path = Path(path)
+        self._places: Dict[Tuple[str, str, str], Place] = {}
+        # Parent key -> sorted (normalized name, display name) of its children
+        self._children: Dict[Tuple[str, ...], List[Tuple[str, str]]] = {}
+        self._load()
+
+    def _load(self):
+        children: Dict[Tuple[str, ...], Dict[str, str]] = {}
+        with open(self.path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                try:
+                    place = Place(
+                        (row.get("country") or "").strip(),
+                        (row.get("state") or "").strip(),
+                        (row.get("district") or "").strip(),
+                        float(row["latitude"]),
+                        float(row["longitude"]),
+                    )
+                except (KeyError, TypeError, ValueError):
+                    continue  # Skip malformed rows rather than failing the page
+                country, state, district = normalize(place.country), normalize(place.state), normalize(place.district)
+                self._places[(country, state, district)] = place
+                children.setdefault((), {})[country] = place.country
+                if state:
+                    children.setdefault((country,), {})[state] = place.state
+                if district:
+                    children.setdefault((country, state), {})[district] = place.district
+        self._children = {parent: sorted(names.items()) for parent, names in children.items()}
+
+    def __len__(self) -> int:
+        return len(self._places)
+
+    def lookup(self, country: str, state: str = "", district: str = "") -> Optional[Place]:
+        """Exact match on the normalized names; empty parts match the enclosing region"""
+        return self._places.get((normalize(country), normalize(state), normalize(district)))
+
+    def complete(self, prefix: str = "", country: Optional[str] = None, state: Optional[str] = None,
+                 limit: int = 20) -> List[str]:
+        """
+        Display names starting with `prefix`: countries, the states of `country`,
+        or the districts of `country`/`state`, in alphabetical order.
+        """
+        parent: Tuple[str, ...] = ()
+        if country is not None:
+            parent = (normalize(country),)
+            if state is not None:
+                parent += (normalize(state),)
+        names = self._children.get(parent, [])
+        prefix = normalize(prefix)
+        start = bisect.bisect_left(names, (prefix,))
+        matches = []
+        for normalized, display in names[start:]:
+            if not normalized.startswith(prefix) or len(matches) >= limit:
+                break
+            matches.append(display)
+        return matches
+
+    def labels(self) -> List[str]:
+        """place_label() of every place, countries and states included, sorted"""
+        return sorted((place_label(place) for place in self._places.values()), key=normalize)
+
+    def countries(self) -> List[str]:
+        return [display for _, display in self._children.get((), [])]
+
+    def states(self, country: str) -> List[str]:
+        return [display for _, display in self._children.get((normalize(country),), [])]
+
+    def districts(self, country: str, state: str) -> List[str]:
+        return [display for _, display in self._children.get((normalize(country), normalize(state)), [])]
+
+
+_default: Optional[Gazetteer] = None
+_default_lock = threading.Lock()
+
+
+def get_gazetteer() -> Gazetteer:
+    """Process-wide gazetteer, loaded on first use"""
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                _default = Gazetteer()
+    return _default
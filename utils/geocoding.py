@@ -0,0 +1,237 @@
+import argparse
+import csv
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from config import (GEOCODER_TIMEOUT, GEOCODER_RATE_LIMIT, GEOCODE_NEGATIVE_TTL, GEOCODER_USER_AGENT)
+from utils.cache_store import CacheStore, get_cache_store
+from utils.gazetteer import Gazetteer, get_gazetteer, normalize
+from utils.rate_limiter import PRIORITY_BATCH, PRIORITY_INTERACTIVE, QueueTimeoutError, RequestScheduler
+from utils.single_flight import SingleFlight
+
+
+class GeocodeResult(NamedTuple):
+    latitude: float
+    longitude: float
+    source: str  # "gazetteer", "cache" or "online"
+
+
+def location_key(country: str, state: str = "", district: str = "") -> str:
+    """Cache key for a location: its normalized parts, most specific last"""
+    return "geocode:" + "|".join(normalize(part) for part in (country, state, district))
+
+
+class Geocoder:
+    """
+    Birth place resolution shared by the app and batch jobs.
+
+    Places are looked up in the offline gazetteer first, then in the
+    persistent cache (keyed by normalized names, so "  Bombay" and "mumbai"
+    share an entry), and only then sent to Nominatim. Online answers are kept
+    indefinitely; places Nominatim doesn't know are remembered for
+    `negative_ttl` seconds so they are not asked about on every rerun.
+    Online calls go through a scheduler that keeps to Nominatim's rate limit.
+    """
+
+    MISSING = {"missing": True}
+
+    def __init__(self, store: Optional[CacheStore] = None, gazetteer: Optional[Gazetteer] = None,
+                 negative_ttl: float = GEOCODE_NEGATIVE_TTL, rate_limit: float = GEOCODER_RATE_LIMIT,
+                 backend: Optional[Callable[[str, float], Optional[Tuple[float, float]]]] = None):
+        self.store = store if store is not None else get_cache_store()
+        self._gazetteer = gazetteer
+        self.negative_ttl = negative_ttl
+        self.scheduler = RequestScheduler(rate_limit, 1)
+        self.flights = SingleFlight("geocode")
+        self._backend = backend
+        self._nominatim = None
+        self._lock = threading.Lock()
+        self._counts = {"gazetteer": 0, "cache": 0, "negative": 0, "online": 0, "not_found": 0}
+
+    @property
+    def gazetteer(self) -> Gazetteer:
+        return self._gazetteer if self._gazetteer is not None else get_gazetteer()
+
+    def _count(self, name: str):
+        with self._lock:
+            self._counts[name] += 1
+
+    def _nominatim_geocode(self, query: str, timeout: float) -> Optional[Tuple[float, float]]:
+        if self._nominatim is None:
+            from geopy.geocoders import Nominatim  # Only needed for places the gazetteer lacks
+            self._nominatim = Nominatim(user_agent=GEOCODER_USER_AGENT)
+        location = self._nominatim.geocode(query, timeout=timeout)
+        if location:
+            return location.latitude, location.longitude
+        return None
+
+    def _online(self, key: str, query: str, timeout: float, priority: int) -> Optional[Tuple[float, float]]:
+        """Rate limited online lookup whose answer (or absence) is cached"""
+        if not self.scheduler.acquire(priority, timeout=timeout):
+            raise QueueTimeoutError("Geocoder rate limit queue wait exceeded")
+        backend = self._backend or self._nominatim_geocode
+        coordinates = backend(query, timeout)
+        try:
+            if coordinates:
+                self.store.set(key, {"lat": coordinates[0], "lon": coordinates[1]})
+            else:
+                self.store.set(key, self.MISSING, ttl=self.negative_ttl)
+        except Exception as e:
+            print(f"Error caching geocode result: {e}")
+        return coordinates
+
+    def geocode(self, country: str, state: str = "", district: str = "",
+                timeout: float = GEOCODER_TIMEOUT, priority: int = PRIORITY_INTERACTIVE) -> Optional[GeocodeResult]:
+        """
+        Coordinates for a place, or None if it is unknown (now or recently).
+        Raises geopy errors, QueueTimeoutError or TimeoutError if the online
+        lookup could not complete in `timeout` seconds.
+        """
+        place = self.gazetteer.lookup(country, state, district)
+        if place:
+            self._count("gazetteer")
+            return GeocodeResult(place.latitude, place.longitude, "gazetteer")
+
+        key = location_key(country, state, district)
+        try:
+            cached = self.store.get(key)
+        except Exception as e:
+            print(f"Error reading geocode cache: {e}")
+            cached = None
+        if cached is not None:
+            if cached.get("missing"):
+                self._count("negative")
+                return None
+            self._count("cache")
+            return GeocodeResult(cached["lat"], cached["lon"], "cache")
+
+        query = ", ".join(part.strip() for part in (district, state, country) if part and part.strip())
+        coordinates = self.flights.do(key, self._online, key, query, timeout, priority, wait_timeout=timeout)
+        if not coordinates:
+            self._count("not_found")
+            return None
+        self._count("online")
+        return GeocodeResult(coordinates[0], coordinates[1], "online")
+
+    def geocode_many(self, locations: Iterable[Tuple[str, str, str]], concurrency: int = 2,
+                     timeout: float = 10.0,
+                     on_result: Optional[Callable[[Tuple[str, str, str], Optional[GeocodeResult], Optional[Exception]], None]] = None
+                     ) -> Dict[str, Optional[GeocodeResult]]:
+        """
+        Geocode many locations at batch priority, each distinct normalized
+        location once, at most `concurrency` at a time. Results are keyed by
+        location_key(); failures are reported to `on_result` and left out.
+        """
+        from geopy.exc import GeocoderServiceError, GeocoderTimedOut
+        
+        unique: Dict[str, Tuple[str, str, str]] = {}
+        for location in locations:
+            unique.setdefault(location_key(*location), location)
+
+        results: Dict[str, Optional[GeocodeResult]] = {}
+        with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="geocode-batch") as pool:
+            futures = {
+                pool.submit(self.geocode, *location, timeout=timeout, priority=PRIORITY_BATCH): (key, location)
+                for key, location in unique.items()
+            }
+            for future in as_completed(futures):
+                key, location = futures[future]
+                try:
+                    result = future.result()
+                except (GeocoderServiceError, GeocoderTimedOut, QueueTimeoutError, TimeoutError) as e:
+                    if on_result:
+                        on_result(location, None, e)
+                    continue
+                results[key] = result
+                if on_result:
+                    on_result(location, result, None)
+        return results
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+
+_default: Optional[Geocoder] = None
+_default_lock = threading.Lock()
+
+
+def get_geocoder(store: Optional[CacheStore] = None) -> Geocoder:
+    """Process-wide geocoder, over `store` on first use or else the shared cache store"""
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                _default = Geocoder(store)
+    return _default
+
+
+OUTPUT_FIELDS = ["country", "state", "district", "latitude", "longitude", "source"]
+
+
+def _read_locations(path: str, columns: List[str]) -> List[Tuple[str, str, str]]:
+    with open(path, newline="", encoding="utf-8") as f:
+        return [tuple((row.get(column) or "").strip() for column in columns) for row in csv.DictReader(f)]
+
+
+def _done_keys(path: str) -> set:
+    """Locations already written to the output file by an earlier run"""
+    if not os.path.exists(path):
+        return set()
+    with open(path, newline="", encoding="utf-8") as f:
+        return {location_key(row["country"], row["state"], row["district"]) for row in csv.DictReader(f)}
+
+
+def main(argv: Optional[List[str]] = None):
+    """Geocode the birth places in a CSV file: python -m utils.geocoding --help"""
+    parser = argparse.ArgumentParser(description="Batch geocode birth places with the shared geocode cache")
+    parser.add_argument("input", help="CSV file with country/state/district columns")
+    parser.add_argument("output", help="CSV file to append results to; rows already there are skipped")
+    parser.add_argument("--columns", default="country,state,district",
+                        help="Input column names for country, state and district")
+    parser.add_argument("--concurrency", type=int, default=2, help="Lookups in flight at once")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Seconds per online lookup")
+    args = parser.parse_args(argv)
+
+    columns = [column.strip() for column in args.columns.split(",")]
+    if len(columns) != 3:
+        parser.error("--columns needs exactly three names")
+
+    locations = _read_locations(args.input, columns)
+    done = _done_keys(args.output)
+    pending = [location for location in locations if location_key(*location) not in done]
+    print(f"{len(locations)} rows, {len(done)} locations already done, "
+          f"{len({location_key(*location) for location in pending})} to geocode")
+
+    write_header = not os.path.exists(args.output) or os.path.getsize(args.output) == 0
+    with open(args.output, "a", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=OUTPUT_FIELDS)
+        if write_header:
+            writer.writeheader()
+        write_lock = threading.Lock()
+        failures = [0]
+
+        def on_result(location, result, error):
+            if error is not None:
+                failures[0] += 1
+                print(f"Failed {', '.join(location)}: {error}", file=sys.stderr)
+                return  # Not written, so the next run retries it
+            with write_lock:
+                writer.writerow({
+                    "country": location[0], "state": location[1], "district": location[2],
+                    "latitude": result.latitude if result else "",
+                    "longitude": result.longitude if result else "",
+                    "source": result.source if result else "not_found",
+                })
+                f.flush()
+
+        geocoder = get_geocoder()
+        geocoder.geocode_many(pending, concurrency=args.concurrency, timeout=args.timeout, on_result=on_result)
+    print(f"Done: {geocoder.stats()}, {failures[0]} failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import atexit
+import datetime
+import hashlib
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from utils.cache_store import CacheStore
+
+
+class KeyPoolExhausted(Exception):
+    """Raised when every API key is cooling down or out of quota"""
+
+
+def fingerprint(key: str) -> str:
+    """Short stable id for a key, safe to log and store"""
+    return hashlib.sha256(key.encode()).hexdigest()[:12]
+
+
+class ApiKeyPool:
+    """
+    Pool of API keys shared by every session in the process.
+
+    Each request takes the key with the most daily quota left, so load spreads
+    evenly and a deployment scales by adding keys. A key answered with 429 is
+    out of rotation until its cooldown (or Retry-After) passes. Usage per key
+    and UTC day is counted in the persistent store under "quota:" keys. Every
+    `flush_interval` seconds this process adds its new requests to those
+    counters and reads back the totals, so server processes sharing the store
+    see each other's usage and a restart picks up today's counts.
+    """
+
+    KEY_PREFIX = "quota:"
+    RETENTION = 8 * 24 * 60 * 60  # Keep a week of daily counters for reporting
+
+    def __init__(self, keys: List[str], daily_quota: int, cooldown: float,
+                 store: Optional[CacheStore] = None, flush_interval: float = 5.0):
+        # De-duplicate but keep the configured order for ties
+        self.keys = list(dict.fromkeys(key for key in keys if key))
+        self.daily_quota = daily_quota
+        self.cooldown = cooldown
+        self.store = store
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._day = self._today()
+        self._usage = {key: self._load(key, self._day) for key in self.keys}
+        self._pending = {key: self._zero() for key in self.keys}  # Counted here but not yet added to the store
+        self._cooling_until = {key: 0.0 for key in self.keys}
+        self._flushed_at = time.monotonic()
+        if store is not None:
+            atexit.register(self.flush)
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%d")
+
+    @staticmethod
+    def _zero() -> Dict[str, int]:
+        return {"requests": 0, "rate_limited": 0}
+
+    def _store_key(self, key: str, day: str) -> str:
+        return f"{self.KEY_PREFIX}{fingerprint(key)}:{day}"
+
+    def _load(self, key: str, day: str) -> Dict[str, int]:
+        usage = self._zero()
+        if self.store is not None:
+            try:
+                usage.update(self.store.get_counters(self._store_key(key, day)))
+            except Exception as e:
+                print(f"Error reading key usage: {e}")
+        return usage
+
+    def _roll_day(self):
+        """Start fresh counters at UTC midnight (caller holds the lock)"""
+        today = self._today()
+        if today != self._day:
+            self._flush_locked()
+            self._day = today
+            self._usage = {key: self._load(key, today) for key in self.keys}
+
+    def _flush_locked(self):
+        """Add this process's new counts to the store and pick up every process's totals"""
+        if self.store is not None:
+            for key in self.keys:
+                pending = self._pending[key]
+                try:
+                    if any(pending.values()):
+                        totals = self.store.increment(self._store_key(key, self._day), pending, ttl=self.RETENTION)
+                        self._pending[key] = self._zero()
+                        self._usage[key] = {**self._zero(), **totals}
+                    else:
+                        self._usage[key] = {**self._zero(),
+                                            **self.store.get_counters(self._store_key(key, self._day))}
+                except Exception as e:
+                    print(f"Error writing key usage: {e}")
+        else:
+            self._pending = {key: self._zero() for key in self.keys}
+        self._flushed_at = time.monotonic()
+
+    def _remaining(self, key: str) -> int:
+        return max(0, self.daily_quota - self._usage[key]["requests"])
+
+    def acquire(self) -> str:
+        """Key with the most quota left that is not cooling down"""
+        with self._lock:
+            self._roll_day()
+            now = time.monotonic()
+            candidates = [key for key in self.keys
+                          if self._cooling_until[key] <= now and self._remaining(key) > 0]
+            if not candidates:
+                raise KeyPoolExhausted("No astrology API key available")
+            key = max(candidates, key=self._remaining)
+            self._usage[key]["requests"] += 1
+            self._pending[key]["requests"] += 1
+            if now - self._flushed_at >= self.flush_interval:
+                self._flush_locked()
+            return key
+
+    def rate_limited(self, key: str, retry_after: Optional[float] = None):
+        """Take a key out of rotation after a 429"""
+        with self._lock:
+            if key not in self._usage:
+                return
+            delay = retry_after if retry_after is not None else self.cooldown
+            self._cooling_until[key] = max(self._cooling_until[key], time.monotonic() + delay)
+            self._usage[key]["rate_limited"] += 1
+            self._pending[key]["rate_limited"] += 1
+
+    def available(self) -> int:
+        """Number of keys that could serve a request right now"""
+        with self._lock:
+            self._roll_day()
+            now = time.monotonic()
+            return sum(1 for key in self.keys if self._cooling_until[key] <= now and self._remaining(key) > 0)
+
+    def next_available_in(self) -> float:
+        """Seconds until some key comes out of cooldown (inf if all are out of quota)"""
+        with self._lock:
+            now = time.monotonic()
+            waits = [max(0.0, self._cooling_until[key] - now) for key in self.keys if self._remaining(key) > 0]
+            return min(waits) if waits else float("inf")
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def stats(self) -> Dict[str, Any]:
+        """Today's usage per key fingerprint"""
+        with self._lock:
+            self._roll_day()
+            now = time.monotonic()
+            return {
+                "day": self._day,
+                "daily_quota": self.daily_quota,
+                "keys": {
+                    fingerprint(key): {
+                        **self._usage[key],
+                        "remaining": self._remaining(key),
+                        "cooling_for": round(max(0.0, self._cooling_until[key] - now), 3),
+                    }
+                    for key in self.keys
+                },
+            }
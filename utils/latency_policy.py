@@ -0,0 +1,100 @@
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+
+class LatencyPolicy:
+    """
+    Timeout and retry policy learned from recently observed upstream calls.
+
+    A rolling window of (latency, ok) samples is kept per endpoint. Once
+    `min_samples` calls have been seen, the timeout becomes p99 latency times
+    `timeout_multiplier` (clamped to [min_timeout, max_timeout]) and the retry
+    count shrinks as the recent error rate grows: retrying helps against the
+    odd transient failure but only multiplies the wait during an outage.
+    Until then the configured defaults apply.
+    """
+
+    def __init__(self, default_timeout: float, default_retries: int, retry_delay: float,
+                 window: int = 200, min_samples: int = 20, timeout_multiplier: float = 1.5,
+                 min_timeout: float = 0.5, max_timeout: Optional[float] = None):
+        self.default_timeout = default_timeout
+        self.default_retries = default_retries
+        self.default_retry_delay = retry_delay
+        self.window = window
+        self.min_samples = min_samples
+        self.timeout_multiplier = timeout_multiplier
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout if max_timeout is not None else default_timeout
+        self._lock = threading.Lock()
+        self._samples: Dict[str, Deque[Tuple[float, bool]]] = {}
+
+    def record(self, endpoint: str, latency: float, ok: bool):
+        """Record one upstream call; timed-out calls are recorded with their elapsed time"""
+        with self._lock:
+            samples = self._samples.get(endpoint)
+            if samples is None:
+                samples = self._samples[endpoint] = deque(maxlen=self.window)
+            samples.append((latency, ok))
+
+    @staticmethod
+    def _percentile(sorted_values, q: float) -> float:
+        index = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+        return sorted_values[index]
+
+    def _snapshot(self, endpoint: str):
+        with self._lock:
+            samples = list(self._samples.get(endpoint, ()))
+        latencies = sorted(latency for latency, _ in samples)
+        errors = sum(1 for _, ok in samples if not ok)
+        return latencies, (errors / len(samples) if samples else 0.0)
+
+    def policy(self, endpoint: str) -> Dict[str, Any]:
+        """Current timeout, retry count and backoff for an endpoint, with the stats behind them"""
+        latencies, error_rate = self._snapshot(endpoint)
+        result = {
+            "endpoint": endpoint,
+            "samples": len(latencies),
+            "error_rate": round(error_rate, 3),
+            "timeout": self.default_timeout,
+            "retries": self.default_retries,
+            "retry_delay": self.default_retry_delay,
+            "adaptive": len(latencies) >= self.min_samples,
+        }
+        if latencies:
+            result.update({
+                "p50": round(self._percentile(latencies, 0.50), 3),
+                "p90": round(self._percentile(latencies, 0.90), 3),
+                "p99": round(self._percentile(latencies, 0.99), 3),
+            })
+        if not result["adaptive"]:
+            return result
+
+        timeout = result["p99"] * self.timeout_multiplier
+        result["timeout"] = round(min(self.max_timeout, max(self.min_timeout, timeout)), 3)
+
+        if error_rate >= 0.5:
+            retries = 1
+        elif error_rate >= 0.2:
+            retries = max(1, self.default_retries - 1)
+        else:
+            retries = self.default_retries
+        result["retries"] = retries
+        # Back off on the order of a normal response instead of a fixed delay
+        result["retry_delay"] = round(min(self.default_retry_delay, max(0.1, result["p50"] * 2)), 3)
+        return result
+
+    def timeout(self, endpoint: str) -> float:
+        return self.policy(endpoint)["timeout"]
+
+    def retries(self, endpoint: str) -> int:
+        return self.policy(endpoint)["retries"]
+
+    def retry_delay(self, endpoint: str) -> float:
+        return self.policy(endpoint)["retry_delay"]
+
+    def policies(self) -> Dict[str, Dict[str, Any]]:
+        """Policy for every endpoint seen so far"""
+        with self._lock:
+            endpoints = list(self._samples)
+        return {endpoint: self.policy(endpoint) for endpoint in endpoints}
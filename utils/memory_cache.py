@@ -0,0 +1,146 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from config import MEMORY_CACHE_MAX_BYTES, MEMORY_CACHE_TTL
+from utils.cache_store import CacheEntry, CacheStore
+
+
+class MemoryCache:
+    """
+    Byte-bounded in-process LRU cache with per-entry expiry.
+
+    Entry sizes are estimated from their compact JSON encoding, which is what
+    the disk tier stores, so both tiers account for the same bytes.
+    """
+
+    def __init__(self, max_bytes: int = MEMORY_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[CacheEntry, float, int]]" = OrderedDict()
+        self._bytes = 0
+
+    @staticmethod
+    def _estimate_size(value: Any) -> int:
+        return len(json.dumps(value, separators=(",", ":"), default=str)) + 64
+
+    def get_entry(self, key: str) -> Optional[CacheEntry]:
+        """Get a live entry, dropping it if either its own or the tier's TTL passed"""
+        now = time.time()
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            entry, evict_at, _ = item
+            if evict_at <= now or entry.expired:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, entry: CacheEntry, ttl: Optional[float] = MEMORY_CACHE_TTL):
+        """Store an entry, keeping it no longer than the tier TTL"""
+        size = self._estimate_size(entry.value)
+        if size > self.max_bytes:
+            return
+        evict_at = time.time() + ttl if ttl is not None else float("inf")
+        with self._lock:
+            self._remove(entry.key)
+            self._entries[entry.key] = (entry, evict_at, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+
+    def invalidate(self, key: Optional[str] = None, prefix: Optional[str] = None):
+        """Drop one key, every key under a prefix, or everything"""
+        with self._lock:
+            if key is not None:
+                self._remove(key)
+                return
+            for cached_key in list(self._entries):
+                if prefix is None or cached_key.startswith(prefix):
+                    self._remove(cached_key)
+
+    def _remove(self, key: str):
+        item = self._entries.pop(key, None)
+        if item is not None:
+            self._bytes -= item[2]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes}
+
+
+class TieredCache:
+    """
+    Memory tier (L1) in front of a persistent CacheStore (L2).
+
+    Reads try L1 first and promote L2 hits with the entry's original expiry,
+    so an entry never outlives its disk TTL. Writes go through to L2 and
+    replace the L1 copy. The L1 TTL additionally bounds how long a process
+    can serve an entry that another process has since rewritten.
+    """
+
+    def __init__(self, store: CacheStore, memory: Optional[MemoryCache] = None):
+        self.store = store
+        self.memory = memory if memory is not None else MemoryCache()
+        self._lock = threading.Lock()
+        self._counts = {"l1_hits": 0, "l2_hits": 0, "misses": 0}
+
+    def _count(self, field: str):
+        with self._lock:
+            self._counts[field] += 1
+
+    def get_entry(self, key: str, include_expired: bool = False) -> Optional[CacheEntry]:
+        entry = self.memory.get_entry(key)
+        if entry is not None:
+            self._count("l1_hits")
+            return entry
+
+        entry = self.store.get_entry(key, include_expired=include_expired)
+        if entry is None:
+            self._count("misses")
+            return None
+        if entry.expired:
+            # Only handed out on request; never promoted to the memory tier
+            self._count("misses")
+            return entry
+        self._count("l2_hits")
+        self.memory.put(entry)
+        return entry
+
+    def get(self, key: str) -> Any:
+        entry = self.get_entry(key)
+        return entry.value if entry is not None else None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        self.store.set(key, value, ttl=ttl)
+        now = time.time()
+        self.memory.put(CacheEntry(key, value, now, now + ttl if ttl is not None else None))
+
+    def delete(self, key: str) -> bool:
+        self.memory.invalidate(key=key)
+        return self.store.delete(key)
+
+    def purge(self, prefix: Optional[str] = None, expired_only: bool = False) -> int:
+        self.memory.invalidate(prefix=prefix if prefix else None)
+        return self.store.purge(prefix, expired_only)
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-tier hit ratios plus the sizes of both tiers"""
+        with self._lock:
+            counts = dict(self._counts)
+        lookups = counts["l1_hits"] + counts["l2_hits"] + counts["misses"]
+        l1_misses = lookups - counts["l1_hits"]
+        return {
+            **counts,
+            "lookups": lookups,
+            "l1_hit_ratio": counts["l1_hits"] / lookups if lookups else 0.0,
+            "l2_hit_ratio": counts["l2_hits"] / l1_misses if l1_misses else 0.0,
+            "overall_hit_ratio": (counts["l1_hits"] + counts["l2_hits"]) / lookups if lookups else 0.0,
+            "memory": self.memory.stats(),
+            "disk": self.store.stats(),
+        }
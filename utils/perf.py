@@ -0,0 +1,210 @@
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, List, NamedTuple, Optional
+
+from config import PERF_MAX_RERUNS
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class RerunTimings:
+    """
+    Wall time of recent Streamlit reruns, per app section, shared by every
+    session in the process.
+
+    A full script run is wrapped in run("full"); a fragment rerun only
+    executes its section, so a section entered outside any run opens a
+    "fragment" run of its own. Keeps the last `max_reruns` runs.
+    """
+
+    def __init__(self, max_reruns: int = PERF_MAX_RERUNS):
+        self._runs: Deque[Dict[str, Any]] = deque(maxlen=max_reruns)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @contextmanager
+    def run(self, kind: str = "full"):
+        """Time one rerun; sections entered inside it are attributed to it"""
+        if getattr(self._local, "current", None) is not None:
+            yield  # Already inside a run
+            return
+        current = {"kind": kind, "sections": {}, "started_at": time.time()}
+        self._local.current = current
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            current["total"] = time.perf_counter() - started
+            self._local.current = None
+            with self._lock:
+                self._runs.append(current)
+
+    @contextmanager
+    def section(self, name: str):
+        """Time one section of the page"""
+        if getattr(self._local, "current", None) is None:
+            with self.run("fragment"):
+                with self.section(name):
+                    yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            sections = self._local.current["sections"]
+            sections[name] = sections.get(name, 0.0) + time.perf_counter() - started
+
+    def recent(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            runs = list(self._runs)
+        return runs[-limit:] if limit else runs
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Count, median and p95 in milliseconds per run kind and section"""
+        samples: Dict[tuple, List[float]] = {}
+        for run in self.recent():
+            samples.setdefault((run["kind"], "(total)"), []).append(run["total"])
+            for name, seconds in run["sections"].items():
+                samples.setdefault((run["kind"], name), []).append(seconds)
+        return [
+            {
+                "run": kind,
+                "section": name,
+                "count": len(values),
+                "median_ms": round(_percentile(values, 0.5) * 1000, 1),
+                "p95_ms": round(_percentile(values, 0.95) * 1000, 1),
+            }
+            for (kind, name), values in sorted(samples.items())
+        ]
+
+
+_default: Optional[RerunTimings] = None
+_default_lock = threading.Lock()
+
+
+def get_rerun_timings() -> RerunTimings:
+    """Process-wide rerun timings"""
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                _default = RerunTimings()
+    return _default
+
+
+class StartupProfile:
+    """
+    Milestones of the first script run in this process ("start", "imports",
+    "first_render", "ready"), in seconds since the first mark. Later reruns
+    find their names already marked and record nothing.
+    """
+
+    def __init__(self):
+        self._marks: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._printed = False
+
+    def mark(self, name: str):
+        with self._lock:
+            self._marks.setdefault(name, time.perf_counter())
+
+    def report(self) -> Dict[str, float]:
+        with self._lock:
+            marks = sorted(self._marks.items(), key=lambda item: item[1])
+        if not marks:
+            return {}
+        origin = marks[0][1]
+        return {name: round(moment - origin, 4) for name, moment in marks}
+
+    def print_once(self):
+        """Log the milestones once per process (enabled with STARTUP_PROFILE)"""
+        with self._lock:
+            if self._printed:
+                return
+            self._printed = True
+        print("Startup profile: " + ", ".join(f"{name} {seconds:.3f}s" for name, seconds in self.report().items()))
+
+
+STARTUP = StartupProfile()
+
+
+class ImportRecord(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int  # Nesting level in the import tree, 0 for top-level imports
+
+
+def parse_importtime(text: str) -> List[ImportRecord]:
+    """Parse the stderr of `python -X importtime`"""
+    records = []
+    for line in text.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # The header line
+        name = fields[2].rstrip()
+        stripped = name.lstrip(" ")
+        records.append(ImportRecord(stripped, int(fields[0]), int(fields[1]), (len(name) - len(stripped)) // 2 - 1))
+    return records
+
+
+def profile_imports(module: str = "app") -> List[ImportRecord]:
+    """Import `module` in a fresh interpreter and return its import times"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def profile_first_run(script: str = "app.py", timeout: float = 120) -> Dict[str, float]:
+    """Run the app script once headless and return its startup milestones"""
+    from streamlit.testing.v1 import AppTest
+    from utils import perf  # The app marks this module's STARTUP, not __main__'s
+    AppTest.from_file(os.path.abspath(script), default_timeout=timeout).run()
+    return perf.STARTUP.report()
+
+
+def main(argv: Optional[List[str]] = None):
+    """Startup profiling: python -m utils.perf --help"""
+    parser = argparse.ArgumentParser(description="Profile the app's cold start")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    imports_parser = subparsers.add_parser("imports", help="Import time per module (python -X importtime)")
+    imports_parser.add_argument("module", nargs="?", default="app")
+    imports_parser.add_argument("--top", type=int, default=20, help="Modules to list")
+    imports_parser.add_argument("--self", action="store_true", help="Sort by self time instead of cumulative")
+    first_run_parser = subparsers.add_parser("first-run", help="Time to first render of a headless app run")
+    first_run_parser.add_argument("script", nargs="?", default="app.py")
+    args = parser.parse_args(argv)
+
+    if args.command == "imports":
+        records = profile_imports(args.module)
+        total = sum(record.cumulative_us for record in records if record.depth == 0)
+        print(f"Importing {args.module}: {total / 1e6:.3f}s in {len(records)} modules")
+        key = (lambda record: record.self_us) if args.self else (lambda record: record.cumulative_us)
+        print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+        for record in sorted(records, key=key, reverse=True)[:args.top]:
+            print(f"{record.cumulative_us / 1000:14.1f} {record.self_us / 1000:9.1f}  {record.module}")
+    else:
+        started = time.perf_counter()
+        report = profile_first_run(args.script)
+        print(f"Headless run took {time.perf_counter() - started:.3f}s")
+        for name, seconds in report.items():
+            print(f"{name:>14}: {seconds:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
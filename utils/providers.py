@@ -0,0 +1,345 @@
+import datetime
+import math
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait as wait_futures
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence
+
+import ephem
+
+from utils.deadline import Deadline
+from utils.rate_limiter import PRIORITY_INTERACTIVE
+
+PLANETS = ["Sun", "Moon", "Mars", "Mercury", "Jupiter", "Venus", "Saturn", "Rahu", "Ketu"]
+REQUIRED_FIELDS = ("name", "longitude", "latitude", "speed", "house", "sign")
+REQUIRED_BODIES = ("Sun", "Moon", "Ascendant")
+
+
+class ProviderUnavailable(Exception):
+    """Raised when a provider declines a request it cannot serve right now"""
+
+
+class ChartRequest(NamedTuple):
+    """Everything a provider needs to compute a birth chart (local birth time, `tzone` hours ahead of UTC)"""
+    birth_date: datetime.date
+    birth_time: datetime.time
+    latitude: float
+    longitude: float
+    observation_point: str = "topocentric"
+    ayanamsha: str = "lahiri"
+    tzone: float = 0.0
+    priority: int = PRIORITY_INTERACTIVE  # Only used by rate limited providers
+
+
+def is_acceptable(chart: Any) -> bool:
+    """A chart is usable if it has the luminaries and the ascendant and every entry has all fields"""
+    if not isinstance(chart, list) or not chart:
+        return False
+    names = set()
+    for planet in chart:
+        if not isinstance(planet, dict) or not all(field in planet for field in REQUIRED_FIELDS):
+            return False
+        names.add(planet["name"])
+    return names.issuperset(REQUIRED_BODIES)
+
+
+def tag_chart(chart: List[Dict[str, Any]], provider: str) -> List[Dict[str, Any]]:
+    """Copy of the chart with every entry tagged with the provider that produced it"""
+    # Copies, since cached charts are shared between sessions
+    return [dict(planet, provider=provider) for planet in chart]
+
+
+def _with_houses(planets: List[Dict[str, Any]], ascendant: float, latitude: float) -> List[Dict[str, Any]]:
+    """Add whole-sign houses relative to the ascendant and append the ascendant itself"""
+    lagna_sign = int(ascendant / 30)
+    for planet in planets:
+        planet["sign"] = int(planet["longitude"] / 30)
+        planet["house"] = (planet["sign"] - lagna_sign) % 12 + 1
+    planets.append({
+        "name": "Ascendant",
+        "longitude": ascendant,
+        "latitude": latitude,
+        "speed": 0,
+        "house": 1,
+        "sign": lagna_sign
+    })
+    return planets
+
+
+class Provider:
+    """Source of birth chart data; subclasses implement birth_chart()"""
+
+    name = "provider"
+    inline = False  # True for providers fast enough to run in the caller's thread when hedging
+
+    def birth_chart(self, request: ChartRequest, deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+
+class RemoteAPIProvider(Provider):
+    """The free astrology API, through AstroAPI's cache, rate limiter and breaker"""
+
+    name = "remote"
+
+    def __init__(self, fetch: Optional[Callable[..., List[Dict[str, Any]]]] = None):
+        self._fetch = fetch
+
+    def birth_chart(self, request: ChartRequest, deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
+        fetch = self._fetch
+        if fetch is None:
+            # Imported here: AstroAPI builds its provider chain at import time
+            from utils.astro_api import AstroAPI
+            fetch = AstroAPI._remote_birth_chart
+        return fetch(*request, deadline=deadline)
+
+
+class LocalEphemerisProvider(Provider):
+    """
+    Sidereal positions computed locally with PyEphem.
+
+    Tropical geocentric longitudes are shifted by the Lahiri ayanamsa; Rahu is
+    the mean lunar node and Ketu sits opposite it. Houses are whole-sign from
+    the ascendant. Takes well under a millisecond, so it is always available.
+    """
+
+    name = "local"
+    inline = True
+
+    BODIES = {
+        "Sun": ephem.Sun,
+        "Moon": ephem.Moon,
+        "Mars": ephem.Mars,
+        "Mercury": ephem.Mercury,
+        "Jupiter": ephem.Jupiter,
+        "Venus": ephem.Venus,
+        "Saturn": ephem.Saturn,
+    }
+
+    @staticmethod
+    def _centuries(moment: datetime.datetime) -> float:
+        """Julian centuries since J2000.0"""
+        return (ephem.julian_date(moment) - 2451545.0) / 36525.0
+
+    @staticmethod
+    def ayanamsa(moment: datetime.datetime) -> float:
+        """Lahiri ayanamsa in degrees (linear precession from its J2000 value)"""
+        return 23.85306 + 1.39722 * LocalEphemerisProvider._centuries(moment)
+
+    @staticmethod
+    def mean_node(moment: datetime.datetime) -> float:
+        """Tropical longitude of the mean ascending lunar node"""
+        t = LocalEphemerisProvider._centuries(moment)
+        return (125.04452 - 1934.136261 * t + 0.0020708 * t * t) % 360
+
+    @staticmethod
+    def ascendant(moment: datetime.datetime, latitude: float, longitude: float) -> float:
+        """Tropical longitude of the eastern horizon"""
+        observer = ephem.Observer()
+        observer.lat = str(latitude)
+        observer.lon = str(longitude)
+        observer.date = moment
+        ramc = float(observer.sidereal_time())
+        obliquity = math.radians(23.4392911 - 0.0130042 * LocalEphemerisProvider._centuries(moment))
+        # Keep tan() finite at the poles
+        phi = math.radians(max(-89.9, min(89.9, latitude)))
+        ascendant = math.atan2(
+            math.cos(ramc),
+            -(math.sin(ramc) * math.cos(obliquity) + math.tan(phi) * math.sin(obliquity))
+        )
+        return math.degrees(ascendant) % 360
+
+    @staticmethod
+    def _tropical(body_type, moment: datetime.datetime):
+        body = body_type(moment)
+        ecliptic = ephem.Ecliptic(body, epoch=moment)
+        return math.degrees(float(ecliptic.lon)), math.degrees(float(ecliptic.lat))
+
+    def birth_chart(self, request: ChartRequest, deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
+        moment = (datetime.datetime.combine(request.birth_date, request.birth_time)
+                  - datetime.timedelta(hours=request.tzone))
+        next_day = moment + datetime.timedelta(days=1)
+        ayanamsa = self.ayanamsa(moment)
+
+        planets = []
+        for name, body_type in self.BODIES.items():
+            tropical, ecliptic_latitude = self._tropical(body_type, moment)
+            tomorrow, _ = self._tropical(body_type, next_day)
+            planets.append({
+                "name": name,
+                "longitude": (tropical - ayanamsa) % 360,
+                "latitude": ecliptic_latitude,
+                # Degrees per day; negative while retrograde
+                "speed": (tomorrow - tropical + 180) % 360 - 180,
+            })
+
+        rahu = (self.mean_node(moment) - ayanamsa) % 360
+        node_speed = -0.05295  # Mean node regresses about 19.3° a year
+        planets.append({"name": "Rahu", "longitude": rahu, "latitude": 0, "speed": node_speed})
+        planets.append({"name": "Ketu", "longitude": (rahu + 180) % 360, "latitude": 0, "speed": node_speed})
+
+        ascendant = (self.ascendant(moment, request.latitude, request.longitude) - ayanamsa) % 360
+        return _with_houses(planets, ascendant, request.latitude)
+
+
+class StubProvider(Provider):
+    """
+    Fixed chart for tests and offline development, with optional latency
+    and failures for exercising the chain.
+    """
+
+    name = "stub"
+
+    def __init__(self, chart: Optional[List[Dict[str, Any]]] = None, delay: float = 0.0,
+                 error: Optional[Exception] = None):
+        self.chart = chart
+        self.delay = delay
+        self.error = error
+
+    def birth_chart(self, request: ChartRequest, deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
+        if self.delay:
+            time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        if self.chart is not None:
+            return [dict(planet) for planet in self.chart]
+        planets = [
+            {"name": name, "longitude": index * 30.0 + 15.0, "latitude": 0, "speed": 1.0}
+            for index, name in enumerate(PLANETS)
+        ]
+        return _with_houses(planets, 0.0, request.latitude)
+
+
+PROVIDER_TYPES = {
+    RemoteAPIProvider.name: RemoteAPIProvider,
+    LocalEphemerisProvider.name: LocalEphemerisProvider,
+    StubProvider.name: StubProvider,
+}
+
+
+class ProviderChain:
+    """
+    Ordered list of providers, most preferred first.
+
+    Without hedging each provider is tried in turn until one returns an
+    acceptable chart. With hedging every provider starts at once: inline
+    providers (local calculations) in the calling thread, the others on a
+    thread pool. The first acceptable chart is returned, unless a more
+    preferred provider is still running; that one gets up to `prefer`
+    seconds more to answer. Nothing waits past the deadline (or `wait`
+    seconds without one). Pooled calls run under their own `budget` seconds
+    rather than the page's deadline, so a slow remote call keeps running
+    after being passed over and still fills the cache for the next request.
+    Charts are tagged with the name of the provider that produced them.
+    """
+
+    def __init__(self, providers: Sequence[Provider], hedge: bool = True, wait: float = 3.0,
+                 prefer: float = 0.25, budget: float = 5.0, max_workers: int = 4):
+        if not providers:
+            raise ValueError("A provider chain needs at least one provider")
+        self.providers = list(providers)
+        self.hedge = hedge
+        self.wait = wait
+        self.prefer = prefer
+        self.budget = budget
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="astro-provider")
+        self._lock = threading.Lock()
+        self._counts: Dict[str, Dict[str, int]] = {
+            provider.name: {"served": 0, "failed": 0, "passed_over": 0} for provider in self.providers
+        }
+
+    @staticmethod
+    def from_names(names: str, hedge: bool = True, wait: float = 3.0, prefer: float = 0.25,
+                   budget: float = 5.0) -> "ProviderChain":
+        """Build a chain from a comma separated list such as "remote,local" """
+        providers = []
+        for name in names.split(","):
+            name = name.strip().lower()
+            if not name:
+                continue
+            if name not in PROVIDER_TYPES:
+                raise ValueError(f"Unknown astrology provider: {name}")
+            providers.append(PROVIDER_TYPES[name]())
+        return ProviderChain(providers, hedge=hedge, wait=wait, prefer=prefer, budget=budget)
+
+    def _count(self, provider: Provider, outcome: str):
+        with self._lock:
+            self._counts[provider.name][outcome] += 1
+
+    def _check(self, provider: Provider, chart: Any) -> Optional[List[Dict[str, Any]]]:
+        """The tagged chart if it is acceptable; unusable charts count as failures"""
+        if is_acceptable(chart):
+            return tag_chart(chart, provider.name)
+        print(f"Provider {provider.name} returned an unusable chart")
+        self._count(provider, "failed")
+        return None
+
+    def _call(self, provider: Provider, request: ChartRequest,
+              deadline: Optional[Deadline]) -> Optional[List[Dict[str, Any]]]:
+        try:
+            return self._check(provider, provider.birth_chart(request, deadline))
+        except Exception as e:
+            print(f"Provider {provider.name} failed: {e}")
+            self._count(provider, "failed")
+            return None
+
+    def birth_chart(self, request: ChartRequest, deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
+        """Chart from the most preferred provider that answers acceptably in time"""
+        if self.hedge and len(self.providers) > 1:
+            return self._hedged(request, deadline)
+        for provider in self.providers:
+            chart = self._call(provider, request, deadline)
+            if chart is not None:
+                self._count(provider, "served")
+                return chart
+        raise ProviderUnavailable("No astrology provider returned a chart")
+
+    def _hedged(self, request: ChartRequest, deadline: Optional[Deadline]) -> List[Dict[str, Any]]:
+        started = time.monotonic()
+        wait_until = started + (deadline.remaining() if deadline is not None else self.wait)
+        # Pooled calls get a budget of their own, so they can outlive the page's deadline
+        pending = {self._executor.submit(provider.birth_chart, request, Deadline(self.budget)): rank
+                   for rank, provider in enumerate(self.providers) if not provider.inline}
+        charts: Dict[int, List[Dict[str, Any]]] = {}  # By rank
+        for rank, provider in enumerate(self.providers):
+            if provider.inline:
+                chart = self._call(provider, request, deadline)
+                if chart is not None:
+                    charts[rank] = chart
+        first_chart_at = time.monotonic() if charts else None
+
+        while True:
+            best = min(charts) if charts else len(self.providers)
+            preferred = [future for future, rank in pending.items() if rank < best]
+            if not preferred:
+                break
+            until = wait_until if first_chart_at is None else min(wait_until, first_chart_at + self.prefer)
+            done, _ = wait_futures(preferred, timeout=max(0.0, until - time.monotonic()),
+                                   return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                rank = pending.pop(future)
+                provider = self.providers[rank]
+                try:
+                    chart = self._check(provider, future.result())
+                except Exception as e:
+                    print(f"Provider {provider.name} failed: {e}")
+                    self._count(provider, "failed")
+                    continue
+                if chart is not None:
+                    charts[rank] = chart
+                    if first_chart_at is None:
+                        first_chart_at = time.monotonic()
+
+        for rank in pending.values():
+            self._count(self.providers[rank], "passed_over")
+        if not charts:
+            raise ProviderUnavailable("No astrology provider returned a chart in time")
+        best = min(charts)
+        self._count(self.providers[best], "served")
+        return charts[best]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = {name: dict(outcomes) for name, outcomes in self._counts.items()}
+        return {"hedge": self.hedge, "providers": counts}
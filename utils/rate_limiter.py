@@ -0,0 +1,123 @@
+import heapq
+import itertools
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+# Lower values are served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+
+class QueueTimeoutError(Exception):
+    """Raised when a request could not get a slot within its allowed wait"""
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, holding at most `capacity`"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self._updated = time.monotonic()
+
+    def refill(self, now: float):
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self._updated = now
+
+    def time_until(self, tokens: float, now: float) -> float:
+        """Seconds until `tokens` tokens are available (0 if already there)"""
+        self.refill(now)
+        missing = tokens - self.tokens
+        return max(0.0, missing / self.rate) if self.rate > 0 else float("inf")
+
+    def drain(self, until: float):
+        """Empty the bucket and stop refilling it before `until`"""
+        self.tokens = 0.0
+        self._updated = max(self._updated, until)
+
+
+class RequestScheduler:
+    """
+    Process-wide token-bucket scheduler with a priority queue.
+
+    Every upstream request takes one token. Callers queue by priority (then
+    arrival order), so interactive requests overtake queued batch work, and a
+    429 from upstream pauses the whole queue once instead of every thread
+    sleeping on its own backoff.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self._bucket = TokenBucket(rate, burst)
+        self._cond = threading.Condition()
+        self._queue: List[Tuple[int, int]] = []
+        self._sequence = itertools.count()
+        self._paused_until = 0.0
+        self._granted = 0
+        self._timed_out = 0
+
+    def _wait_for_head(self, now: float) -> float:
+        """Seconds until the head of the queue can be served"""
+        pause = max(0.0, self._paused_until - now)
+        return max(pause, self._bucket.time_until(1, now))
+
+    def acquire(self, priority: int = PRIORITY_INTERACTIVE, timeout: Optional[float] = None) -> bool:
+        """Wait for a request slot; returns False if `timeout` seconds pass first"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._cond:
+            ticket = (priority, next(self._sequence))
+            heapq.heappush(self._queue, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = self._wait_for_head(now)
+                    if self._queue[0] == ticket and wait <= 0:
+                        heapq.heappop(self._queue)
+                        self._bucket.tokens -= 1
+                        self._granted += 1
+                        return True
+                    if deadline is not None and now >= deadline:
+                        self._queue.remove(ticket)
+                        heapq.heapify(self._queue)
+                        self._timed_out += 1
+                        return False
+                    if self._queue[0] != ticket:
+                        wait = None  # Woken up when the head is served
+                    if deadline is not None:
+                        wait = deadline - now if wait is None else min(wait, deadline - now)
+                    self._cond.wait(wait)
+            finally:
+                self._cond.notify_all()
+
+    def estimated_wait(self, priority: int = PRIORITY_INTERACTIVE) -> float:
+        """Estimated seconds before a new request at this priority would be sent"""
+        with self._cond:
+            now = time.monotonic()
+            ahead = sum(1 for queued_priority, _ in self._queue if queued_priority <= priority)
+            pause = max(0.0, self._paused_until - now)
+            return max(pause, self._bucket.time_until(ahead + 1, now))
+
+    def penalize(self, seconds: float):
+        """Pause all requests for `seconds` (e.g. after an HTTP 429)"""
+        with self._cond:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._bucket.drain(self._paused_until)
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, float]:
+        with self._cond:
+            now = time.monotonic()
+            self._bucket.refill(now)
+            return {
+                "queued": len(self._queue),
+                "tokens": round(self._bucket.tokens, 3),
+                "rate": self._bucket.rate,
+                "burst": self._bucket.capacity,
+                "paused_for": round(max(0.0, self._paused_until - now), 3),
+                "granted": self._granted,
+                "timed_out": self._timed_out,
+            }
@@ -0,0 +1,95 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class _Call:
+    """A single in-flight execution shared by every caller with the same key"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical calls into one execution.
+
+    The first caller for a key runs the function; callers arriving while it is
+    still running wait for it and receive the same result (or exception).
+    Nothing is remembered once the call completes, so this sits in front of a
+    cache rather than replacing it.
+    """
+
+    MAX_TRACKED_KEYS = 1024  # Bound on per-key metrics kept in memory
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._stats: "OrderedDict[Hashable, Dict[str, int]]" = OrderedDict()
+
+    def _key_stats(self, key: Hashable) -> Dict[str, int]:
+        """Get (and mark as recently used) the counters for a key"""
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = {"calls": 0, "executions": 0, "coalesced": 0}
+            self._stats[key] = stats
+            while len(self._stats) > self.MAX_TRACKED_KEYS:
+                self._stats.popitem(last=False)
+        else:
+            self._stats.move_to_end(key)
+        return stats
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args,
+           wait_timeout: Optional[float] = None, **kwargs) -> Any:
+        """
+        Run fn(*args, **kwargs) unless an identical call is already in flight.
+        Callers that join an in-flight call give up with TimeoutError after
+        `wait_timeout` seconds; the call itself keeps running for the others.
+        """
+        with self._lock:
+            stats = self._key_stats(key)
+            stats["calls"] += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                stats["executions"] += 1
+            else:
+                stats["coalesced"] += 1
+
+        if not leader:
+            if not call.done.wait(wait_timeout):
+                raise TimeoutError(f"Timed out waiting for in-flight {self.name} call")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self) -> int:
+        """Number of keys currently being executed"""
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-key and total counts of calls, upstream executions and coalesced calls"""
+        with self._lock:
+            per_key = {str(key): dict(counts) for key, counts in self._stats.items()}
+        totals = {"calls": 0, "executions": 0, "coalesced": 0}
+        for counts in per_key.values():
+            for field in totals:
+                totals[field] += counts[field]
+        return {"name": self.name, "totals": totals, "keys": per_key}
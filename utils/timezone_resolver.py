@@ -0,0 +1,187 @@
+import datetime
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pytz
+from timezonefinder import TimezoneFinder
+
+from config import TIMEZONE_GRID_RESOLUTION
+
+
+def _nautical_zone(longitude: float) -> str:
+    """Etc/GMT zone for the open ocean: Etc/GMT-5 is UTC+5"""
+    hours = int(np.clip(round(longitude / 15), -12, 12))
+    return "Etc/GMT" if hours == 0 else f"Etc/GMT{-hours:+d}"
+
+
+class TimezoneResolver:
+    """
+    Offline coordinates -> IANA zone -> UTC offset.
+
+    Zones come from the timezone boundary polygons shipped with
+    timezonefinder (territorial waters and Etc/GMT nautical zones included).
+    A single place is looked up in the polygons directly, in microseconds.
+    For bulk lookups the polygons are rasterized once, on first use or by
+    build_grid(), into a grid of `resolution` degree cells, each holding the
+    zone at its centre. Cells next to a cell of another zone are marked as
+    border cells; the distinct points in those are looked up in the polygons,
+    so places near a border get their real zone. Everywhere else a lookup is
+    a single array index, so millions of rows resolve in milliseconds.
+
+    Offsets come from each zone's pytz transition table, so historical
+    offsets and DST are those in force at the local birth time. Ambiguous
+    local times (clocks going back) resolve to standard time.
+    """
+
+    def __init__(self, resolution: float = TIMEZONE_GRID_RESOLUTION):
+        self.resolution = resolution
+        self.zones: List[str] = []
+        self._zone_index: Dict[str, int] = {}
+        self._zones_lock = threading.Lock()
+        self._transitions: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        self._transitions_lock = threading.Lock()
+        self._finder = TimezoneFinder()
+        self._grid: Optional[Tuple[np.ndarray, np.ndarray]] = None  # (grid, border), see build_grid()
+        self._grid_lock = threading.Lock()
+
+    def _zone_id(self, zone: str) -> int:
+        with self._zones_lock:
+            if zone not in self._zone_index:
+                self._zone_index[zone] = len(self.zones)
+                self.zones.append(zone)
+            return self._zone_index[zone]
+
+    def _polygon_zone(self, latitude: float, longitude: float) -> str:
+        return self._finder.timezone_at(lng=longitude, lat=latitude) or _nautical_zone(longitude)
+
+    def build_grid(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(zone index per cell, whether the cell is on a border), rasterized on first call"""
+        if self._grid is None:
+            with self._grid_lock:
+                if self._grid is None:
+                    self._grid = self._rasterize()
+        return self._grid
+
+    def _rasterize(self) -> Tuple[np.ndarray, np.ndarray]:
+        rows = int(round(180 / self.resolution))
+        cols = int(round(360 / self.resolution))
+        cell_lat = -90 + (np.arange(rows) + 0.5) * self.resolution
+        cell_lon = -180 + (np.arange(cols) + 0.5) * self.resolution
+        grid = np.empty((rows, cols), dtype=np.int16)
+        for row, latitude in enumerate(cell_lat.tolist()):
+            for col, longitude in enumerate(cell_lon.tolist()):
+                grid[row, col] = self._zone_id(self._polygon_zone(latitude, longitude))
+
+        # A cell is on a border if any of its eight neighbours (wrapping around in longitude) differs
+        padded = np.pad(grid, ((1, 1), (0, 0)), mode="edge")
+        border = np.zeros(grid.shape, dtype=bool)
+        for row_shift in (0, 1, 2):
+            for col_shift in (-1, 0, 1):
+                border |= np.roll(padded[row_shift:row_shift + rows], col_shift, axis=1) != grid
+        return grid, border
+
+    def _cells(self, grid: np.ndarray, latitudes: np.ndarray,
+               longitudes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        rows, cols = grid.shape
+        row = np.clip(((latitudes + 90) / self.resolution).astype(int), 0, rows - 1)
+        col = ((longitudes + 180) / self.resolution).astype(int) % cols
+        return row, col
+
+    def zone_ids_at(self, latitudes: Sequence[float], longitudes: Sequence[float]) -> np.ndarray:
+        """Zone index (into self.zones) for each coordinate pair"""
+        latitudes = np.asarray(latitudes, dtype=float)
+        longitudes = np.asarray(longitudes, dtype=float)
+        grid, border = self.build_grid()
+        row, col = self._cells(grid, latitudes, longitudes)
+        zone_ids = grid[row, col]
+        near_border = np.flatnonzero(border[row, col])
+        if near_border.size:
+            # Bulk data repeats places, so each distinct point is looked up once
+            points, inverse = np.unique(np.column_stack((latitudes[near_border], longitudes[near_border])),
+                                        axis=0, return_inverse=True)
+            point_ids = np.array([self._zone_id(self._polygon_zone(latitude, longitude))
+                                  for latitude, longitude in points.tolist()], dtype=grid.dtype)
+            zone_ids[near_border] = point_ids[inverse.ravel()]
+        return zone_ids
+
+    def zone_at(self, latitude: float, longitude: float) -> str:
+        return self._polygon_zone(float(latitude), float(longitude))
+
+    def utc_offset(self, zone: str, local: datetime.datetime) -> float:
+        """UTC offset in hours of a naive local time in `zone`, DST included"""
+        return pytz.timezone(zone).localize(local, is_dst=False).utcoffset().total_seconds() / 3600.0
+
+    def _transition_table(self, zone_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(UTC transition instants in seconds, offset in seconds from each)"""
+        table = self._transitions.get(zone_id)
+        if table is None:
+            tz = pytz.timezone(self.zones[zone_id])
+            if hasattr(tz, "_utc_transition_times"):
+                # pytz keeps no public transition list; reading its table is far faster than probing utcoffset()
+                epoch = datetime.datetime(1970, 1, 1)
+                starts = np.array([(moment - epoch).total_seconds() if moment.year > 1 else -np.inf
+                                   for moment in tz._utc_transition_times])
+                offsets = np.array([info[0].total_seconds() for info in tz._transition_info])
+            else:
+                starts = np.array([-np.inf])
+                offsets = np.array([tz.utcoffset(datetime.datetime(2000, 1, 1)).total_seconds()])
+            table = (starts, offsets)
+            with self._transitions_lock:
+                self._transitions[zone_id] = table
+        return table
+
+    def utc_offsets(self, zone_ids: Sequence[int], local_times: Sequence) -> np.ndarray:
+        """
+        Vectorized UTC offsets in hours for naive local times (datetime64 or
+        datetime) in the given zones, one pass per distinct zone.
+        """
+        zone_ids = np.asarray(zone_ids)
+        seconds = np.asarray(local_times, dtype="datetime64[s]").astype(np.int64).astype(float)
+        # Sort once so each zone is a contiguous slice
+        order = np.argsort(zone_ids, kind="stable")
+        sorted_ids = zone_ids[order]
+        sorted_seconds = seconds[order]
+        offsets_sorted = np.empty(len(seconds))
+        bounds = np.flatnonzero(np.diff(sorted_ids)) + 1
+        for start, end in zip(np.concatenate(([0], bounds)), np.concatenate((bounds, [len(sorted_ids)]))):
+            if start == end:
+                continue
+            starts, offsets = self._transition_table(int(sorted_ids[start]))
+            local = sorted_seconds[start:end]
+            # Treat local time as UTC for a first guess, then correct with that offset
+            guess = offsets[np.searchsorted(starts, local, side="right") - 1]
+            offsets_sorted[start:end] = offsets[np.searchsorted(starts, local - guess, side="right") - 1]
+        result = np.empty(len(seconds))
+        result[order] = offsets_sorted
+        return result / 3600.0
+
+    def resolve(self, latitude: float, longitude: float, local: datetime.datetime) -> Tuple[str, float]:
+        """(zone, UTC offset in hours) for a local birth time at a place"""
+        zone = self.zone_at(latitude, longitude)
+        return zone, self.utc_offset(zone, local)
+
+    def resolve_many(self, latitudes: Sequence[float], longitudes: Sequence[float],
+                     local_times: Sequence) -> Tuple[np.ndarray, np.ndarray]:
+        """(zone indices, UTC offsets in hours) for arrays of places and local times"""
+        zone_ids = self.zone_ids_at(latitudes, longitudes)
+        return zone_ids, self.utc_offsets(zone_ids, local_times)
+
+
+_default: Optional[TimezoneResolver] = None
+_default_lock = threading.Lock()
+
+
+def get_timezone_resolver() -> TimezoneResolver:
+    """Process-wide resolver; the bulk lookup grid is built on first use"""
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                _default = TimezoneResolver()
+    return _default
+
+
+def utc_offset_at(latitude: float, longitude: float, local: datetime.datetime) -> float:
+    """UTC offset in hours for a local time at a place"""
+    return get_timezone_resolver().resolve(latitude, longitude, local)[1]
@@ -0,0 +1,181 @@
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import READINESS_PATH
+
+PRIME_CHARTS = 50  # Famous charts predicted during warm-up
+
+
+def _load_model():
+    from model.career_predictor import get_predictor
+    if get_predictor().model is None:
+        raise RuntimeError("the model failed to load")
+
+
+def _build_explainer():
+    from model.career_predictor import get_predictor
+    get_predictor().forest_paths()
+
+
+def _load_personalities():
+    from utils.famous_personalities import get_dataset
+    get_dataset().as_dict()
+
+
+def _build_chart_index():
+    from utils.chart_similarity import get_chart_index
+    get_chart_index()
+
+
+def _prime_predictions():
+    # Runs sklearn's predict path once on a sample of famous charts
+    from model.career_predictor import get_predictor
+    from utils.famous_personalities import get_dataset
+    predictor = get_predictor()
+    dataset = get_dataset()
+    for row in range(min(len(dataset), PRIME_CHARTS)):
+        predictor.predict(dataset.record(row)['planet_positions'])
+
+
+def _load_gazetteer():
+    from utils.gazetteer import get_gazetteer
+    get_gazetteer().labels()
+
+
+def _build_timezone_grid():
+    from utils.timezone_resolver import get_timezone_resolver
+    get_timezone_resolver().build_grid()
+
+
+def _open_caches():
+    from utils.astro_api import AstroAPI  # Opens the persistent cache and builds the chart templates
+    AstroAPI.CACHE.stats()
+
+
+# (name, step, required): the server is not ready until every required step succeeds
+STEPS: List[Tuple[str, Callable[[], None], bool]] = [
+    ("model", _load_model, True),
+    ("explainer", _build_explainer, False),
+    ("personalities", _load_personalities, False),
+    ("chart_index", _build_chart_index, False),
+    ("predictions", _prime_predictions, False),
+    ("gazetteer", _load_gazetteer, False),
+    ("timezones", _build_timezone_grid, False),
+    ("caches", _open_caches, False),
+]
+
+_state: Dict[str, Any] = {"ready": False, "steps": {}}
+_state_lock = threading.Lock()
+
+
+def _write_marker(path: Path, status: Dict[str, Any]):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=str(path.parent), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(status, f, indent=2)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def warm_up(readiness_path: Optional[str] = READINESS_PATH) -> Dict[str, Any]:
+    """
+    Load everything the first session would otherwise wait for: the model
+    and its explanation tables, the famous personalities and their chart
+    index, the gazetteer, the timezone grid and the API caches. Everything
+    is kept in this process, so run it in the server process
+    (python -m utils.warmup --serve app.py). When done, and the required
+    steps succeeded, the status is written to `readiness_path`.
+    """
+    marker = Path(readiness_path) if readiness_path else None
+    if marker is not None and marker.exists():
+        marker.unlink()  # Left by an earlier server
+
+    started_at = time.time()
+    steps: Dict[str, Any] = {}
+    ready = True
+    for name, step, required in STEPS:
+        started = time.perf_counter()
+        try:
+            step()
+            steps[name] = {"seconds": round(time.perf_counter() - started, 3)}
+        except Exception as e:
+            print(f"Warm-up step {name} failed: {e}")
+            steps[name] = {"seconds": round(time.perf_counter() - started, 3), "error": str(e)}
+            ready = ready and not required
+
+    status = {"ready": ready, "pid": os.getpid(), "started_at": started_at,
+              "finished_at": time.time(), "steps": steps}
+    with _state_lock:
+        _state.update(status)
+    if ready and marker is not None:
+        try:
+            _write_marker(marker, status)
+        except Exception as e:
+            print(f"Error writing readiness marker: {e}")
+    return status
+
+
+def is_ready() -> bool:
+    """Whether this process has finished warming up"""
+    with _state_lock:
+        return bool(_state["ready"])
+
+
+def check_ready(readiness_path: str = READINESS_PATH) -> Optional[Dict[str, Any]]:
+    """The readiness marker of a running warmed-up server, or None"""
+    try:
+        with open(readiness_path) as f:
+            status = json.load(f)
+        os.kill(int(status["pid"]), 0)  # Raises if the server that wrote it has exited
+    except PermissionError:
+        pass  # Running as another user
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    return status if status.get("ready") else None
+
+
+def main(argv: Optional[List[str]] = None):
+    """Warm-up hook and readiness check: python -m utils.warmup --help"""
+    parser = argparse.ArgumentParser(
+        description="Warm up the app before the first session",
+        epilog="Arguments after the script are passed to `streamlit run`, "
+               "e.g. python -m utils.warmup --serve app.py --server.port 10000"
+    )
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--serve", metavar="SCRIPT", help="Warm up, then run the Streamlit app in this process")
+    group.add_argument("--check", action="store_true",
+                       help="Exit non-zero unless a warmed-up server is running")
+    parser.add_argument("--readiness-path", default=READINESS_PATH, help="Readiness marker file")
+    args, streamlit_args = parser.parse_known_args(argv)
+
+    if args.check:
+        status = check_ready(args.readiness_path)
+        if status is None:
+            raise SystemExit("Not ready")
+        print(f"Ready (pid {status['pid']}, warmed up in {status['finished_at'] - status['started_at']:.1f}s)")
+        return
+
+    status = warm_up(args.readiness_path if args.serve else None)
+    for name, step in status["steps"].items():
+        print(f"{name:>13}: {step['seconds']:.3f}s" + (f"  FAILED: {step['error']}" if "error" in step else ""))
+    if not status["ready"]:
+        raise SystemExit("Warm-up failed")
+    if args.serve:
+        from streamlit.web import cli as streamlit_cli
+        streamlit_cli.main(args=["run", args.serve] + streamlit_args, prog_name="streamlit")
+    elif streamlit_args:
+        parser.error(f"unrecognized arguments: {' '.join(streamlit_args)}")
+
+
+if __name__ == "__main__":
+    main()